@@ -1,20 +1,49 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from app.middleware.session_auth import SessionAuthMiddleware
+from app.middleware.conditional_get import ConditionalGetMiddleware
+from app.middleware.device_detection import DeviceDetectionMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.utils.profile_utils import profile_protection_queue
+from app.utils.photo import photo_upload_queue
+from app.utils.supabase_client import client_registry
+from app.utils import auth_gateway
+from app.utils.templating import precompile_templates
+from app.utils.fast_json import FastJSONResponse
+from app.utils.static_assets import PrecompressedStaticFiles, precompress_static, build_asset_manifest
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Asset Management System")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    client_registry.startup()
+    profile_protection_queue.start()
+    photo_upload_queue.start()
+    precompile_templates()
+    precompress_static()
+    build_asset_manifest()
+    yield
+    # Shutdown
+    profile_protection_queue.stop()
+    photo_upload_queue.stop()
+    await auth_gateway.close()
+    client_registry.shutdown()
 
-# Add middleware
+app = FastAPI(title="Asset Management System", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Add middleware (last added runs first)
+app.add_middleware(ConditionalGetMiddleware)  # needs request.state.user, so inside session auth
 app.add_middleware(SessionAuthMiddleware)
+app.add_middleware(DeviceDetectionMiddleware)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Mount static files (fingerprinted names, precompressed .br/.gz variants)
+app.mount("/static", PrecompressedStaticFiles(directory="app/static"), name="static")
 
 # Favicon route
 @app.get("/favicon.ico")
@@ -25,7 +54,8 @@ async def favicon():
 from app.routes import (
     login, health, offline, home, assets, asset_management,
     damage, profile, repair, approvals, disposal, user_management,
-    logs, relocation, export, depreciation, lost, forgot_password, bulk_update, assigned_user
+    logs, relocation, export, depreciation, lost, forgot_password, bulk_update, assigned_user,
+    events
 )
 
 # Include all routers
@@ -49,6 +79,7 @@ app.include_router(export.router)
 app.include_router(depreciation.router)
 app.include_router(bulk_update.router)
 app.include_router(assigned_user.router)
+app.include_router(events.router)
 
 
 logger.info("All routes loaded successfully")
@@ -0,0 +1,128 @@
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip only
+    brotli = None
+
+# text/event-stream is left out on purpose: SSE frames must reach the client
+# as they are written
+COMPRESSIBLE_TYPES = (
+    "text/html", "text/css", "text/plain", "text/csv", "text/javascript",
+    "application/json", "application/javascript", "application/manifest+json",
+    "application/xml", "image/svg+xml"
+)
+
+def choose_encoding(accept_encoding: str) -> str:
+    """Pick 'br' or 'gzip' from an Accept-Encoding header ('' for none)."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(token.strip())
+    if brotli and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return ""
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=4)
+        else:
+            self._obj = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        """Compress data; flush=True emits everything so a streamed chunk is usable now."""
+        if self.encoding == "br":
+            out = self._obj.process(data)
+            return out + (self._obj.flush() if flush else b"")
+        out = self._obj.compress(data)
+        return out + (self._obj.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.finish()
+        return self._obj.compress(data) + self._obj.flush()
+
+class CompressionMiddleware:
+    """Compress dynamic text responses with brotli (when installed) or gzip.
+
+    Responses smaller than ``minimum_size``, non-text content types,
+    event streams and responses that already carry a Content-Encoding
+    (e.g. precompressed static files) pass through untouched. Streamed
+    bodies are compressed chunk by chunk with a sync flush so streaming
+    pages keep their early first byte.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+                if headers.get("content-encoding") or content_type not in COMPRESSIBLE_TYPES:
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Wait for the first body chunk to decide
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding)
+                headers = MutableHeaders(scope=start_message)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("accept-encoding")
+                if more_body:
+                    del headers["content-length"]
+                    body = compressor.compress(body, flush=True)
+                else:
+                    body = compressor.finish(body)
+                    headers["content-length"] = str(len(body))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            if more_body:
+                body = compressor.compress(body, flush=True)
+            else:
+                body = compressor.finish(body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,84 @@
+import hashlib
+import uuid
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from app.utils.database_manager import get_data_version
+
+# Distinguishes ETags from different processes/restarts, whose counters restart at 0
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+def _if_none_match(header: str) -> set:
+    return {tag.strip() for tag in header.split(",") if tag.strip()}
+
+class ConditionalGetMiddleware:
+    """ETag / If-None-Match for pages whose content only changes with app writes.
+
+    The ETag combines the global data version (bumped by update_asset,
+    approval changes and reference/profile writes) with the user, device,
+    path and query string. It is computed before routing, so a matching
+    If-None-Match gets a 304 without resolving the profile, querying
+    Supabase or rendering a template. Must run inside SessionAuthMiddleware
+    (request.state.user) and DeviceDetectionMiddleware.
+    """
+
+    ETAG_PATHS = {
+        "/dashboard", "/asset_management/list", "/asset_management/add",
+        "/approvals/", "/assigned-users/", "/offline/snapshot"
+    }
+
+    ETAG_PREFIXES = ("/dashboard/widgets/", "/asset_management/edit/", "/repair/locations/")
+
+    def __init__(self, app):
+        self.app = app
+
+    def _applies(self, scope) -> bool:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return False
+        path = scope["path"]
+        return path in self.ETAG_PATHS or path.startswith(self.ETAG_PREFIXES)
+
+    @staticmethod
+    def compute_etag(scope, headers: Headers) -> str:
+        state = scope.get("state", {})
+        user = state.get("user") or {}
+        variant = "|".join((
+            str(user.get("id", "")),
+            state.get("device_type", ""),
+            scope["path"],
+            scope.get("query_string", b"").decode("latin-1"),
+            headers.get("hx-request", "")
+        ))
+        digest = hashlib.md5(variant.encode("utf-8"), usedforsecurity=False).hexdigest()[:16]
+        return f'W/"{_BOOT_ID}-{get_data_version()}-{digest}"'
+
+    async def __call__(self, scope, receive, send):
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        # One-time flash messages are rendered into the page
+        if "flash=" in headers.get("cookie", ""):
+            await self.app(scope, receive, send)
+            return
+
+        etag = self.compute_etag(scope, headers)
+
+        if etag in _if_none_match(headers.get("if-none-match", "")):
+            response = Response(status_code=304, headers={
+                "etag": etag,
+                "cache-control": "private, no-cache"
+            })
+            await response(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                response_headers = MutableHeaders(scope=message)
+                # Responses that set cookies are not repeatable
+                if "set-cookie" not in response_headers and "etag" not in response_headers:
+                    response_headers["etag"] = etag
+                    response_headers.setdefault("cache-control", "private, no-cache")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,32 @@
+from starlette.datastructures import Headers
+from app.utils.device_detector import DeviceDetector
+
+class DeviceDetectionMiddleware:
+    """Classify the device once per request and store it on request.state.
+
+    Sets ``request.state.device_type`` ('mobile' or 'desktop') and
+    ``request.state.device_info`` so get_template, get_device_info and the
+    templates reuse the result instead of re-running detection.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        device_type = DeviceDetector.classify_headers(headers)
+
+        state = scope.setdefault("state", {})
+        state["device_type"] = device_type
+        state["device_info"] = {
+            "device_type": device_type,
+            "is_mobile": device_type == "mobile",
+            "user_agent": headers.get("user-agent", ""),
+            "template_prefix": f"templates_{device_type}"
+        }
+
+        await self.app(scope, receive, send)
@@ -1,6 +1,7 @@
 from fastapi import Request
 from fastapi.responses import RedirectResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
 from app.utils.auth import decode_supabase_jwt, refresh_supabase_token
 from app.config import load_config
 import logging
@@ -9,45 +10,65 @@ from datetime import datetime, timezone
 
 config = load_config()
 
-class SessionAuthMiddleware(BaseHTTPMiddleware):
-    """Minimal session auth middleware for JWT token management"""
-    
+class SessionAuthMiddleware:
+    """Minimal session auth middleware for JWT token management.
+
+    Implemented as a raw ASGI middleware (no BaseHTTPMiddleware) so responses,
+    including StreamingResponse exports, pass through without being buffered.
+    Refreshed tokens are written by editing the headers of the
+    ``http.response.start`` message.
+    """
+
     SKIP_PATHS = {
-        "/login", "/signup", "/health", "/favicon.ico",
+        "/login", "/signup", "/health", "/favicon.ico", "/service-worker.js", "/offline",
         "/auth/callback", "/auth/confirm", "/auth/refresh",
         "/auth/change-password", "/auth/change-password/form", "/forgot-password"
     }
-    
+
     SKIP_PREFIXES = {"/static"}
-    
-    async def dispatch(self, request: Request, call_next):
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+
         # Get the path without query parameters for checking
         path = request.url.path
         is_secure = request.url.scheme == "https"
-        
+
         # Skip auth for public paths
         if path in self.SKIP_PATHS:
             # Set empty user state for skipped paths
             request.state.user = None
-            return await call_next(request)
-            
+            await self.app(scope, receive, send)
+            return
+
         # Skip auth for static files
         if any(path.startswith(prefix) for prefix in self.SKIP_PREFIXES):
-            return await call_next(request)
-        
+            await self.app(scope, receive, send)
+            return
+
         if request.method in ["HEAD", "OPTIONS"]:
-            return await call_next(request)
-        
+            await self.app(scope, receive, send)
+            return
+
         # Get tokens
         access_token = request.cookies.get("sb_access_token")
         refresh_token = request.cookies.get("sb_refresh_token")
-        
+
         if not access_token and not refresh_token:
-            return RedirectResponse(f"/login?next={quote(path)}", status_code=303)
-        
+            response = RedirectResponse(f"/login?next={quote(path)}", status_code=303)
+            await response(scope, receive, send)
+            return
+
         user_info = None
         new_tokens = None
-        
+
         # Validate access token
         if access_token:
             payload = decode_supabase_jwt(access_token)
@@ -57,14 +78,14 @@ class SessionAuthMiddleware(BaseHTTPMiddleware):
                     "email": payload.get("email", ""),
                     "exp": payload.get("exp")
                 }
-                
+
                 # Check if token expires soon (5 minutes)
                 exp = payload.get("exp")
                 if exp and refresh_token:
                     exp_time = datetime.fromtimestamp(exp, tz=timezone.utc)
                     now = datetime.now(tz=timezone.utc)
                     if (exp_time - now).total_seconds() < 300:
-                        new_tokens = refresh_supabase_token(refresh_token)
+                        new_tokens = await refresh_supabase_token(refresh_token)
                         if new_tokens:
                             new_payload = decode_supabase_jwt(new_tokens["access_token"])
                             if new_payload:
@@ -76,14 +97,13 @@ class SessionAuthMiddleware(BaseHTTPMiddleware):
                         else:
                             # Refresh failed - token is invalid, redirect to login
                             logging.warning(f"Token refresh failed for user {user_info.get('id') if user_info else 'unknown'}")
-                            response = RedirectResponse(f"/login?next={quote(path)}", status_code=303)
-                            response.delete_cookie("sb_access_token", path="/", httponly=True, secure=is_secure, samesite="lax")
-                            response.delete_cookie("sb_refresh_token", path="/", httponly=True, secure=is_secure, samesite="lax")
-                            return response
-        
+                            response = self._login_redirect(path, is_secure)
+                            await response(scope, receive, send)
+                            return
+
         # Try refresh if no valid access token
         if not user_info and refresh_token:
-            new_tokens = refresh_supabase_token(refresh_token)
+            new_tokens = await refresh_supabase_token(refresh_token)
             if new_tokens:
                 payload = decode_supabase_jwt(new_tokens["access_token"])
                 if payload:
@@ -95,63 +115,86 @@ class SessionAuthMiddleware(BaseHTTPMiddleware):
             else:
                 # Refresh failed - token is invalid, redirect to login
                 logging.warning(f"Token refresh failed - no valid tokens available")
-                response = RedirectResponse(f"/login?next={quote(path)}", status_code=303)
-                response.delete_cookie("sb_access_token", path="/", httponly=True, secure=is_secure, samesite="lax")
-                response.delete_cookie("sb_refresh_token", path="/", httponly=True, secure=is_secure, samesite="lax")
-                return response
-        
+                response = self._login_redirect(path, is_secure)
+                await response(scope, receive, send)
+                return
+
         # Redirect if no valid user
         if not user_info or not user_info.get("id"):
-            return RedirectResponse(f"/login?next={quote(path)}", status_code=303)
-        
+            response = RedirectResponse(f"/login?next={quote(path)}", status_code=303)
+            await response(scope, receive, send)
+            return
+
         # Set user in request state
         request.state.user = user_info
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Update cookies if tokens refreshed
-        if new_tokens:
-            # Protect profile after token refresh
-            try:
-                from app.utils.profile_utils import protect_profile_data
-                protect_profile_data(user_info["id"])
-            except Exception as e:
-                logging.warning(f"Failed to protect profile in middleware: {e}")
-            
-            is_secure = not config.APP_URL.startswith("http://localhost")
-            
-            # Check if this was a remember me session by looking at existing access token max_age
-            # If access token has long expiry, preserve remember me behavior
-            access_max_age = 3600  # Default 1 hour
-            if access_token:
-                # If we had a valid access token that was refreshed, check its remaining time
-                # If it was set for remember me (7 days), preserve that setting
-                exp = user_info.get("exp")
-                if exp:
-                    remaining_time = exp - datetime.now(tz=timezone.utc).timestamp()
-                    # If remaining time suggests this was a remember me session (> 1 day)
-                    if remaining_time > 86400:
-                        access_max_age = 60 * 60 * 24 * 7  # 7 days for remember me
-            
-            response.set_cookie(
-                key="sb_access_token",
-                value=new_tokens["access_token"],
-                path="/",
-                httponly=True,
-                secure=is_secure,
-                samesite="lax",
-                max_age=access_max_age
-            )
-            
-            response.set_cookie(
-                key="sb_refresh_token", 
-                value=new_tokens["refresh_token"],
-                path="/",
-                httponly=True,
-                secure=is_secure,
-                samesite="lax",
-                max_age=86400 * 30
-            )
-        
-        return response
\ No newline at end of file
+
+        # Process request untouched when no cookie rotation is needed
+        if not new_tokens:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Update cookies since tokens were refreshed. Profile protection
+                # was already queued by refresh_supabase_token.
+                headers = MutableHeaders(scope=message)
+                for cookie in self._refreshed_cookie_headers(new_tokens, access_token, user_info):
+                    headers.append("set-cookie", cookie)
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _login_redirect(path: str, is_secure: bool) -> Response:
+        """Redirect to login and clear both auth cookies."""
+        response = RedirectResponse(f"/login?next={quote(path)}", status_code=303)
+        response.delete_cookie("sb_access_token", path="/", httponly=True, secure=is_secure, samesite="lax")
+        response.delete_cookie("sb_refresh_token", path="/", httponly=True, secure=is_secure, samesite="lax")
+        return response
+
+    @staticmethod
+    def _refreshed_cookie_headers(new_tokens: dict, access_token, user_info: dict) -> list:
+        """Build Set-Cookie header values for rotated access/refresh tokens."""
+        is_secure = not config.APP_URL.startswith("http://localhost")
+
+        # Check if this was a remember me session by looking at existing access token max_age
+        # If access token has long expiry, preserve remember me behavior
+        access_max_age = 3600  # Default 1 hour
+        if access_token:
+            # If we had a valid access token that was refreshed, check its remaining time
+            # If it was set for remember me (7 days), preserve that setting
+            exp = user_info.get("exp")
+            if exp:
+                remaining_time = exp - datetime.now(tz=timezone.utc).timestamp()
+                # If remaining time suggests this was a remember me session (> 1 day)
+                if remaining_time > 86400:
+                    access_max_age = 60 * 60 * 24 * 7  # 7 days for remember me
+
+        # Use a throwaway Response to render cookies exactly as set_cookie would
+        cookie_response = Response()
+        cookie_response.set_cookie(
+            key="sb_access_token",
+            value=new_tokens["access_token"],
+            path="/",
+            httponly=True,
+            secure=is_secure,
+            samesite="lax",
+            max_age=access_max_age
+        )
+
+        cookie_response.set_cookie(
+            key="sb_refresh_token",
+            value=new_tokens["refresh_token"],
+            path="/",
+            httponly=True,
+            secure=is_secure,
+            samesite="lax",
+            max_age=86400 * 30
+        )
+
+        return [
+            value.decode("latin-1")
+            for key, value in cookie_response.raw_headers
+            if key == b"set-cookie"
+        ]
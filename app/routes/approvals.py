@@ -1,339 +1,141 @@
 # app/routes/approvals.py
-import logging
-import json
-from datetime import datetime
-from fastapi import APIRouter, Depends, Request, HTTPException, status
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, Query, Request, HTTPException, status
+from fastapi.responses import HTMLResponse
 
 from app.utils.auth import get_current_profile
-from app.utils.database_manager import get_all_approvals, get_supabase, update_asset, prepare_asset_data, invalidate_cache, update_approval_status
+from app.utils.database_manager import invalidate_cache
+from app.utils.approval_counters import pending_counters
+from app.utils.approval_engine import apply_approval, apply_rejection, apply_batch, BATCH_ACTIONS, MAX_BATCH_SIZE
+from app.utils.approval_queries import (
+    ApprovalFilters, APPROVAL_TYPE_LABELS,
+    can_approve, count_approvals, get_approvals_page, get_submitter_options, get_submitter_roles
+)
 from app.utils.device_detector import get_template
+from app.utils.templating import stream_template
+from app.utils.fast_json import FastJSONResponse
 
 router = APIRouter(prefix="/approvals", tags=["approvals"])
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/", response_class=HTMLResponse)
 async def approvals_page(
     request: Request,
+    filters: ApprovalFilters = Depends(),
+    pending_after: Optional[str] = Query(None),
+    completed_after: Optional[str] = Query(None),
+    tab: str = Query("pending"),
     current_profile = Depends(get_current_profile)
 ):
     """Approvals page for admin and manager."""
     if current_profile.role not in ['admin', 'manager']:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    supabase = get_supabase()
-    # Get all approvals with submitter and approver full names
-    response = supabase.table('approvals').select('''
-        approval_id, type, asset_id, asset_name, status, submitted_by, submitted_date,
-        description, approved_by, approved_date, notes, created_at,
-        from_location_id, to_location_id,
-        submitted_profile:profiles!approvals_submitted_by_fkey(full_name, username, role),
-        approved_profile:profiles!approvals_approved_by_fkey(full_name, username)
-    ''').order('submitted_date', desc=True).execute()
-    
-    all_approvals = response.data or []
-    
-    # Process approvals to add name fields
-    for approval in all_approvals:
-        # Submitted by info
-        submitted_profile = approval.get('submitted_profile')
-        if submitted_profile:
-            approval['submitted_by_name'] = submitted_profile.get('full_name') or submitted_profile.get('username') or 'Unknown User'
-            approval['submitted_by_role'] = submitted_profile.get('role', 'staff')
-        else:
-            approval['submitted_by_name'] = 'Unknown User'
-            approval['submitted_by_role'] = 'staff'
-        
-        # Approved by info
-        approved_profile = approval.get('approved_profile')
-        if approved_profile:
-            approval['approved_by_name'] = approved_profile.get('full_name') or approved_profile.get('username') or 'Unknown User'
-        else:
-            approval['approved_by_name'] = 'Unknown User'
+    pending_page = get_approvals_page(filters, "pending", pending_after)
+    completed_page = get_approvals_page(filters, "completed", completed_after)
     
     # Show all pending approvals but add approval permission flag
-    for approval in all_approvals:
-        if approval.get('status') == 'pending':
-            submitted_by_role = approval.get('submitted_by_role', 'staff')
-            
-            # Determine if current user can approve this request
-            can_approve = False
-            if current_profile.role == 'manager' and submitted_by_role == 'admin':
-                can_approve = True
-            elif current_profile.role == 'admin' and submitted_by_role in ['manager', 'staff']:
-                can_approve = True
-            
-            approval['can_approve'] = can_approve
-    
-    pending_approvals = sorted([a for a in all_approvals if a.get('status') == 'pending'], 
-                              key=lambda x: x.get('created_at', ''), reverse=True)
-    completed_approvals = sorted([a for a in all_approvals if a.get('status') in ['approved', 'rejected']], 
-                                key=lambda x: x.get('updated_at', x.get('created_at', '')), reverse=True)
+    for approval in pending_page["items"]:
+        approval['can_approve'] = can_approve(current_profile.role, approval.get('submitted_by_role', 'staff'))
     
     template_path = get_template(request, "approvals/list.html")
-    return templates.TemplateResponse(
+    return stream_template(
         template_path,
         {
             "request": request,
             "user": current_profile,
-            "pending_approvals": pending_approvals,
-            "completed_approvals": completed_approvals,
-            "pending_count": len(pending_approvals),
-            "completed_count": len(completed_approvals)
+            "pending_approvals": pending_page["items"],
+            "completed_approvals": completed_page["items"],
+            "pending_count": count_approvals(filters, "pending"),
+            "completed_count": count_approvals(filters, "completed"),
+            "pending_next": pending_page["next_cursor"],
+            "completed_next": completed_page["next_cursor"],
+            "pending_after": pending_after,
+            "completed_after": completed_after,
+            "active_tab": "complete" if tab == "complete" else "pending",
+            "filters": filters,
+            "approval_types": APPROVAL_TYPE_LABELS,
+            "submitters": get_submitter_options()
         }
     )
 
+@router.get("/pending-count")
+async def pending_count(current_profile = Depends(get_current_profile)):
+    """Navbar badge: pending requests the user can act on, and their own pending submissions."""
+    if current_profile.role in ['admin', 'manager']:
+        pending = pending_counters.for_approver(current_profile.role)
+    else:
+        pending = pending_counters.for_submitter(current_profile.id)
+    return FastJSONResponse(
+        {"pending": pending, "submitted": pending_counters.for_submitter(current_profile.id)},
+        headers={"Cache-Control": "no-store"}
+    )
+
+@router.post("/batch")
+async def batch_approval(
+    approval_ids: List[int] = Body(...),
+    action: str = Body(...),
+    current_profile = Depends(get_current_profile)
+):
+    """Approve or reject many requests at once; returns a result per approval."""
+    if current_profile.role not in ['admin', 'manager']:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if action not in BATCH_ACTIONS:
+        return FastJSONResponse({"status": "error", "message": f"Unknown action: {action}"}, status_code=400)
+    if not approval_ids:
+        return FastJSONResponse({"status": "error", "message": "No approvals selected"}, status_code=400)
+    if len(approval_ids) > MAX_BATCH_SIZE:
+        return FastJSONResponse({"status": "error", "message": f"At most {MAX_BATCH_SIZE} approvals per batch"}, status_code=400)
+
+    # Same rule as the checkboxes in the queue: only requests this role may act on
+    role = getattr(current_profile.role, "value", current_profile.role)
+    submitter_roles = get_submitter_roles(approval_ids)
+    if submitter_roles is None:
+        return FastJSONResponse({"status": "error", "message": "Could not load the selected approvals"}, status_code=500)
+    allowed = [i for i in approval_ids if i not in submitter_roles or can_approve(role, submitter_roles[i])]
+    denied = [
+        {"approval_id": i, "status": "error", "message": "Not allowed"}
+        for i in dict.fromkeys(approval_ids) if i not in allowed
+    ]
+
+    results = (apply_batch(allowed, action, current_profile) if allowed else []) + denied
+    succeeded = sum(1 for result in results if result.get("status") == "success")
+
+    # One reload of the cached asset data for the whole batch
+    if succeeded:
+        invalidate_cache()
+
+    if succeeded == len(results):
+        batch_status = "success"
+    elif succeeded:
+        batch_status = "partial"
+    else:
+        batch_status = "error"
+    return FastJSONResponse({
+        "status": batch_status,
+        "message": f"{succeeded} of {len(results)} requests {action}",
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    })
+
 @router.post("/{approval_id}/approved")
 async def approve_request(
     approval_id: str,
     request: Request,
     current_profile = Depends(get_current_profile)
 ):
-    """Approve a request."""
+    """Approve a request (one transactional RPC per approval)."""
     if current_profile.role not in ['admin', 'manager']:
         raise HTTPException(status_code=403, detail="Access denied")
-    
-    supabase = get_supabase()
-    
-    # Get approval with submitter info
-    approval_response = supabase.table('approvals').select('''
-        *, submitted_profile:profiles!approvals_submitted_by_fkey(full_name, username)
-    ''').eq('approval_id', approval_id).execute()
-    
-    approval = approval_response.data[0] if approval_response.data else None
-    
-    if not approval:
-        return JSONResponse({"status": "error", "message": "Approval not found"}, status_code=404)
-
-    try:
-        approval_type = approval.get('type')
-
-        if approval_type in ['add_asset', 'admin_add_asset']:
-            asset_data = json.loads(approval.get('notes', '{}'))
-            
-            prepared_data = prepare_asset_data(asset_data)
-            if not prepared_data:
-                return JSONResponse({"status": "error", "message": "Failed to prepare asset data for transaction."})
-
-            rpc_params = {
-                'approval_id_in': int(approval_id),
-                'approver_id_in': str(current_profile.id),
-                'new_asset_data': prepared_data
-            }
-            
-            response = supabase.rpc('approve_and_create_asset', rpc_params).execute()
-            
-            if response.data:
-                invalidate_cache()
-                return JSONResponse({"status": "success", "message": "Request approved and asset created successfully"})
-            else:
-                error_info = response.get('error') or 'No data returned from RPC'
-                logging.error(f"RPC call failed for approval {approval_id}: {error_info}")
-                return JSONResponse({"status": "error", "message": f"Database transaction failed: {error_info}"})
-
-        # --- Handle all other approval types below ---
-
-        elif approval_type == 'damage_report':
-            # Process damage report approval
-            notes_data = json.loads(approval.get('notes', '{}'))
-            asset_id = approval.get('asset_id')
-            
-            # Add to damage_log
-            damage_log_data = {
-                'asset_id': asset_id,
-                'asset_name': approval.get('asset_name', ''),
-                'damage_type': notes_data.get('damage_type', ''),
-                'severity': notes_data.get('severity', ''),
-                'description': notes_data.get('description', ''),
-                'reported_by': approval.get('submitted_by'),
-                'reported_by_name': approval.get('submitted_profile', {}).get('full_name') or approval.get('submitted_profile', {}).get('username') or 'Unknown User',
-                'approved_by': current_profile.id,
-                'approved_by_name': current_profile.full_name or current_profile.username,
-                'approved_at': datetime.now().isoformat(),
-                'status': 'approved'
-            }
-            supabase.table('damage_log').insert(damage_log_data).execute()
-            
-            # Update asset status to Damaged and move to warehouse if specified
-            asset_updates = {'status': 'Damaged'}
-            if approval.get('to_location_id'):
-                asset_updates['location_id'] = approval.get('to_location_id')
-            update_asset(asset_id, asset_updates)
 
-        elif approval_type == 'lost_report':
-            # Process lost report approval
-            notes_data = json.loads(approval.get('notes', '{}'))
-            asset_id = approval.get('asset_id')
-            
-            # Add to lost_log
-            lost_log_data = {
-                'asset_id': asset_id,
-                'asset_name': approval.get('asset_name', ''),
-                'last_location_id': approval.get('from_location_id'),
-                'date_lost': datetime.now().date().isoformat(),
-                'description': notes_data.get('description', ''),
-                'reported_by': approval.get('submitted_by'),
-                'reported_by_name': approval.get('submitted_profile', {}).get('full_name') or approval.get('submitted_profile', {}).get('username') or 'Unknown User',
-                'approved_by': current_profile.id,
-                'approved_by_name': current_profile.full_name or current_profile.username,
-                'approved_at': datetime.now().isoformat(),
-                'status': 'approved'
-            }
-            supabase.table('lost_log').insert(lost_log_data).execute()
-            
-            # Update asset status to Lost
-            update_asset(asset_id, {'status': 'Lost'})
+    result = apply_approval(approval_id, current_profile)
 
-        elif approval_type == 'repair':
-            # Process repair approval
-            notes_data = json.loads(approval.get('notes', '{}'))
-            asset_id = approval.get('asset_id')
-            
-            # Add to repair_log
-            repair_log_data = {
-                'asset_id': asset_id,
-                'asset_name': approval.get('asset_name', ''),
-                'repair_action': 'Repair Completed',
-                'action_type': 'completion',
-                'description': notes_data.get('repair_notes', ''),
-                'performed_by': approval.get('submitted_by'),
-                'performed_by_name': approval.get('submitted_profile', {}).get('full_name') or approval.get('submitted_profile', {}).get('username') or 'Unknown User',
-                'approved_by': current_profile.id,
-                'approved_by_name': current_profile.full_name or current_profile.username,
-                'approved_at': datetime.now().isoformat(),
-                'status': 'approved',
-                'new_location_id': approval.get('to_location_id'),
-                'notes': notes_data.get('repair_notes', '')
-            }
-            supabase.table('repair_log').insert(repair_log_data).execute()
-            
-            # Determine status based on location
-            new_location_id = approval.get('to_location_id')
-            asset_updates = {}
-            
-            if new_location_id:
-                # Check if it's warehouse location (location_id 26)
-                if int(new_location_id) == 26:
-                    asset_updates['status'] = 'In Storage'
-                else:
-                    asset_updates['status'] = 'Active'
-                asset_updates['location_id'] = int(new_location_id)
-            else:
-                # Default to Active if no location specified
-                asset_updates['status'] = 'Active'
-            
-            update_asset(asset_id, asset_updates)
-
-        elif approval_type == 'relocation':
-            # Process relocation approval
-            notes_data = json.loads(approval.get('notes', '{}'))
-            asset_id = approval.get('asset_id')
-            
-            # Get current asset data for old location info
-            asset_response = supabase.table('assets').select('location_id, ref_locations(location_name, room_name)').eq('asset_id', asset_id).execute()
-            current_asset = asset_response.data[0] if asset_response.data else {}
-            
-            # Add to relocation_log with correct column names
-            relocation_log_data = {
-                'asset_id': asset_id,
-                'asset_name': approval.get('asset_name', ''),
-                'old_location_id': current_asset.get('location_id'),
-                'old_location_name': notes_data.get('current_location', ''),
-                'old_room_name': notes_data.get('current_room', ''),
-                'new_location_id': approval.get('to_location_id'),
-                'new_location_name': notes_data.get('new_location', ''),
-                'new_room_name': notes_data.get('new_room', ''),
-                'reason': notes_data.get('reason', ''),
-                'notes': notes_data.get('notes', ''),
-                'requested_by': approval.get('submitted_by'),
-                'requested_by_name': approval.get('submitted_profile', {}).get('full_name') or approval.get('submitted_profile', {}).get('username') or 'Unknown User',
-                'approved_by': current_profile.id,
-                'approved_by_name': current_profile.full_name or current_profile.username,
-                'status': 'approved',
-                'relocation_date': datetime.now().date().isoformat(),
-                'approved_at': datetime.now().isoformat()
-            }
-            supabase.table('relocation_log').insert(relocation_log_data).execute()
-            
-            # Update asset location and status based on destination
-            new_location_id = approval.get('to_location_id')
-            if new_location_id:
-                asset_updates = {'location_id': new_location_id}
-                
-                # Check if destination is warehouse (location_id 26) to set status to In Storage
-                if int(new_location_id) == 26:
-                    asset_updates['status'] = 'In Storage'
-                else:
-                    # If moving from warehouse to other location, set to Active
-                    current_location_id = current_asset.get('location_id')
-                    if current_location_id == 26:
-                        asset_updates['status'] = 'Active'
-                
-                update_asset(asset_id, asset_updates)
-
-        elif approval_type == 'disposal_request':
-            # Process disposal request approval - directly dispose
-            notes_data = json.loads(approval.get('notes', '{}'))
-            asset_id = approval.get('asset_id')
-            
-            # Add to disposal_log
-            disposal_log_data = {
-                'asset_id': asset_id,
-                'asset_name': approval.get('asset_name', ''),
-                'disposal_reason': notes_data.get('disposal_reason', ''),
-                'disposal_method': notes_data.get('disposal_method', ''),
-                'description': notes_data.get('description', ''),
-                'notes': notes_data.get('notes', ''),
-                'requested_by': approval.get('submitted_by'),
-                'requested_by_name': approval.get('submitted_profile', {}).get('full_name') or approval.get('submitted_profile', {}).get('username') or 'Unknown User',
-                'approved_by': current_profile.id,
-                'approved_by_name': current_profile.full_name or current_profile.username,
-                'approved_at': datetime.now().isoformat(),
-                'disposal_date': datetime.now().date().isoformat(),
-                'status': 'approved'
-            }
-            supabase.table('disposal_log').insert(disposal_log_data).execute()
-            
-            # Update asset status to Disposed (single approval)
-            update_asset(asset_id, {'status': 'Disposed'})
-
-        elif approval_type == 'edit_asset':
-            # Process edit asset approval
-            notes_data = json.loads(approval.get('notes', '{}'))
-            asset_id = approval.get('asset_id')
-            
-            # Get location info to determine status
-            location_name = notes_data.get('location_name', '')
-            room_name = notes_data.get('room_name', '')
-            
-            # Determine status based on location
-            if location_name == "HO - Ciputat" and room_name == "1022 - Gudang Support TOG":
-                notes_data['status'] = 'In Storage'
-            elif notes_data.get('status') == 'In Storage' and not (location_name == "HO - Ciputat" and room_name == "1022 - Gudang Support TOG"):
-                # If moving from warehouse to other location, set to Active
-                notes_data['status'] = 'Active'
-            
-            # Update asset with all edit data
-            update_asset(asset_id, notes_data)
-
-        # If the approval type was not for adding an asset, it falls through to here.
-        # Update the status for all other approval types.
-        success = update_approval_status(
-            approval_id, 
-            'approved',
-            current_profile.id
-        )
-
-        if success:
-            invalidate_cache()
-            return JSONResponse({"status": "success", "message": "Request approved successfully"})
-        else:
-            return JSONResponse({"status": "error", "message": "Failed to update approval status for non-asset request."})
-
-    except Exception as e:
-        logging.error(f"Critical error processing approval {approval_id}: {str(e)}")
-        return JSONResponse({"status": "error", "message": f"An unexpected error occurred: {str(e)}"}, status_code=500)
+    if result.get("status") == "success":
+        invalidate_cache()
+        return FastJSONResponse({"status": "success", "message": result.get("message")})
+    if result.get("message") == "Approval not found":
+        return FastJSONResponse({"status": "error", "message": "Approval not found"}, status_code=404)
+    return FastJSONResponse({"status": "error", "message": result.get("message")})
 
 
 @router.post("/{approval_id}/rejected")
@@ -346,10 +148,10 @@ async def reject_request(
     if current_profile.role not in ['admin', 'manager']:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    success = update_approval_status(approval_id, 'rejected', current_profile.id)
+    result = apply_rejection(approval_id, current_profile)
     
-    if success:
+    if result.get("status") == "success":
         invalidate_cache()
-        return JSONResponse({"status": "success", "message": "Request rejected"})
+        return FastJSONResponse({"status": "success", "message": "Request rejected"})
     else:
-        return JSONResponse({"status": "error", "message": "Failed to update approval status"})
+        return FastJSONResponse({"status": "error", "message": "Failed to update approval status"})
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, Request, Form, File, UploadFile, HTTPException, status
-from app.utils.photo import upload_to_drive
+from app.utils.photo import photo_upload_queue
 import io
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 import json
 from datetime import datetime
 import uuid
@@ -11,11 +10,20 @@ from app.utils.database_manager import get_dropdown_options, add_approval_reques
 from app.utils.flash import set_flash
 from app.utils.auth import get_current_profile, UserRole
 from app.utils.device_detector import get_template
+from app.utils.templating import templates, stream_template
 from app.utils.user_utils import get_all_users
 import logging
 
 router = APIRouter(prefix="/asset_management", tags=["asset_management"])
-templates = Jinja2Templates(directory="app/templates")
+
+async def _queue_photo(contents, filename, name, approval):
+    """Upload a request's photo in the background; it reaches the asset once the request is approved."""
+    if not contents:
+        return
+    if not approval.get("approval_id"):
+        logging.error(f"No approval id for {name}, photo {filename} not uploaded")
+        return
+    await photo_upload_queue.enqueue(contents, filename, name, ("approval", approval["approval_id"]))
 
 
 @router.get("/add", response_class=HTMLResponse)
@@ -49,7 +57,7 @@ async def asset_list(
     dropdown_options = get_dropdown_options()
     
     template_path = get_template(request, "asset_management/list.html")
-    return templates.TemplateResponse(
+    return stream_template(
         template_path,
         {
             "request": request,
@@ -139,16 +147,10 @@ async def update_asset(
     
     asset = get_asset_by_id(asset_id)
 
-    # Handle photo upload
-    photo_url = asset.get('photo_url', '')  # Keep existing photo by default
-    if photo and photo.filename:
-        try:
-            contents = await photo.read()
-            new_photo_url = upload_to_drive(contents, photo.filename, asset_id)
-            if new_photo_url:
-                photo_url = new_photo_url
-        except Exception as e:
-            logging.error(f"Error uploading photo: {str(e)}")
+    # Keep the existing photo; a new one is uploaded in the background and
+    # written into the request once it is on Drive
+    photo_url = asset.get('photo_url', '')
+    photo_contents = await photo.read() if photo and photo.filename else None
 
     update_data = {
         "asset_name": asset_name,
@@ -186,6 +188,7 @@ async def update_asset(
     approval_success = add_approval_request(approval_data)
     
     if approval_success:
+        await _queue_photo(photo_contents, photo.filename if photo_contents else None, asset_id, approval_success)
         response = RedirectResponse(url="/asset_management/list", status_code=status.HTTP_303_SEE_OTHER)
         set_flash(response, "Asset edit request submitted for manager approval", "success")
         return response
@@ -298,16 +301,8 @@ async def add_asset(
         "status": "In Storage" if location_name == "HO - Ciputat" and room_name == "1022 - Gudang Support TOG" else "Active"
     }
     
-    # Handle photo upload
-    if photo and photo.filename:
-        try:
-            contents = await photo.read()
-            # Use asset_name as identifier since asset_id doesn't exist yet
-            photo_url = upload_to_drive(contents, photo.filename, asset_name.replace(" ", "_"))
-            if photo_url:
-                asset_data["photo_url"] = photo_url
-        except Exception as e:
-            logging.error(f"Error uploading photo: {str(e)}")
+    # Uploaded in the background once the request exists
+    photo_contents = await photo.read() if photo and photo.filename else None
     
     # Get to_location_id for new asset placement (only for GA assets)
     from app.utils.database_manager import get_supabase
@@ -327,7 +322,10 @@ async def add_asset(
         "notes": json.dumps(asset_data)
     }
     
-    if add_approval_request(approval_data):
+    approval = add_approval_request(approval_data)
+    if approval:
+        # Use asset_name as identifier since asset_id doesn't exist yet
+        await _queue_photo(photo_contents, photo.filename if photo_contents else None, asset_name.replace(" ", "_"), approval)
         return RedirectResponse(url=f"/asset_management/success?asset_name={asset_name}", status_code=status.HTTP_303_SEE_OTHER)
     else:
         return RedirectResponse(url=f"/asset_management/error?asset_name={asset_name}", status_code=status.HTTP_303_SEE_OTHER)
@@ -1,16 +1,15 @@
 from fastapi import APIRouter, Request, Form, Depends
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
 from app.utils.auth import get_current_profile
 from app.utils.database_manager import (
     get_assigned_users, get_assigned_user_by_id, add_assigned_user,
     update_assigned_user, delete_assigned_user, get_dropdown_options
 )
 from app.utils.device_detector import get_template
+from app.utils.templating import templates
 import logging
 
 router = APIRouter(prefix="/assigned-users", tags=["assigned_users"])
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/")
 async def assigned_users_list(request: Request, current_profile = Depends(get_current_profile)):
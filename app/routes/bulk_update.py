@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Request, Form, UploadFile, File, Depends
+from fastapi import APIRouter, Request, Form, UploadFile, File, Depends, Query
 from fastapi.responses import RedirectResponse, StreamingResponse
-from starlette.templating import Jinja2Templates
 from app.utils.device_detector import get_template
+from app.utils.templating import templates
 from app.utils.auth import get_current_profile
 from app.utils.database_manager import get_supabase, TABLES, invalidate_cache
 from app.utils.flash import set_flash
-from openpyxl import Workbook, load_workbook
+from app.utils.import_staging import import_staging
+from app.utils.bulk_import import IMPORT_COLUMNS, SheetError, export_row, stage_new_sheet, stage_sheet
+from app.utils.bulk_create import create_assets, submit_grouped_approval
+from starlette.concurrency import run_in_threadpool
+from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from io import BytesIO
 import logging
 from datetime import datetime
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+
+PREVIEW_PAGE_SIZE = 50
+MAX_PREVIEW_ERRORS = 100
 
 @router.get("/bulk-update")
 async def bulk_update_page(request: Request, current_profile = Depends(get_current_profile)):
@@ -78,6 +84,7 @@ async def bulk_update_export(
             asset_id, asset_name, manufacture, model, serial_number, asset_tag,
             room_name, notes, item_condition, purchase_date, purchase_cost,
             warranty, supplier, journal, status, year,
+            owner_type, assigned_user_id, assigned_user_name,
             ref_categories(category_name),
             ref_asset_types(type_name),
             ref_locations(location_name, room_name),
@@ -116,6 +123,15 @@ async def bulk_update_export(
         response = query.execute()
         assets = response.data
         
+        # Names of assigned users, for IT assets without a stored assigned_user_name
+        user_ids = list({asset['assigned_user_id'] for asset in assets if asset.get('assigned_user_id')})
+        if user_ids:
+            users_response = supabase.table('profiles').select('id, full_name, username').in_('id', user_ids).execute()
+            users_dict = {user['id']: user for user in users_response.data}
+            for asset in assets:
+                if asset.get('assigned_user_id'):
+                    asset['assigned_user'] = users_dict.get(asset['assigned_user_id'])
+        
         # Create Excel workbook
         wb = Workbook()
         ws = wb.active
@@ -125,14 +141,8 @@ async def bulk_update_export(
         header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
         header_font = Font(bold=True, color="FFFFFF")
         
-        # Headers
-        headers = [
-            "asset_id", "asset_name", "category_name", "type_name", "manufacture", 
-            "model", "serial_number", "asset_tag", "company_name", "business_unit_name",
-            "location_name", "room_name", "owner_name", "owner_type", "assigned_user_name",
-            "item_condition", "purchase_date", "purchase_cost", "warranty", "supplier", 
-            "journal", "notes", "status", "year"
-        ]
+        # Headers (the import matches columns by these names)
+        headers = IMPORT_COLUMNS
         
         for col_num, header in enumerate(headers, 1):
             cell = ws.cell(row=1, column=col_num, value=header)
@@ -141,45 +151,8 @@ async def bulk_update_export(
             cell.alignment = Alignment(horizontal="center", vertical="center")
         
         # Data rows
-        for row_num, asset in enumerate(assets, 2):
-            ws.cell(row=row_num, column=1, value=asset.get('asset_id'))
-            ws.cell(row=row_num, column=2, value=asset.get('asset_name'))
-            ws.cell(row=row_num, column=3, value=asset.get('ref_categories', {}).get('category_name') if asset.get('ref_categories') else '')
-            ws.cell(row=row_num, column=4, value=asset.get('ref_asset_types', {}).get('type_name') if asset.get('ref_asset_types') else '')
-            ws.cell(row=row_num, column=5, value=asset.get('manufacture'))
-            ws.cell(row=row_num, column=6, value=asset.get('model'))
-            ws.cell(row=row_num, column=7, value=asset.get('serial_number'))
-            ws.cell(row=row_num, column=8, value=asset.get('asset_tag'))
-            ws.cell(row=row_num, column=9, value=asset.get('ref_companies', {}).get('company_name') if asset.get('ref_companies') else '')
-            ws.cell(row=row_num, column=10, value=asset.get('ref_business_units', {}).get('business_unit_name') if asset.get('ref_business_units') else '')
-            
-            loc_data = asset.get('ref_locations', {})
-            ws.cell(row=row_num, column=11, value=loc_data.get('location_name') if loc_data else '')
-            ws.cell(row=row_num, column=12, value=asset.get('room_name'))
-            ws.cell(row=row_num, column=13, value=asset.get('ref_owners', {}).get('owner_name') if asset.get('ref_owners') else '')
-            ws.cell(row=row_num, column=14, value=asset.get('owner_type', 'GA'))
-            
-            # Assigned user name for IT assets
-            if asset.get('owner_type') == 'IT':
-                # Use stored assigned_user_name if available, otherwise get from user object
-                assigned_user_name = asset.get('assigned_user_name')
-                if not assigned_user_name:
-                    assigned_user = asset.get('assigned_user', {})
-                    assigned_user_name = assigned_user.get('full_name') if assigned_user else ''
-            else:
-                assigned_user_name = ''
-            
-            ws.cell(row=row_num, column=15, value=assigned_user_name)
-            
-            ws.cell(row=row_num, column=16, value=asset.get('item_condition'))
-            ws.cell(row=row_num, column=17, value=asset.get('purchase_date'))
-            ws.cell(row=row_num, column=18, value=asset.get('purchase_cost'))
-            ws.cell(row=row_num, column=19, value=asset.get('warranty'))
-            ws.cell(row=row_num, column=20, value=asset.get('supplier'))
-            ws.cell(row=row_num, column=21, value=asset.get('journal'))
-            ws.cell(row=row_num, column=22, value=asset.get('notes'))
-            ws.cell(row=row_num, column=23, value=asset.get('status'))
-            ws.cell(row=row_num, column=24, value=asset.get('year'))
+        for asset in assets:
+            ws.append(export_row(asset))
         
         # Auto-adjust column widths
         for column in ws.columns:
@@ -213,155 +186,110 @@ async def bulk_update_export(
 async def bulk_update_import(
     request: Request,
     current_profile = Depends(get_current_profile),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    mode: str = Form("update")
 ):
-    """Step 2: Import Excel and show preview"""
+    """Step 2: Import Excel into the staging store"""
     if current_profile.role != "admin":
         return RedirectResponse("/", status_code=303)
     
+    mode = "create" if mode == "create" else "update"
+    batch_id = None
     try:
-        # Read Excel file
-        contents = await file.read()
-        wb = load_workbook(BytesIO(contents))
-        ws = wb.active
+        # Rows are parsed off the spooled upload in a worker thread and
+        # staged in chunks; the file is never read into memory whole
+        batch_id = import_staging.create_batch(current_profile.id, kind=mode, meta={"filename": file.filename})
+        await run_in_threadpool(stage_new_sheet if mode == "create" else stage_sheet, file.file, batch_id)
         
-        # Parse data
-        headers = [cell.value for cell in ws[1]]
-        updates = []
-        errors = []
-        
-        for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
-            if not row[0]:  # Skip if no asset_id
-                continue
-            
-            try:
-                update_data = {
-                    'asset_id': row[0],
-                    'asset_name': row[1],
-                    'category_name': row[2],
-                    'type_name': row[3],
-                    'manufacture': row[4],
-                    'model': row[5],
-                    'serial_number': row[6],
-                    'asset_tag': row[7],
-                    'company_name': row[8],
-                    'business_unit_name': row[9],
-                    'location_name': row[10],
-                    'room_name': row[11],
-                    'owner_name': row[12],
-                    'owner_type': row[13] if len(row) > 13 else 'GA',
-                    'assigned_user_name': row[14] if len(row) > 14 else None,
-                    'item_condition': row[15] if len(row) > 15 else row[13],
-                    'purchase_date': str(row[16]) if len(row) > 16 and row[16] else str(row[14]) if row[14] else None,
-                    'purchase_cost': float(row[17]) if len(row) > 17 and row[17] else float(row[15]) if row[15] else None,
-                    'warranty': row[18] if len(row) > 18 else row[16],
-                    'supplier': row[19] if len(row) > 19 else row[17],
-                    'journal': row[20] if len(row) > 20 else row[18],
-                    'notes': row[21] if len(row) > 21 else row[19],
-                    'status': row[22] if len(row) > 22 else row[20],
-                    'year': int(row[23]) if len(row) > 23 and row[23] else int(row[21]) if row[21] else None
-                }
-                updates.append(update_data)
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
-        
-        # Store in session (simplified - use database or cache in production)
-        request.session['bulk_updates'] = updates
-        
-        template_path = get_template(request, "bulk_update/preview.html")
-        return templates.TemplateResponse(template_path, {
-            "request": request,
-            "user": current_profile,
-            "updates": updates,
-            "errors": errors,
-            "total": len(updates)
-        })
+        return RedirectResponse(f"/bulk-update/preview/{batch_id}", status_code=303)
         
+    except SheetError as e:
+        import_staging.delete_batch(batch_id)
+        response = RedirectResponse("/bulk-update", status_code=303)
+        set_flash(response, f"Gagal import file: {str(e)}", "error")
+        return response
     except Exception as e:
         logging.error(f"Error importing file: {str(e)}")
+        if batch_id:
+            import_staging.delete_batch(batch_id)
         response = RedirectResponse("/bulk-update", status_code=303)
         set_flash(response, f"Gagal import file: {str(e)}", "error")
         return response
 
+@router.get("/bulk-update/preview/{batch_id}")
+async def bulk_update_preview(
+    request: Request,
+    batch_id: str,
+    page: int = Query(1, ge=1),
+    current_profile = Depends(get_current_profile)
+):
+    """Step 2: Preview a staged import, one page at a time"""
+    if current_profile.role != "admin":
+        return RedirectResponse("/", status_code=303)
+    
+    batch = import_staging.get_batch(batch_id, current_profile.id)
+    if not batch:
+        response = RedirectResponse("/bulk-update", status_code=303)
+        set_flash(response, "Data import tidak ditemukan atau sudah kedaluwarsa, silakan upload ulang", "error")
+        return response
+    
+    total_pages = max(1, (batch["total"] + PREVIEW_PAGE_SIZE - 1) // PREVIEW_PAGE_SIZE)
+    page = min(page, total_pages)
+    
+    template_path = get_template(request, "bulk_update/preview.html")
+    return templates.TemplateResponse(template_path, {
+        "request": request,
+        "user": current_profile,
+        "batch": batch,
+        "mode": batch["kind"],
+        "updates": import_staging.page_rows(batch_id, (page - 1) * PREVIEW_PAGE_SIZE, PREVIEW_PAGE_SIZE),
+        "errors": import_staging.errors(batch_id, MAX_PREVIEW_ERRORS),
+        "error_count": batch["error_count"],
+        "total": batch["total"],
+        "unchanged": batch["meta"].get("unchanged", 0),
+        "page": page,
+        "total_pages": total_pages
+    })
+
 @router.post("/bulk-update/confirm")
-async def bulk_update_confirm(request: Request, current_profile = Depends(get_current_profile)):
+async def bulk_update_confirm(
+    request: Request,
+    batch_id: str = Form(...),
+    grouped: bool = Form(False),
+    current_profile = Depends(get_current_profile)
+):
     """Step 3: Execute bulk update"""
     if current_profile.role != "admin":
         return RedirectResponse("/", status_code=303)
     
     try:
-        updates = request.session.get('bulk_updates', [])
-        if not updates:
+        batch = import_staging.get_batch(batch_id, current_profile.id)
+        if not batch:
             response = RedirectResponse("/bulk-update", status_code=303)
             set_flash(response, "Tidak ada data untuk diupdate", "error")
             return response
+        if not batch["total"]:
+            # Every row matched the database; nothing to write or invalidate
+            import_staging.delete_batch(batch_id)
+            response = RedirectResponse("/bulk-update", status_code=303)
+            set_flash(response, "Tidak ada perubahan data, tidak ada asset yang diupdate", "success")
+            return response
+        
+        if batch["kind"] == "create":
+            return await _confirm_create(request, batch, grouped, current_profile)
         
         supabase = get_supabase()
         success_count = 0
         error_count = 0
         errors = []
         
-        for update_data in updates:
+        for update_data in import_staging.iter_rows(batch_id):
             try:
                 asset_id = update_data['asset_id']
                 
-                # Prepare update payload
-                payload = {}
-                
-                # Resolve foreign keys
-                if update_data.get('category_name'):
-                    cat = supabase.table('ref_categories').select('category_id').eq('category_name', update_data['category_name']).execute()
-                    if cat.data:
-                        payload['category_id'] = cat.data[0]['category_id']
-                
-                if update_data.get('type_name'):
-                    typ = supabase.table('ref_asset_types').select('asset_type_id').eq('type_name', update_data['type_name']).execute()
-                    if typ.data:
-                        payload['asset_type_id'] = typ.data[0]['asset_type_id']
-                
-                if update_data.get('company_name'):
-                    comp = supabase.table('ref_companies').select('company_id').eq('company_name', update_data['company_name']).execute()
-                    if comp.data:
-                        payload['company_id'] = comp.data[0]['company_id']
-                
-                if update_data.get('business_unit_name'):
-                    bu = supabase.table('ref_business_units').select('business_unit_id').eq('business_unit_name', update_data['business_unit_name']).execute()
-                    if bu.data:
-                        payload['business_unit_id'] = bu.data[0]['business_unit_id']
-                
-                if update_data.get('location_name') and update_data.get('room_name'):
-                    loc = supabase.table('ref_locations').select('location_id').eq('location_name', update_data['location_name']).eq('room_name', update_data['room_name']).execute()
-                    if loc.data:
-                        payload['location_id'] = loc.data[0]['location_id']
-                
-                if update_data.get('owner_name'):
-                    own = supabase.table('ref_owners').select('owner_id').eq('owner_name', update_data['owner_name']).execute()
-                    if own.data:
-                        payload['owner_id'] = own.data[0]['owner_id']
-                
-                # Handle assigned user for IT assets
-                if update_data.get('owner_type') == 'IT' and update_data.get('assigned_user_name'):
-                    user_name = update_data['assigned_user_name']
-                    # Try to find user by full_name first, then username
-                    user = supabase.table('profiles').select('id').eq('full_name', user_name).execute()
-                    if not user.data:
-                        user = supabase.table('profiles').select('id').eq('username', user_name).execute()
-                    
-                    if user.data:
-                        payload['assigned_user_id'] = user.data[0]['id']
-                        payload['assigned_user_name'] = user_name
-                    else:
-                        errors.append(f"Asset ID {update_data.get('asset_id')}: User '{user_name}' not found")
-                        continue
-                
-                # Direct fields
-                direct_fields = ['asset_name', 'manufacture', 'model', 'serial_number', 'asset_tag',
-                                'room_name', 'item_condition', 'purchase_date', 'purchase_cost',
-                                'warranty', 'supplier', 'journal', 'notes', 'status', 'year', 'owner_type', 'assigned_user_name']
-                
-                for field in direct_fields:
-                    if update_data.get(field) is not None:
-                        payload[field] = update_data[field]
+                # Only the columns that differ from the database, resolved and
+                # validated when the sheet was staged
+                payload = update_data['payload']
                 
                 # Update asset
                 supabase.table(TABLES['ASSETS']).update(payload).eq('asset_id', asset_id).execute()
@@ -372,11 +300,11 @@ async def bulk_update_confirm(request: Request, current_profile = Depends(get_cu
                 errors.append(f"Asset ID {update_data.get('asset_id')}: {str(e)}")
                 logging.error(f"Error updating asset {update_data.get('asset_id')}: {str(e)}")
         
-        # Clear session
-        request.session.pop('bulk_updates', None)
+        import_staging.delete_batch(batch_id)
         
         # Invalidate cache
-        invalidate_cache()
+        if success_count:
+            invalidate_cache()
         
         # Show result
         template_path = get_template(request, "bulk_update/result.html")
@@ -386,7 +314,7 @@ async def bulk_update_confirm(request: Request, current_profile = Depends(get_cu
             "success_count": success_count,
             "error_count": error_count,
             "errors": errors,
-            "total": len(updates)
+            "total": batch["total"]
         })
         
     except Exception as e:
@@ -394,3 +322,33 @@ async def bulk_update_confirm(request: Request, current_profile = Depends(get_cu
         response = RedirectResponse("/bulk-update", status_code=303)
         set_flash(response, f"Gagal update data: {str(e)}", "error")
         return response
+
+async def _confirm_create(request: Request, batch, grouped: bool, current_profile):
+    """Step 3 for new assets: insert them, or submit one grouped approval"""
+    batch_id = batch["batch_id"]
+    
+    if grouped:
+        submitted = await run_in_threadpool(submit_grouped_approval, import_staging.iter_rows(batch_id), current_profile)
+        response = RedirectResponse("/bulk-update", status_code=303)
+        if submitted:
+            import_staging.delete_batch(batch_id)
+            set_flash(response, f"Approval request untuk {submitted} asset baru telah diajukan", "success")
+        else:
+            set_flash(response, "Gagal mengajukan approval request", "error")
+        return response
+    
+    result = await run_in_threadpool(create_assets, import_staging.iter_rows(batch_id))
+    import_staging.delete_batch(batch_id)
+    if result["created"]:
+        invalidate_cache()
+    
+    template_path = get_template(request, "bulk_update/result.html")
+    return templates.TemplateResponse(template_path, {
+        "request": request,
+        "user": current_profile,
+        "mode": "create",
+        "success_count": result["created"],
+        "error_count": batch["total"] - result["created"],
+        "errors": result["errors"],
+        "total": batch["total"]
+    })
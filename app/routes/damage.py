@@ -2,12 +2,11 @@
 import logging
 from fastapi import APIRouter, Request, Depends, Form
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
 from app.utils.auth import get_current_profile
 from app.utils.device_detector import get_template
+from app.utils.templating import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/damage")
@@ -66,7 +65,7 @@ async def submit_damage_report(
     current_profile = Depends(get_current_profile)
 ):
     """Submit damage report for individual asset - creates approval request"""
-    from app.utils.database_manager import get_asset_by_id, get_supabase
+    from app.utils.database_manager import get_asset_by_id, get_supabase, add_approval_request
     from datetime import datetime
     import json
 
@@ -102,7 +101,8 @@ async def submit_damage_report(
             })
         }
         
-        supabase.table('approvals').insert(approval_data).execute()
+        if not add_approval_request(approval_data):
+            return RedirectResponse(url=f"/damage/error?asset_id={asset_id}", status_code=302)
         
         return RedirectResponse(url=f"/damage/success?asset_id={asset_id}", status_code=302)
         
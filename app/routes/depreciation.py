@@ -1,22 +1,22 @@
 # app/routes/depreciation.py
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse
 from datetime import datetime
 import logging
 
 from app.utils.auth import get_current_profile, UserRole
-from app.utils.database_manager import get_supabase
+from app.utils.database_manager import get_supabase, invalidate_cache
 from app.utils.device_detector import get_template
+from app.utils.templating import templates
+from app.utils.fast_json import FastJSONResponse
 
 router = APIRouter(prefix="/depreciation", tags=["depreciation"])
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/", response_class=HTMLResponse)
 async def depreciation_page(request: Request, current_profile = Depends(get_current_profile)):
     """Depreciation update page (admin only)"""
     if current_profile.role != UserRole.ADMIN:
-        return JSONResponse({"error": "Access denied"}, status_code=403)
+        return FastJSONResponse({"error": "Access denied"}, status_code=403)
     
     template_path = get_template(request, "depreciation/index.html")
     return templates.TemplateResponse(template_path, {
@@ -29,7 +29,7 @@ async def depreciation_page(request: Request, current_profile = Depends(get_curr
 async def update_depreciation(request: Request, current_profile = Depends(get_current_profile)):
     """Update all assets depreciation and book values"""
     if current_profile.role != UserRole.ADMIN:
-        return JSONResponse({"error": "Access denied"}, status_code=403)
+        return FastJSONResponse({"error": "Access denied"}, status_code=403)
     
     try:
         supabase = get_supabase()
@@ -90,7 +90,10 @@ async def update_depreciation(request: Request, current_profile = Depends(get_cu
                 logging.error(f"Error updating asset {asset.get('asset_id')}: {e}")
                 continue
         
-        return JSONResponse({
+        if updated_count:
+            invalidate_cache()
+
+        return FastJSONResponse({
             "status": "success",
             "message": f"Updated {updated_count} assets successfully",
             "updated_count": updated_count
@@ -98,7 +101,7 @@ async def update_depreciation(request: Request, current_profile = Depends(get_cu
         
     except Exception as e:
         logging.error(f"Error updating depreciation: {e}")
-        return JSONResponse({
+        return FastJSONResponse({
             "status": "error", 
             "message": str(e)
         }, status_code=500)
\ No newline at end of file
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, Request, Form, HTTPException, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from datetime import datetime
 import json
 
@@ -8,9 +7,9 @@ from app.utils.auth import get_admin_user, get_current_profile
 from app.utils.database_manager import get_asset_by_id, add_approval_request, get_supabase, update_asset
 from app.utils.flash import set_flash
 from app.utils.device_detector import get_template
+from app.utils.templating import templates, stream_template
 
 router = APIRouter(prefix="/disposal", tags=["disposal"])
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/form", response_class=HTMLResponse)
 async def disposal_form_page(
@@ -93,7 +92,7 @@ async def disposal_list_page(
     disposed_assets = response.data or []
     
     template_path = get_template(request, "disposal/index.html")
-    return templates.TemplateResponse(template_path, {
+    return stream_template(template_path, {
         "request": request,
         "current_profile": current_profile,
         "user": current_profile,
@@ -0,0 +1,67 @@
+# app/routes/events.py
+import asyncio
+import time
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.utils.auth import get_current_profile
+from app.utils.event_bus import event_bus
+from app.utils import fast_json
+from app.utils.fast_json import FastJSONResponse
+
+router = APIRouter(tags=["events"])
+
+HEARTBEAT_SECONDS = 25
+RETRY_MS = 5000
+
+def _frame(event: dict) -> str:
+    return f"event: {event['event']}\ndata: {fast_json.dumps_str(event)}\n\n"
+
+@router.get("/events")
+async def event_stream(
+    request: Request,
+    current_profile = Depends(get_current_profile)
+):
+    """Server-Sent Events: approval and asset changes for the current user."""
+    # Subscribe up front so a full worker answers 503 instead of an empty
+    # 200 that EventSource would reconnect to straight away
+    subscriber = event_bus.subscribe(current_profile.id, current_profile.role)
+    if subscriber is None:
+        return FastJSONResponse(
+            {"status": "error", "message": "Too many open event streams"},
+            status_code=503, headers={"Retry-After": "30"}
+        )
+
+    # End the stream when the access token does; EventSource reconnects and
+    # the session middleware refreshes the cookie on the new request
+    user = getattr(request.state, "user", None) or {}
+    expires_at = user.get("exp") or time.time() + 3600
+
+    async def stream():
+        try:
+            yield f"retry: {RETRY_MS}\n: connected\n\n"
+            while time.time() < expires_at:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Servers on ASGI spec 2.4 do not cancel the stream when
+                    # the client goes away, so check on every heartbeat
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if subscriber.lagged:
+                    subscriber.lagged = False
+                    yield "event: resync\ndata: {}\n\n"
+                yield _frame(event)
+        finally:
+            event_bus.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+        # Also covers a stream that never started; unsubscribe is idempotent
+        background=BackgroundTask(event_bus.unsubscribe, subscriber)
+    )
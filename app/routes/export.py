@@ -1,10 +1,10 @@
 # app/routes/export.py
 from fastapi import APIRouter, Request, Depends, Form
 from fastapi.responses import StreamingResponse
-from fastapi.templating import Jinja2Templates
 from app.utils.auth import get_current_profile
 from app.utils.database_manager import get_supabase
 from app.utils.device_detector import get_template
+from app.utils.templating import templates
 import io
 import json
 from datetime import datetime
@@ -12,7 +12,6 @@ from typing import List
 from collections import OrderedDict
 
 router = APIRouter(prefix="/export", tags=["export"])
-templates = Jinja2Templates(directory="app/templates")
 
 # Available tables for export
 EXPORT_TABLES = {
@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Request, Form
 from fastapi.responses import RedirectResponse
 from app.utils.device_detector import get_template
+from app.utils.templating import templates
 from app.config import load_config
-from starlette.templating import Jinja2Templates
+from app.utils import auth_gateway
 import logging
 from urllib.parse import quote_plus
 
 config = load_config()
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 def get_cookie_settings(request: Request) -> dict:
     """Get cookie settings matching session_auth.py"""
@@ -35,17 +35,11 @@ async def forgot_password_page(request: Request):
 async def forgot_password_submit(request: Request, email: str = Form(...)):
     """Send password reset email via Supabase SDK"""
     try:
-        from supabase import create_client
-        supabase = create_client(config.SUPABASE_URL, config.SUPABASE_ANON_KEY)
-        
         base_url = str(request.base_url).rstrip('/')
         redirect_url = f"{base_url}/auth/change-password"
         
         try:
-            supabase.auth.reset_password_for_email(
-                email, 
-                {"redirect_to": redirect_url}
-            )
+            await auth_gateway.reset_password_for_email(email, redirect_url)
         except Exception as reset_error:
             if "429" in str(reset_error) or "rate" in str(reset_error).lower():
                 template_path = get_template(request, "forgot_password/request.html")
@@ -126,29 +120,18 @@ async def change_password_page(request: Request):
         return templates.TemplateResponse(template_path, {"request": request})
     
     try:
-        from supabase import create_client
-        supabase = create_client(config.SUPABASE_URL, config.SUPABASE_ANON_KEY)
-        
         # Verify recovery token
         try:
-            payload = {"type": "recovery"}
-            if token_hash:
-                payload["token_hash"] = token_hash
-            else:
-                payload["token"] = token
+            session = await auth_gateway.verify_otp("recovery", token_hash=token_hash, token=token)
             
-            result = supabase.auth.verify_otp(payload)
-            
-            if not result.session or not result.session.access_token or not result.session.refresh_token:
-                logging.warning(f"Recovery verification returned incomplete session - access_token: {bool(result.session.access_token) if result.session else False}, refresh_token: {bool(result.session.refresh_token) if result.session else False}")
+            if not session or not session.get("access_token") or not session.get("refresh_token"):
+                logging.warning(f"Recovery verification returned incomplete session - access_token: {bool(session.get('access_token')) if session else False}, refresh_token: {bool(session.get('refresh_token')) if session else False}")
                 template_path = get_template(request, "login_logout.html")
                 return templates.TemplateResponse(template_path, {
                     "request": request,
                     "error": "Link reset password tidak valid atau sudah kadaluarsa."
                 })
             
-            session = result.session
-            
         except Exception as verify_error:
             logging.warning(f"Recovery token verification failed: {verify_error}")
             template_path = get_template(request, "login_logout.html")
@@ -163,19 +146,19 @@ async def change_password_page(request: Request):
         
         response_obj.set_cookie(
             key="sb_access_token",
-            value=session.access_token,
+            value=session["access_token"],
             max_age=3600,
             **settings
         )
         
         response_obj.set_cookie(
             key="sb_refresh_token",
-            value=session.refresh_token,
+            value=session["refresh_token"],
             max_age=86400 * 30,
             **settings
         )
         
-        logging.info(f"Password reset session created - access_token: {bool(session.access_token)}, refresh_token: {bool(session.refresh_token)}")
+        logging.info(f"Password reset session created - access_token: {bool(session['access_token'])}, refresh_token: {bool(session['refresh_token'])}")
         return response_obj
             
     except Exception as e:
@@ -230,15 +213,21 @@ async def change_password_submit(
                 "error": "Session tidak valid. Silakan request link reset password baru."
             })
         
-        # Update password
-        from supabase import create_client
-        supabase = create_client(config.SUPABASE_URL, config.SUPABASE_ANON_KEY)
-        
+        # Update password statelessly with the recovery session's own tokens
         try:
-            supabase.auth.set_session(access_token, refresh_token)
-            result = supabase.auth.update_user({"password": new_password})
+            try:
+                user = await auth_gateway.update_user(access_token, {"password": new_password})
+            except auth_gateway.AuthGatewayError as auth_error:
+                if auth_error.status_code != 401:
+                    raise
+                # Access token expired - refresh once and retry
+                session = await auth_gateway.refresh_session(refresh_token)
+                if not session:
+                    raise
+                access_token = session["access_token"]
+                user = await auth_gateway.update_user(access_token, {"password": new_password})
             
-            if not result.user:
+            if not user or not user.get("id"):
                 logging.error("Failed to update password via SDK")
                 return RedirectResponse("/auth/change-password/form?error=Gagal+mengubah+password", status_code=303)
             
@@ -249,7 +238,7 @@ async def change_password_submit(
             return RedirectResponse("/auth/change-password/form?error=Gagal+mengubah+password", status_code=303)
         
         # Clear session and cookies
-        supabase.auth.sign_out()
+        await auth_gateway.sign_out(access_token)
         
         template_path = get_template(request, "login_logout.html")
         response_obj = templates.TemplateResponse(template_path, {
@@ -14,4 +14,23 @@ async def health_check():
 @router.head("/wake")
 async def wake_up():
     """Wake up endpoint for keeping service alive."""
-    return {"status": "awake", "timestamp": time.time()}
\ No newline at end of file
+    return {"status": "awake", "timestamp": time.time()}
+
+@router.get("/health/pools")
+async def pool_stats():
+    """Supabase client pool, fragment cache, event stream and photo upload statistics."""
+    from app.utils.supabase_client import client_registry
+    from app.utils.fragment_cache import fragment_cache
+    from app.utils.event_bus import event_bus
+    from app.utils.photo import photo_upload_queue
+    return {
+        "supabase": client_registry.stats(),
+        "fragment_cache": fragment_cache.stats(),
+        "event_streams": event_bus.subscriber_count,
+        "photo_uploads": {
+            "pending": photo_upload_queue.pending,
+            "completed": photo_upload_queue.completed,
+            "failed": photo_upload_queue.failed
+        },
+        "timestamp": time.time()
+    }
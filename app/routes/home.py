@@ -1,15 +1,146 @@
 # /app/app/routes/home.py
 import logging
 from datetime import datetime
-from fastapi import APIRouter, Request, Depends
-from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi.responses import RedirectResponse, HTMLResponse
 from app.utils.auth import get_current_profile
-from app.utils.database_manager import get_summary_data, get_chart_data, get_all_assets
-from app.utils.device_detector import get_template
+from app.utils.database_manager import get_chart_data, get_all_assets, get_data_version
+from app.utils.device_detector import get_template, DeviceDetector
+from app.utils.fragment_cache import fragment_cache
+from app.utils.templating import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+
+OWNER_TYPES = ["GA", "IT"]
+
+# Helper function to safely convert values to float
+def safe_float(value):
+    if value is None or value == '':
+        return 0.0
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+def _filtered_assets(owner_type):
+    all_assets = get_all_assets()
+    if owner_type:
+        all_assets = [asset for asset in all_assets if asset.get("owner_type") == owner_type]
+    return all_assets
+
+def _active(assets):
+    # Disposed and lost assets are excluded from dashboard counts
+    return [asset for asset in assets if asset.get("status", "") not in ["Disposed", "Lost"]]
+
+def _status_counts(all_assets):
+    return {
+        "total_assets": len(_active(all_assets)),
+        "disposed_count": len([a for a in all_assets if a.get("status", "") == "Disposed"]),
+        "lost_count": len([a for a in all_assets if a.get("status", "") == "Lost"]),
+        "damaged_count": len([a for a in all_assets if a.get("status", "") == "Damaged"])
+    }
+
+def _display_asset(asset):
+    """Copy of asset with the *_display fields used by the asset lists."""
+    asset = dict(asset)
+    asset["display_name"] = asset.get("asset_name", f"Asset #{asset.get('asset_id', 'Unknown')}")
+    asset["category_display"] = asset.get("ref_categories", {}).get("category_name", "Not specified") if asset.get("ref_categories") else "Not specified"
+    asset["location_display"] = asset.get("ref_locations", {}).get("location_name", "Not specified") if asset.get("ref_locations") else "Not specified"
+    asset["business_unit_display"] = asset.get("ref_business_units", {}).get("business_unit_name", "Not specified") if asset.get("ref_business_units") else "Not specified"
+    asset["company_display"] = asset.get("ref_companies", {}).get("company_name", "Not specified") if asset.get("ref_companies") else "Not specified"
+    asset["owner_display"] = asset.get("ref_owners", {}).get("owner_name", "Not specified") if asset.get("ref_owners") else "Not specified"
+    # Format purchase date
+    if asset.get("purchase_date"):
+        try:
+            if isinstance(asset["purchase_date"], str):
+                date_obj = datetime.strptime(asset["purchase_date"], "%Y-%m-%d")
+                asset["purchase_date_display"] = date_obj.strftime("%B %d, %Y")
+            else:
+                asset["purchase_date_display"] = asset["purchase_date"].strftime("%B %d, %Y")
+        except:
+            asset["purchase_date_display"] = "Not specified"
+    else:
+        asset["purchase_date_display"] = "Not specified"
+    # Format purchase cost
+    if asset.get("purchase_cost"):
+        try:
+            cost = float(asset["purchase_cost"])
+            asset["purchase_cost_display"] = f"Rp {cost:,.0f}"
+        except:
+            asset["purchase_cost_display"] = "Not specified"
+    else:
+        asset["purchase_cost_display"] = "Not specified"
+    return asset
+
+def _kpis_context(owner_type):
+    all_assets = _filtered_assets(owner_type)
+    active_assets = _active(all_assets)
+
+    # Calculate financial values directly from assets
+    total_purchase_value = sum(safe_float(asset.get("purchase_cost")) for asset in active_assets)
+    total_book_value = sum(safe_float(asset.get("book_value")) for asset in active_assets)
+
+    context = _status_counts(all_assets)
+    context.update({
+        "ga_count": len([a for a in active_assets if a.get("owner_type") == "GA"]),
+        "it_count": len([a for a in active_assets if a.get("owner_type") == "IT"]),
+        "total_purchase_value": total_purchase_value,
+        "total_book_value": total_book_value,
+        # Depreciation is purchase value minus book value
+        "total_depreciation_value": total_purchase_value - total_book_value,
+        "relocated_count": 0,  # Will need to get from logs
+        "repaired_count": 0    # Will need to get from logs
+    })
+    return context
+
+def _activity_context(owner_type):
+    chart_data = get_chart_data(owner_type, include_activity=False)
+    context = {}
+    for period in ["monthly", "quarterly", "yearly"]:
+        counts = chart_data.get(f"{period}_counts", {})
+        context[f"{period}_chart_labels"] = list(counts.keys())
+        context[f"{period}_chart_values"] = list(counts.values())
+    return context
+
+def _categories_context(owner_type):
+    return {"category_counts": get_chart_data(owner_type, include_activity=False).get("category_counts", {})}
+
+def _locations_context(owner_type):
+    return {"location_counts": get_chart_data(owner_type, include_activity=False).get("location_counts", {})}
+
+def _status_context(owner_type):
+    return _status_counts(_filtered_assets(owner_type))
+
+def _damaged_context(owner_type):
+    damaged_assets = [a for a in _filtered_assets(owner_type) if a.get("status") == "Damaged"]
+    damaged_assets = sorted(damaged_assets, key=lambda a: a.get("asset_name", ""))[:5]
+    return {"damaged_assets": [_display_asset(a) for a in damaged_assets]}
+
+def _lost_context(owner_type):
+    lost_assets = [a for a in _filtered_assets(owner_type) if a.get("status") == "Lost"]
+    lost_assets = sorted(lost_assets, key=lambda a: a.get("asset_name", ""))[:5]
+    return {"lost_assets": [_display_asset(a) for a in lost_assets]}
+
+def _high_value_context(owner_type):
+    # Top 5 active assets by purchase cost
+    high_value_assets = sorted(
+        _active(_filtered_assets(owner_type)),
+        key=lambda a: float(a.get("purchase_cost", 0) or 0),
+        reverse=True
+    )[:5]
+    return {"high_value_assets": [_display_asset(a) for a in high_value_assets]}
+
+# Each widget builds only its own data and renders dashboard/widgets/<name>.html
+DASHBOARD_WIDGETS = {
+    "kpis": _kpis_context,
+    "activity": _activity_context,
+    "categories": _categories_context,
+    "locations": _locations_context,
+    "status": _status_context,
+    "damaged": _damaged_context,
+    "lost": _lost_context,
+    "high_value": _high_value_context
+}
 
 @router.get("/", response_class=RedirectResponse)
 async def redirect_root():
@@ -17,201 +148,47 @@ async def redirect_root():
 
 @router.get("/dashboard", response_model=None)
 async def home(request: Request, current_profile = Depends(get_current_profile), owner_type: str = None):
-    try:
-        summary_data = get_summary_data()
-        chart_data = get_chart_data(owner_type)
-        all_assets = get_all_assets()
-
-        # Filter by owner_type if specified
-        if owner_type and owner_type in ["GA", "IT"]:
-            all_assets = [asset for asset in all_assets if asset.get("owner_type") == owner_type]
-        
-        # Filter out disposed and lost assets for dashboard counts
-        active_assets = [asset for asset in all_assets if asset.get("status", "") not in ["Disposed", "Lost"]]
-        disposed_assets = [asset for asset in all_assets if asset.get("status", "") == "Disposed"]
-        lost_assets = [asset for asset in all_assets if asset.get("status", "") == "Lost"]
-        
-        # Count assets by status and activity
-        total_assets = len(active_assets)
-        disposed_count = len(disposed_assets)
-        lost_count = len(lost_assets)
-        damaged_count = len([a for a in all_assets if a.get("status", "") == "Damaged"])
-        
-        # Count assets by owner type
-        ga_count = len([a for a in all_assets if a.get("owner_type") == "GA" and a.get("status", "") not in ["Disposed", "Lost"]])
-        it_count = len([a for a in all_assets if a.get("owner_type") == "IT" and a.get("status", "") not in ["Disposed", "Lost"]])
-        
-        # Count assets by activity type
-        relocated_count = 0  # Will need to get from logs
-        repaired_count = 0   # Will need to get from logs
-        
-        # Helper function to safely convert values to float
-        def safe_float(value):
-            if value is None or value == '':
-                return 0.0
-            try:
-                return float(value)
-            except (ValueError, TypeError):
-                return 0.0
-        
-        # Calculate financial values directly from assets
-        total_purchase_value = sum(safe_float(asset.get("purchase_cost")) for asset in active_assets)
-        total_book_value = sum(safe_float(asset.get("book_value")) for asset in active_assets)
-        # Calculate depreciation as purchase value minus book value
-        total_depreciation_value = total_purchase_value - total_book_value
-        category_counts = chart_data.get("category_counts", {})
-        
-        # Get chart data directly
-        location_counts_dict = chart_data.get("location_counts", {})
-        monthly_counts = chart_data.get("monthly_counts", {})
-        quarterly_counts = chart_data.get("quarterly_counts", {})
-        yearly_counts = chart_data.get("yearly_counts", {})
-        
-        monthly_chart_labels = list(monthly_counts.keys())
-        monthly_chart_values = list(monthly_counts.values())
-        quarterly_chart_labels = list(quarterly_counts.keys())
-        quarterly_chart_values = list(quarterly_counts.values())
-        yearly_chart_labels = list(yearly_counts.keys())
-        yearly_chart_values = list(yearly_counts.values())
-        
-
-        
-
-
-        # Calculate age distribution
-        age_distribution = {"0-1 years": 0, "1-3 years": 0, "3-5 years": 0, "5+ years": 0}
-        current_year = datetime.now().year
-        
-        for asset in all_assets:
-            purchase_date = asset.get("purchase_date")
-            if purchase_date:
-                try:
-                    if isinstance(purchase_date, str):
-                        date = datetime.strptime(purchase_date, "%Y-%m-%d")
-                    else:
-                        date = purchase_date
-                    age = current_year - date.year
-                    
-                    if age <= 1:
-                        age_distribution["0-1 years"] += 1
-                    elif age <= 3:
-                        age_distribution["1-3 years"] += 1
-                    elif age <= 5:
-                        age_distribution["3-5 years"] += 1
-                    else:
-                        age_distribution["5+ years"] += 1
-                except:
-                    pass
-        
-        age_distribution_list = [
-            {"label": k, "value": v} for k, v in age_distribution.items()
-        ]
-
-        # Get damaged assets needing repair
-        damaged_assets = [a for a in all_assets if a.get("status") == "Damaged"]
-        damaged_assets = sorted(damaged_assets, key=lambda a: a.get("asset_name", ""))[:5]
-        
-        # Get lost assets
-        lost_assets_list = [a for a in all_assets if a.get("status") == "Lost"]
-        lost_assets_list = sorted(lost_assets_list, key=lambda a: a.get("asset_name", ""))[:5]
-        
-        # Get high value assets (top 5 by purchase cost)
-        high_value_assets = sorted(
-            active_assets,
-            key=lambda a: float(a.get("purchase_cost", 0) or 0),
-            reverse=True
-        )[:5]
-        
-        # Process assets for display
-        for asset in damaged_assets + lost_assets_list + high_value_assets:
-            asset["display_name"] = asset.get("asset_name", f"Asset #{asset.get('asset_id', 'Unknown')}")
-            asset["category_display"] = asset.get("ref_categories", {}).get("category_name", "Not specified") if asset.get("ref_categories") else "Not specified"
-            asset["location_display"] = asset.get("ref_locations", {}).get("location_name", "Not specified") if asset.get("ref_locations") else "Not specified"
-            asset["business_unit_display"] = asset.get("ref_business_units", {}).get("business_unit_name", "Not specified") if asset.get("ref_business_units") else "Not specified"
-            asset["company_display"] = asset.get("ref_companies", {}).get("company_name", "Not specified") if asset.get("ref_companies") else "Not specified"
-            asset["owner_display"] = asset.get("ref_owners", {}).get("owner_name", "Not specified") if asset.get("ref_owners") else "Not specified"
-            # Format purchase date
-            if asset.get("purchase_date"):
-                try:
-                    if isinstance(asset["purchase_date"], str):
-                        date_obj = datetime.strptime(asset["purchase_date"], "%Y-%m-%d")
-                        asset["purchase_date_display"] = date_obj.strftime("%B %d, %Y")
-                    else:
-                        asset["purchase_date_display"] = asset["purchase_date"].strftime("%B %d, %Y")
-                except:
-                    asset["purchase_date_display"] = "Not specified"
-            else:
-                asset["purchase_date_display"] = "Not specified"
-            # Format purchase cost
-            if asset.get("purchase_cost"):
-                try:
-                    cost = float(asset["purchase_cost"])
-                    asset["purchase_cost_display"] = f"Rp {cost:,.0f}"
-                except:
-                    asset["purchase_cost_display"] = "Not specified"
-            else:
-                asset["purchase_cost_display"] = "Not specified"
-
-        context = {
-            "request": request,
-            "user": current_profile,
-            "total_assets": total_assets,
-            "ga_count": ga_count,
-            "it_count": it_count,
-            "owner_type_filter": owner_type,
-            "total_purchase_value": total_purchase_value,
-            "total_book_value": total_book_value,
-            "total_depreciation_value": total_depreciation_value,
-            "disposed_count": disposed_count,
-            "lost_count": lost_count,
-            "damaged_count": damaged_count,
-            "relocated_count": relocated_count,
-            "repaired_count": repaired_count,
-            "category_counts": category_counts,
-            "location_counts": location_counts_dict,
-            "monthly_chart_labels": monthly_chart_labels,
-            "monthly_chart_values": monthly_chart_values,
-            "quarterly_chart_labels": quarterly_chart_labels,
-            "quarterly_chart_values": quarterly_chart_values,
-            "yearly_chart_labels": yearly_chart_labels,
-            "yearly_chart_values": yearly_chart_values,
-            "age_distribution": age_distribution_list,
-            "damaged_assets": damaged_assets,
-            "lost_assets": lost_assets_list,
-            "high_value_assets": high_value_assets,
-            "activity_data": chart_data.get("activity_data", {})
-        }
-
-        template_path = get_template(request, "dashboard.html")
-        return templates.TemplateResponse(template_path, context)
-
-    except Exception as e:
-        logging.error("Dashboard error: %s", e, exc_info=True)
-        template_path = get_template(request, "dashboard.html")
-        return templates.TemplateResponse(template_path, {
-            "request": request,
-            "user": current_profile,
-            "total_assets": 0,
-            "total_purchase_value": 0,
-            "total_book_value": 0,
-            "total_depreciation_value": 0,
-            "disposed_count": 0,
-            "lost_count": 0,
-            "damaged_count": 0,
-            "relocated_count": 0,
-            "repaired_count": 0,
-            "category_counts": {},
-            "location_counts": {},
-            "monthly_chart_labels": [],
-            "monthly_chart_values": [],
-            "quarterly_chart_labels": [],
-            "quarterly_chart_values": [],
-            "yearly_chart_labels": [],
-            "yearly_chart_values": [],
-            "age_distribution": [],
-            "damaged_assets": [],
-            "lost_assets": [],
-            "high_value_assets": [],
-            "activity_data": {},
-            "error": "Error loading dashboard data"
-        })
\ No newline at end of file
+    """Dashboard shell; widgets are fetched by HTMX from /dashboard/widgets/{widget}."""
+    template_path = get_template(request, "dashboard.html")
+    return templates.TemplateResponse(template_path, {
+        "request": request,
+        "user": current_profile,
+        "owner_type_filter": owner_type if owner_type in OWNER_TYPES else None
+    })
+
+@router.get("/dashboard/widgets/{widget}", response_class=HTMLResponse)
+async def dashboard_widget(widget: str, request: Request, current_profile = Depends(get_current_profile), owner_type: str = None):
+    """Render one dashboard widget, served from the fragment cache until the data version changes."""
+    build_context = DASHBOARD_WIDGETS.get(widget)
+    if not build_context:
+        raise HTTPException(status_code=404, detail="Widget not found")
+
+    owner_type = owner_type if owner_type in OWNER_TYPES else None
+    cache_key = (
+        "dashboard_widget",
+        widget,
+        DeviceDetector.get_device_type(request),
+        owner_type,
+        current_profile.role.value,
+        get_data_version()
+    )
+
+    html = fragment_cache.get(cache_key)
+    if html is None:
+        try:
+            context = build_context(owner_type)
+        except Exception as e:
+            logging.error(f"Dashboard widget {widget} error: {e}", exc_info=True)
+            # Not cached, so the next load retries
+            return HTMLResponse('<p class="text-red-500 text-sm p-4">Error loading dashboard data</p>')
+
+        template = templates.get_template(get_template(request, f"dashboard/widgets/{widget}.html"))
+        html = template.render(
+            request=request,
+            user=current_profile,
+            owner_type_filter=owner_type,
+            **context
+        )
+        fragment_cache.set(cache_key, html)
+
+    return HTMLResponse(html)
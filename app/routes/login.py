@@ -1,18 +1,16 @@
 from fastapi import APIRouter, Request, Form, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from app.config import load_config
 from app.utils.auth import decode_supabase_jwt
 from app.utils.device_detector import get_template
-from supabase import create_client, Client
+from app.utils.templating import templates
+from app.utils import auth_gateway
 import logging
 from urllib.parse import urlparse
 
 config = load_config()
-supabase: Client = create_client(config.SUPABASE_URL, config.SUPABASE_ANON_KEY)
 
 router = APIRouter(tags=["authentication"])
-templates = Jinja2Templates(directory="app/templates")
 
 
 def get_cookie_settings() -> dict:
@@ -32,8 +30,8 @@ def set_auth_cookies(response, session, remember_me: bool = False):
     access_max_age = 60 * 60 * 24 * 7 if remember_me else 3600
     refresh_max_age = 60 * 60 * 24 * 30
 
-    response.set_cookie("sb_access_token", session.access_token, max_age=access_max_age, **settings)
-    response.set_cookie("sb_refresh_token", session.refresh_token, max_age=refresh_max_age, **settings)
+    response.set_cookie("sb_access_token", session["access_token"], max_age=access_max_age, **settings)
+    response.set_cookie("sb_refresh_token", session["refresh_token"], max_age=refresh_max_age, **settings)
 
 
 def clear_auth_cookies(response):
@@ -67,23 +65,16 @@ async def login_form(
     next: str = Form("/")
 ):
     try:
-        # Clear any existing session first
-        try:
-            supabase.auth.sign_out()
-        except:
-            pass
-        
-        # Sign in with fresh credentials
-        result = supabase.auth.sign_in_with_password({"email": email, "password": password})
-        session = result.session
+        # Stateless sign in - nothing is stored on a shared client
+        session = await auth_gateway.sign_in_with_password(email, password)
 
         # CRITICAL: Verify session has both tokens
-        if not session or not session.access_token or not session.refresh_token:
+        if not session or not session.get("access_token") or not session.get("refresh_token"):
             logging.error(f"Login returned incomplete session for {email}")
             raise Exception("Invalid session from login")
 
         # Decode token to verify
-        payload = decode_supabase_jwt(session.access_token)
+        payload = decode_supabase_jwt(session["access_token"])
         if not payload or not payload.get("sub"):
             raise Exception("Invalid JWT token received")
         
@@ -131,26 +122,25 @@ async def signup_form(
     business_unit_name: str = Form(None)
 ):
     try:
-        result = supabase.auth.sign_up({
-            "email": email,
-            "password": password,
-            "options": {"data": {"full_name": full_name, "business_unit_name": business_unit_name}}
-        })
+        result = await auth_gateway.sign_up(
+            email, password,
+            {"full_name": full_name, "business_unit_name": business_unit_name}
+        )
 
-        if not result.user:
+        if not result["user"]:
             raise Exception("Signup failed")
         
         # If session was created (auto-confirm enabled), verify it has both tokens
-        if result.session:
-            if not result.session.access_token or not result.session.refresh_token:
+        if result["session"]:
+            if not result["session"].get("access_token") or not result["session"].get("refresh_token"):
                 logging.warning(f"Signup session incomplete for {email}")
                 # Don't set cookies if tokens are incomplete
-                result.session = None
+                result["session"] = None
         
         # Create profile with business unit data
         from app.utils.profile_utils import create_profile_if_not_exists
-        user_metadata = result.user.user_metadata or {}
-        create_profile_if_not_exists(result.user.id, email, user_metadata)
+        user_metadata = result["user"].get("user_metadata") or {}
+        create_profile_if_not_exists(result["user"]["id"], email, user_metadata)
 
         logging.info("User registered successfully")
         from app.utils.database_manager import get_dropdown_options
@@ -189,8 +179,10 @@ async def logout(request: Request):
         user_email = request.state.user.get("email", "unknown")
 
     try:
-        # Simply sign out without setting session (let Supabase handle it)
-        supabase.auth.sign_out()
+        # Revoke only this user's session using their own access token
+        access_token = request.cookies.get("sb_access_token")
+        if access_token:
+            await auth_gateway.sign_out(access_token)
         logging.info(f"User {user_email} logged out successfully")
     except Exception:
         # Ignore logout errors - user will be logged out via cookie clearing
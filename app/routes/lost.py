@@ -1,16 +1,16 @@
 # app/routes/lost.py
 from fastapi import APIRouter, Depends, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse
 from datetime import datetime
 import json
 
 from app.utils.auth import get_current_profile
 from app.utils.database_manager import get_all_assets, get_supabase, add_approval_request
 from app.utils.device_detector import get_template
+from app.utils.templating import templates, stream_template
+from app.utils.fast_json import FastJSONResponse
 
 router = APIRouter(prefix="/lost", tags=["lost"])
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/", response_class=HTMLResponse)
 async def lost_page(
@@ -38,7 +38,7 @@ async def lost_list_page(
     lost_assets = response.data or []
     
     template_path = get_template(request, "lost/index.html")
-    return templates.TemplateResponse(template_path, {
+    return stream_template(template_path, {
         "request": request,
         "current_profile": current_profile,
         "user": current_profile,
@@ -187,10 +187,10 @@ async def report_lost_asset(
     # Get asset data
     asset = get_asset_by_id(asset_id)
     if not asset:
-        return JSONResponse({"status": "error", "message": "Asset not found"})
+        return FastJSONResponse({"status": "error", "message": "Asset not found"})
     
     if asset.get('status') in ['Disposed', 'Lost']:
-        return JSONResponse({"status": "error", "message": "Asset is already disposed or lost"})
+        return FastJSONResponse({"status": "error", "message": "Asset is already disposed or lost"})
     
     try:
         # Create approval request
@@ -213,7 +213,7 @@ async def report_lost_asset(
         
         add_approval_request(approval_data)
         
-        return JSONResponse({"status": "success", "message": "Lost asset report submitted for approval"})
+        return FastJSONResponse({"status": "success", "message": "Lost asset report submitted for approval"})
         
     except Exception as e:
-        return JSONResponse({"status": "error", "message": f"Error reporting lost asset: {str(e)}"})
\ No newline at end of file
+        return FastJSONResponse({"status": "error", "message": f"Error reporting lost asset: {str(e)}"})
\ No newline at end of file
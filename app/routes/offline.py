@@ -1,11 +1,48 @@
 # app/routes/offline.py
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+import hashlib
+import logging
+from fastapi import APIRouter, Request, Depends
+from fastapi.responses import HTMLResponse, Response
+from app.utils.auth import get_current_profile
+from app.utils.cache import cache
+from app.utils.database_manager import CACHE_TTL, get_all_assets, get_data_version
 from app.utils.device_detector import get_template
+from app.utils.fast_json import dumps
+from app.utils.templating import templates
+from app.utils.static_assets import render_service_worker, REVALIDATE_CACHE_CONTROL
 
 router = APIRouter(tags=["offline"])
-templates = Jinja2Templates(directory="app/templates")
+
+# Columns of the offline asset snapshot; rows are sent as plain arrays
+SNAPSHOT_FIELDS = [
+    "asset_id", "asset_tag", "asset_name", "status", "owner_type",
+    "category_name", "location_name", "room_name", "assigned_user_name"
+]
+
+def _snapshot_row(asset):
+    category = asset.get("ref_categories") or {}
+    location = asset.get("ref_locations") or {}
+    return [
+        asset.get("asset_id"),
+        asset.get("asset_tag"),
+        asset.get("asset_name"),
+        asset.get("status"),
+        asset.get("owner_type"),
+        category.get("category_name"),
+        location.get("location_name"),
+        location.get("room_name") or asset.get("room_name"),
+        asset.get("assigned_user_name")
+    ]
+
+def build_asset_snapshot() -> bytes:
+    """Compact JSON asset list for the service worker's offline mode.
+
+    The version is a hash of the rows, so it is stable across restarts and
+    only changes when the data does.
+    """
+    rows = [_snapshot_row(asset) for asset in get_all_assets()]
+    version = hashlib.sha256(dumps(rows)).hexdigest()[:12]
+    return dumps({"version": version, "fields": SNAPSHOT_FIELDS, "rows": rows})
 
 @router.get("/offline", response_class=HTMLResponse)
 async def offline_page(request: Request):
@@ -16,4 +53,23 @@ async def offline_page(request: Request):
         {
             "request": request
         }
-    )
\ No newline at end of file
+    )
+
+@router.get("/service-worker.js")
+async def service_worker():
+    """Service worker with the fingerprinted precache manifest, served at root scope."""
+    return Response(
+        render_service_worker(),
+        media_type="application/javascript",
+        headers={"Cache-Control": REVALIDATE_CACHE_CONTROL}
+    )
+
+@router.get("/offline/snapshot")
+async def offline_snapshot(current_profile = Depends(get_current_profile)):
+    """Versioned asset snapshot the service worker keeps for offline use."""
+    try:
+        body = cache.get_or_set(f"offline_snapshot_{get_data_version()}", build_asset_snapshot, CACHE_TTL["assets"])
+    except Exception as e:
+        logging.error(f"Error building offline snapshot: {e}")
+        return Response(status_code=503)
+    return Response(body, media_type="application/json", headers={"Cache-Control": "private, no-cache"})
@@ -1,17 +1,16 @@
 # app/routes/profile.py
 from fastapi import APIRouter, Depends, Request, Form, UploadFile, File, HTTPException, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from datetime import datetime, timezone
 
 from app.utils.auth import get_current_profile
-from app.utils.photo import resize_and_convert_image, upload_to_drive
+from app.utils.photo import photo_upload_queue
 from app.utils.flash import set_flash
-from app.utils.database_manager import get_dropdown_options
+from app.utils.database_manager import get_dropdown_options, bump_data_version
 from app.utils.device_detector import get_template
+from app.utils.templating import templates
 
 router = APIRouter(tags=["profile"])
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/profile", response_class=HTMLResponse)
 async def profile_page(
@@ -56,11 +55,9 @@ async def update_profile(
 ):
     """Update user profile."""
     # Update profile via Supabase
-    from supabase import create_client
-    from app.config import load_config
-    
-    config = load_config()
-    admin_supabase = create_client(config.SUPABASE_URL, config.SUPABASE_SERVICE_KEY)
+    from app.utils.supabase_client import get_client
+
+    admin_supabase = get_client("service")
     
     # Get business_unit_id from name
     business_unit_id = None
@@ -86,41 +83,18 @@ async def update_profile(
     
     admin_supabase.table("profiles").update(update_data).eq("id", current_profile.id).execute()
     
-    # Handle photo upload if provided
+    # The photo goes to Drive in the background; photo_url is set when it is done
     if photo and photo.filename:
-        try:
-            # Process image
-            contents = await photo.read()
-            import io
-            image_file = io.BytesIO(contents)
-            processed_image = resize_and_convert_image(image_file)
-            
-            if processed_image:
-                # Upload to Google Drive
-                photo_url = upload_to_drive(
-                    processed_image, 
-                    photo.filename, 
-                    f"profile_{current_profile.email}"
-                )
-                if photo_url:
-                    update_data["photo_url"] = photo_url
-        except Exception as e:
-            template_path = get_template(request, "profile/edit.html")
-            return templates.TemplateResponse(
-                template_path,
-                {
-                    "request": request,
-                    "user": current_profile,
-                    "error": f"Error uploading photo: {str(e)}"
-                },
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    
-    # Update photo if processed
-    if photo and photo.filename and "photo_url" in update_data:
-        admin_supabase.table("profiles").update({"photo_url": update_data["photo_url"]}).eq("id", current_profile.id).execute()
+        contents = await photo.read()
+        await photo_upload_queue.enqueue(contents, photo.filename, f"profile_{current_profile.email}", ("profile", current_profile.id))
     
+    # Pages show the user's name, role and photo
+    bump_data_version()
+
     # Redirect to profile page
     response = RedirectResponse(url="/profile", status_code=status.HTTP_303_SEE_OTHER)
-    set_flash(response, "Profile updated successfully", "success")
+    message = "Profile updated successfully"
+    if photo and photo.filename:
+        message += ", the new photo will appear shortly"
+    set_flash(response, message, "success")
     return response
\ No newline at end of file
@@ -1,16 +1,15 @@
 # app/routes/relocation.py
 from fastapi import APIRouter, Depends, Request, Form, HTTPException, status, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from datetime import datetime
 import json
 
 from app.utils.auth import get_current_profile
 from app.utils.database_manager import get_all_assets, get_dropdown_options, add_approval_request, get_asset_by_id
 from app.utils.device_detector import get_template
+from app.utils.templating import templates
 
 router = APIRouter(prefix="/relocation", tags=["relocation"])
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("", response_class=HTMLResponse)
 @router.get("/", response_class=HTMLResponse)
@@ -1,15 +1,14 @@
 from fastapi import APIRouter, Request, Depends, Form, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
-from app.utils.database_manager import get_supabase
+from app.utils.database_manager import get_supabase, add_approval_request
 from app.utils.device_detector import get_template
+from app.utils.templating import templates
 from app.utils.auth import get_current_profile
 from app.utils.flash import set_flash
-from starlette.templating import Jinja2Templates
 import logging
 import json
 
 logger = logging.getLogger(__name__)
-templates = Jinja2Templates(directory="app/templates")
 
 router = APIRouter()
 
@@ -124,7 +123,8 @@ async def submit_repair(
         # Role-based approval will be handled in approvals page filtering
         
         # Insert approval request
-        supabase.table('approvals').insert(approval_data).execute()
+        if not add_approval_request(approval_data):
+            return RedirectResponse(url="/repair/error", status_code=302)
         
         return RedirectResponse(url="/repair/success", status_code=302)
         
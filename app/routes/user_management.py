@@ -1,22 +1,21 @@
 # app/routes/user_management.py
 from fastapi import APIRouter, Depends, Request, Form, HTTPException, status
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
-from supabase import create_client
+from fastapi.responses import HTMLResponse, RedirectResponse
 from app.config import load_config
  
 from app.utils.auth import get_current_profile, get_admin_user, UserRole
 from app.utils.flash import set_flash
-from app.utils.database_manager import get_dropdown_options
+from app.utils.database_manager import get_dropdown_options, bump_data_version
 from app.utils.device_detector import get_template
+from app.utils.templating import templates, stream_template
+from app.utils.fast_json import FastJSONResponse
+from app.utils.supabase_client import get_client
 import logging
 import os
 
 router = APIRouter(prefix="/user_management", tags=["user_management"])
-templates = Jinja2Templates(directory="app/templates")
 
 config = load_config()
-supabase = create_client(config.SUPABASE_URL, config.SUPABASE_SERVICE_KEY)
 
 @router.get("/", response_class=HTMLResponse)
 async def user_list(
@@ -25,6 +24,7 @@ async def user_list(
 ):
     """List all users (admin only)."""
     try:
+        supabase = get_client("service")
         response = supabase.table("profiles").select("""
             id, username, full_name, role, is_active, created_at, updated_at,
             photo_url, business_unit_id, last_login_at, email_verified, business_unit_name,
@@ -41,7 +41,7 @@ async def user_list(
         dropdown_options = get_dropdown_options()
         
         template_path = get_template(request, "user_management/list.html")
-        return templates.TemplateResponse(
+        return stream_template(
             template_path,
             {
                 "request": request,
@@ -53,7 +53,7 @@ async def user_list(
     except Exception as e:
         logging.error(f"Failed to get users: {e}")
         template_path = get_template(request, "user_management/list.html")
-        return templates.TemplateResponse(
+        return stream_template(
             template_path,
             {
                 "request": request,
@@ -92,6 +92,7 @@ async def create_user(
 ):
     """Create new user (admin only)."""
     try:
+        supabase = get_client("service")
         logging.info(f"Creating user - Email: {email}, Full Name: {full_name}, Role: {role}, Business Unit: {business_unit_name}")
         # Check if user exists
         existing = supabase.table("profiles").select("username").eq("username", email).execute()
@@ -140,6 +141,7 @@ async def create_user(
                 }
                 logging.info(f"Profile data to insert: {profile_data}")
                 supabase.table("profiles").insert(profile_data).execute()
+                bump_data_version()
             
             # Log user creation
             supabase.table("user_management_logs").insert({
@@ -177,10 +179,11 @@ async def reset_password(
 ):
     """Reset user password to default (admin only)."""
     try:
+        supabase = get_client("service")
         # Get user from profiles
         user_response = supabase.table("profiles").select("username, full_name").eq("id", user_id).execute()
         if not user_response.data:
-            return JSONResponse({"success": False, "message": "User not found"}, status_code=404)
+            return FastJSONResponse({"success": False, "message": "User not found"}, status_code=404)
         
         user_data = user_response.data[0]
         user_email = user_data["username"]
@@ -198,11 +201,11 @@ async def reset_password(
             "details": f"Reset password for {user_name} ({user_email}) to default"
         }).execute()
         
-        return JSONResponse({"success": True, "message": f"Password reset to 654321 for {user_name}"})
+        return FastJSONResponse({"success": True, "message": f"Password reset to 654321 for {user_name}"})
         
     except Exception as e:
         logging.error(f"Failed to reset password: {e}")
-        return JSONResponse({"success": False, "message": "Failed to reset password"}, status_code=500)
+        return FastJSONResponse({"success": False, "message": "Failed to reset password"}, status_code=500)
 
 @router.post("/toggle_status/{user_id}")
 async def toggle_user_status(
@@ -213,10 +216,12 @@ async def toggle_user_status(
 ):
     """Toggle user active status (admin only)."""
     try:
+        supabase = get_client("service")
         # Update profile status
         response = supabase.table("profiles").update({
             "is_active": is_active
         }).eq("id", user_id).execute()
+        bump_data_version()
         
         if response.data:
             status_text = "activated" if is_active else "deactivated"
@@ -248,6 +253,7 @@ async def change_user_role(
 ):
     """Change user role (admin only)."""
     try:
+        supabase = get_client("service")
         # Get user info
         user_response = supabase.table("profiles").select("username, full_name").eq("id", user_id).execute()
         if not user_response.data:
@@ -258,6 +264,7 @@ async def change_user_role(
         
         # Update role
         supabase.table("profiles").update({"role": new_role}).eq("id", user_id).execute()
+        bump_data_version()
         
         # Log role change
         supabase.table("user_management_logs").insert({
@@ -286,6 +293,7 @@ async def change_user_department(
 ):
     """Change user business unit (admin only)."""
     try:
+        supabase = get_client("service")
         # Get user info
         user_response = supabase.table("profiles").select("username, full_name").eq("id", user_id).execute()
         if not user_response.data:
@@ -306,6 +314,7 @@ async def change_user_department(
             "business_unit_id": business_unit_id,
             "business_unit_name": business_unit_name if business_unit_name else None
         }).eq("id", user_id).execute()
+        bump_data_version()
         
         # Log business unit change
         supabase.table("user_management_logs").insert({
@@ -333,6 +342,7 @@ async def verify_user_email(
 ):
     """Manually verify user email (admin only)."""
     try:
+        supabase = get_client("service")
         # Get user info
         user_response = supabase.table("profiles").select("username, full_name").eq("id", user_id).execute()
         if not user_response.data:
@@ -343,6 +353,7 @@ async def verify_user_email(
         
         # Update email verification status
         supabase.table("profiles").update({"email_verified": True}).eq("id", user_id).execute()
+        bump_data_version()
         
         # Log email verification
         supabase.table("user_management_logs").insert({
@@ -1,18 +1,35 @@
-const CACHE_NAME = 'ambp-v2.0';
-const STATIC_CACHE = 'ambp-static-v2.0';
-const DYNAMIC_CACHE = 'ambp-dynamic-v2.0';
+// Precache manifest: replaced with the fingerprinted asset list when served
+// from /service-worker.js (see app/utils/static_assets.py)
+const PRECACHE = {"version": "dev", "assets": []};
+
+const STATIC_CACHE = `ambp-static-${PRECACHE.version}`;
+const PAGE_CACHE = 'ambp-pages-v1';
+const SNAPSHOT_CACHE = 'ambp-snapshot-v1';
+const KEEP_CACHES = [STATIC_CACHE, PAGE_CACHE, SNAPSHOT_CACHE];
+
+const SNAPSHOT_URL = '/offline/snapshot';
+const OFFLINE_URL = '/offline';
+const PAGE_CACHE_MAX_ENTRIES = 60;
+
+// Submissions that can be queued while offline and replayed later
+const QUEUEABLE_POSTS = [
+  /^\/damage\/report\/[^/]+$/,
+  /^\/relocation\/relocate\/[^/]+$/,
+  /^\/lost\/submit$/,
+  /^\/lost\/report\/[^/]+$/
+];
+// Never served from the page cache: auth flows, downloads, live counters and the event stream
+const UNCACHED_PAGES = [/^\/login/, /^\/logout/, /^\/auth\//, /^\/forgot-password/, /^\/export/, /^\/approvals\/pending-count$/, /^\/events$/];
+
+const SYNC_TAG = 'ambp-outbox';
+const DB_NAME = 'ambp-offline';
+const OUTBOX_STORE = 'outbox';
 
 const STATIC_ASSETS = [
-  '/',
+  OFFLINE_URL,
   '/static/manifest.json',
-  '/static/img/logo.png',
-  '/static/img/favicon-32x32.png',
-  '/static/img/android-chrome-192x192.png',
-  '/static/img/android-chrome-512x512.png',
-  'https://cdn.tailwindcss.com',
-  'https://unpkg.com/alpinejs@3.x.x/dist/cdn.min.js',
-  'https://unpkg.com/htmx.org@1.9.2',
-  'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css'
+  // Fingerprinted app files plus vendored Tailwind, Alpine, HTMX and Font Awesome
+  ...PRECACHE.assets
 ];
 
 self.addEventListener('install', (event) => {
@@ -28,44 +45,305 @@ self.addEventListener('activate', (event) => {
     caches.keys().then((cacheNames) => {
       return Promise.all(
         cacheNames.map((cacheName) => {
-          if (cacheName !== STATIC_CACHE && cacheName !== DYNAMIC_CACHE) {
+          if (!KEEP_CACHES.includes(cacheName)) {
             return caches.delete(cacheName);
           }
         })
       );
-    }).then(() => self.clients.claim())
+    })
+      .then(() => self.clients.claim())
+      .then(() => Promise.all([refreshSnapshot(), replayOutbox().catch(() => {})]))
   );
 });
 
+// ---------------------------------------------------------------------------
+// IndexedDB outbox
+// ---------------------------------------------------------------------------
+
+function openDb() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(DB_NAME, 1);
+    request.onupgradeneeded = () => {
+      request.result.createObjectStore(OUTBOX_STORE, { keyPath: 'id', autoIncrement: true });
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function withStore(mode, callback) {
+  return openDb().then((db) => new Promise((resolve, reject) => {
+    const tx = db.transaction(OUTBOX_STORE, mode);
+    const request = callback(tx.objectStore(OUTBOX_STORE));
+    tx.oncomplete = () => { db.close(); resolve(request.result); };
+    tx.onerror = () => { db.close(); reject(tx.error); };
+  }));
+}
+
+const outbox = {
+  add: (entry) => withStore('readwrite', (store) => store.add(entry)),
+  all: () => withStore('readonly', (store) => store.getAll()),
+  remove: (id) => withStore('readwrite', (store) => store.delete(id))
+};
+
+async function notifyClients(message) {
+  const clients = await self.clients.matchAll({ includeUncontrolled: true });
+  clients.forEach((client) => client.postMessage(message));
+}
+
+async function queueRequest(request) {
+  const contentType = request.headers.get('content-type') || '';
+  // Only text bodies can be stored and replayed; file uploads need a connection
+  if (contentType.startsWith('multipart/form-data')) {
+    const form = await request.formData();
+    for (const value of form.values()) {
+      if (typeof value !== 'string') {
+        return null;
+      }
+    }
+    const body = new URLSearchParams(form).toString();
+    return outbox.add({
+      url: request.url, method: request.method, body,
+      contentType: 'application/x-www-form-urlencoded', queuedAt: Date.now()
+    });
+  }
+  return outbox.add({
+    url: request.url, method: request.method, body: await request.text(),
+    contentType, queuedAt: Date.now()
+  });
+}
+
+let replaying = null;
+
+function replayOutbox() {
+  // One replay at a time; 'sync', 'online' messages and activation may overlap
+  if (!replaying) {
+    replaying = doReplay().finally(() => { replaying = null; });
+  }
+  return replaying;
+}
+
+async function doReplay() {
+  let entries;
+  try {
+    entries = await outbox.all();
+  } catch (error) {
+    return;
+  }
+  let sent = 0;
+  for (const entry of entries) {
+    // A network error (still offline) rejects here and keeps this and the
+    // later entries, in order, for the next sync
+    const response = await fetch(entry.url, {
+      method: entry.method,
+      body: entry.body,
+      headers: { 'Content-Type': entry.contentType },
+      credentials: 'same-origin'
+    });
+    // Session expired: wait until the user signs in again
+    if (response.redirected && new URL(response.url).pathname.startsWith('/login')) {
+      await notifyClients({ type: 'outbox-auth-required', pending: entries.length - sent });
+      return;
+    }
+    // Server errors are retried; anything else (success or a validation error) is final
+    if (response.status >= 500) {
+      throw new Error(`Replay of ${entry.url} failed with ${response.status}`);
+    }
+    await outbox.remove(entry.id);
+    sent += 1;
+  }
+  if (sent) {
+    await caches.delete(PAGE_CACHE);
+    await notifyClients({ type: 'outbox-synced', count: sent });
+    await refreshSnapshot();
+  }
+}
+
+self.addEventListener('sync', (event) => {
+  if (event.tag === SYNC_TAG) {
+    event.waitUntil(replayOutbox());
+  }
+});
+
+function queuedResponse(request) {
+  if (request.mode === 'navigate') {
+    return Response.redirect(`${OFFLINE_URL}?queued=1`, 303);
+  }
+  return new Response(
+    JSON.stringify({ status: 'queued', message: 'Saved offline, will be sent when back online' }),
+    { status: 202, headers: { 'Content-Type': 'application/json' } }
+  );
+}
+
+async function handleQueueablePost(event) {
+  const copy = event.request.clone();
+  try {
+    return await fetch(event.request);
+  } catch (error) {
+    const id = await queueRequest(copy);
+    if (id === null) {
+      throw error;
+    }
+    if (self.registration.sync) {
+      await self.registration.sync.register(SYNC_TAG).catch(() => {});
+    }
+    await notifyClients({ type: 'outbox-queued' });
+    return queuedResponse(event.request);
+  }
+}
+
+// ---------------------------------------------------------------------------
+// Asset snapshot
+// ---------------------------------------------------------------------------
+
+async function refreshSnapshot() {
+  try {
+    const cache = await caches.open(SNAPSHOT_CACHE);
+    const cached = await cache.match(SNAPSHOT_URL);
+    const headers = {};
+    if (cached && cached.headers.get('etag')) {
+      headers['If-None-Match'] = cached.headers.get('etag');
+    }
+    const response = await fetch(SNAPSHOT_URL, { headers, credentials: 'same-origin', cache: 'no-store' });
+    if (response.status === 200 && !response.redirected) {
+      await cache.put(SNAPSHOT_URL, response.clone());
+      const { version } = await response.json();
+      await notifyClients({ type: 'snapshot-updated', version });
+    }
+  } catch (error) {
+    // Offline: keep the previous snapshot
+  }
+}
+
+async function handleSnapshot(event) {
+  try {
+    const response = await fetch(event.request);
+    if (response.status === 200 && !response.redirected) {
+      const cache = await caches.open(SNAPSHOT_CACHE);
+      await cache.put(SNAPSHOT_URL, response.clone());
+    }
+    return response;
+  } catch (error) {
+    const cached = await caches.match(SNAPSHOT_URL);
+    return cached || new Response('{"version": null, "fields": [], "rows": []}', {
+      status: 503, headers: { 'Content-Type': 'application/json' }
+    });
+  }
+}
+
+// ---------------------------------------------------------------------------
+// Pages: stale-while-revalidate
+// ---------------------------------------------------------------------------
+
+async function trimPageCache(cache) {
+  const keys = await cache.keys();
+  for (let i = 0; i < keys.length - PAGE_CACHE_MAX_ENTRIES; i++) {
+    await cache.delete(keys[i]);
+  }
+}
+
+async function handlePage(event) {
+  const cache = await caches.open(PAGE_CACHE);
+  const cached = await cache.match(event.request);
+
+  const network = fetch(event.request).then(async (response) => {
+    // Only cache real pages, not login redirects or errors
+    if (response.status === 200 && !response.redirected) {
+      await cache.put(event.request, response.clone());
+      await trimPageCache(cache);
+    }
+    return response;
+  });
+
+  if (cached) {
+    event.waitUntil(network.catch(() => {}));
+    return cached;
+  }
+
+  try {
+    return await network;
+  } catch (error) {
+    if (event.request.mode === 'navigate') {
+      return (await caches.match(OFFLINE_URL, { ignoreSearch: true })) || Response.error();
+    }
+    return Response.error();
+  }
+}
+
+// ---------------------------------------------------------------------------
+// Routing
+// ---------------------------------------------------------------------------
+
 self.addEventListener('fetch', (event) => {
-  if (event.request.method !== 'GET') return;
-  
+  const url = new URL(event.request.url);
+  const sameOrigin = url.origin === self.location.origin;
+
+  if (event.request.method !== 'GET') {
+    if (!sameOrigin) return;
+    // Any write may change what the cached pages show
+    event.waitUntil(caches.delete(PAGE_CACHE));
+    if (event.request.method === 'POST' && QUEUEABLE_POSTS.some((pattern) => pattern.test(url.pathname))) {
+      event.respondWith(handleQueueablePost(event));
+    }
+    return;
+  }
+
+  // Signing out drops the user's cached pages and asset snapshot
+  if (sameOrigin && url.pathname.startsWith('/logout')) {
+    event.waitUntil(Promise.all([caches.delete(PAGE_CACHE), caches.delete(SNAPSHOT_CACHE)]));
+    return;
+  }
+
+  if (sameOrigin && url.pathname === SNAPSHOT_URL) {
+    event.respondWith(handleSnapshot(event));
+    return;
+  }
+
+  if (sameOrigin && url.pathname === OFFLINE_URL) {
+    event.respondWith(
+      fetch(event.request).catch(() => caches.match(OFFLINE_URL, { ignoreSearch: true }))
+    );
+    return;
+  }
+
+  // App pages and HTMX fragments: cached copy now, refreshed in the background
+  if (sameOrigin && !url.pathname.startsWith('/static/')) {
+    if (UNCACHED_PAGES.some((pattern) => pattern.test(url.pathname))) return;
+    event.respondWith(handlePage(event));
+    return;
+  }
+
+  // Static assets (fingerprinted, immutable): cache first
   event.respondWith(
     caches.match(event.request)
       .then((response) => {
         if (response) {
           return response;
         }
-        
+
         return fetch(event.request)
           .then((fetchResponse) => {
             if (!fetchResponse || fetchResponse.status !== 200 || fetchResponse.type !== 'basic') {
               return fetchResponse;
             }
-            
+
             const responseToCache = fetchResponse.clone();
-            caches.open(DYNAMIC_CACHE)
+            caches.open(STATIC_CACHE)
               .then((cache) => {
                 cache.put(event.request, responseToCache);
               });
-            
+
             return fetchResponse;
-          })
-          .catch(() => {
-            if (event.request.destination === 'document') {
-              return caches.match('/');
-            }
           });
       })
   );
-});
\ No newline at end of file
+});
+
+self.addEventListener('message', (event) => {
+  const type = event.data && event.data.type;
+  if (type === 'replay-outbox') {
+    event.waitUntil(replayOutbox().catch(() => {}));
+  } else if (type === 'refresh-snapshot') {
+    event.waitUntil(refreshSnapshot());
+  }
+});
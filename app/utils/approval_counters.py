@@ -0,0 +1,121 @@
+"""
+Pending approval counters
+An in-process index of pending approvals keyed by approval id, with
+running counts per submitter role and per submitter. The navbar badge
+reads it instead of loading the approvals page. add_approval_request and
+the approval engine keep it current; it is reloaded from the database
+every RESYNC_INTERVAL seconds to pick up changes made by other workers.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.utils.approval_queries import can_approve
+from app.utils.cache import cache
+from app.utils.database_manager import get_supabase
+
+RESYNC_INTERVAL = 120
+
+def _get_profile_role(profile_id: str) -> Optional[str]:
+    try:
+        response = get_supabase().table("profiles").select("role").eq("id", profile_id).execute()
+        return response.data[0].get("role") if response.data else None
+    except Exception as e:
+        logging.error(f"Error getting role for profile {profile_id}: {str(e)}")
+        return None
+
+class PendingCounters:
+    """Thread-safe pending counts per submitter role and per submitter."""
+
+    def __init__(self, resync_interval: int = RESYNC_INTERVAL):
+        self._pending: Dict[int, Tuple[str, str]] = {}
+        self._by_role: Counter = Counter()
+        self._by_submitter: Counter = Counter()
+        self._resync_interval = resync_interval
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _add(self, approval_id: int, submitter_id: str, submitter_role: str):
+        if approval_id in self._pending:
+            return
+        self._pending[approval_id] = (submitter_id, submitter_role)
+        self._by_role[submitter_role] += 1
+        self._by_submitter[submitter_id] += 1
+
+    def _remove(self, approval_id: int) -> Optional[Tuple[str, str]]:
+        entry = self._pending.pop(approval_id, None)
+        if entry is None:
+            return None
+        submitter_id, submitter_role = entry
+        self._by_role[submitter_role] -= 1
+        self._by_submitter[submitter_id] -= 1
+        return entry
+
+    def reload(self):
+        """Rebuild the index from the pending approvals in the database."""
+        try:
+            response = get_supabase().table("approvals").select(
+                "approval_id, submitted_by, submitted_profile:profiles!approvals_submitted_by_fkey(role)"
+            ).eq("status", "pending").execute()
+            rows = response.data or []
+        except Exception as e:
+            logging.error(f"Error loading pending approvals: {str(e)}")
+            return
+
+        with self._lock:
+            self._pending.clear()
+            self._by_role.clear()
+            self._by_submitter.clear()
+            for row in rows:
+                role = (row.get("submitted_profile") or {}).get("role") or "staff"
+                self._add(row["approval_id"], row.get("submitted_by"), role)
+            self._loaded_at = time.time()
+
+    def refresh_if_stale(self):
+        if time.time() - self._loaded_at > self._resync_interval:
+            self.reload()
+
+    def record_submitted(self, approval: Dict[str, Any]) -> Optional[str]:
+        """Count a newly inserted approval row; returns the submitter's role."""
+        approval_id = approval.get("approval_id")
+        submitter_id = approval.get("submitted_by")
+        if approval_id is None or not submitter_id:
+            # Not enough to index it; pick it up on the next read
+            self._loaded_at = 0.0
+            return None
+        role = cache.get_or_set(f"profile_role_{submitter_id}", lambda: _get_profile_role(submitter_id), 300) or "staff"
+        with self._lock:
+            self._add(int(approval_id), submitter_id, role)
+        return role
+
+    def record_resolved(self, approval_ids: Iterable[Any]) -> Dict[int, Tuple[str, str]]:
+        """Drop approvals that were approved or rejected; returns their (submitter, role)."""
+        resolved = {}
+        with self._lock:
+            for approval_id in approval_ids:
+                entry = self._remove(int(approval_id))
+                if entry:
+                    resolved[int(approval_id)] = entry
+        return resolved
+
+    def for_approver(self, role: str) -> int:
+        """Pending requests this role is allowed to approve."""
+        self.refresh_if_stale()
+        with self._lock:
+            return sum(count for submitter_role, count in self._by_role.items()
+                       if can_approve(role, submitter_role))
+
+    def for_submitter(self, profile_id: str) -> int:
+        """Pending requests submitted by one profile."""
+        self.refresh_if_stale()
+        with self._lock:
+            return self._by_submitter.get(profile_id, 0)
+
+    def total(self) -> int:
+        self.refresh_if_stale()
+        with self._lock:
+            return len(self._pending)
+
+pending_counters = PendingCounters()
@@ -0,0 +1,554 @@
+"""
+Approval transactions
+Approving any request is one call to the approve_request RPC
+(supabase/migrations/20261019000000_approve_request.sql), which locks the
+approval, writes the *_log row, updates the asset and marks the approval
+approved in a single transaction. New-asset approvals still need
+prepare_asset_data() in the app and then approve_and_create_asset
+(..._approve_and_create_asset.sql), which also links the asset; a
+grouped bulk import approval (notes {"assets": [...]}) is prepared by
+bulk_create and applied by approve_and_create_assets
+(..._bulk_create_assets.sql).
+apply_batch() sends a whole selection through approve_requests /
+reject_requests (..._batch_approvals.sql) in one call.
+Photos of add/edit requests are uploaded in the background and kept in
+approval_photos (..._approval_photos.sql) until the request is resolved;
+see attach_photo().
+
+InMemoryApprovalBackend applies the same rules to plain dict tables, for
+local runs without Supabase (APPROVAL_BACKEND=memory) and for tests.
+"""
+import copy
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.approval_counters import pending_counters
+from app.utils.event_bus import event_bus
+
+WAREHOUSE_LOCATION_ID = 26
+WAREHOUSE_LOCATION = ("HO - Ciputat", "1022 - Gudang Support TOG")
+ADD_ASSET_TYPES = ("add_asset", "admin_add_asset")
+PHOTO_TYPES = ADD_ASSET_TYPES + ("edit_asset",)
+APPROVAL_TYPES = ADD_ASSET_TYPES + (
+    "damage_report", "lost_report", "repair", "relocation", "disposal_request", "edit_asset"
+)
+BATCH_ACTIONS = ("approved", "rejected")
+MAX_BATCH_SIZE = 200
+
+def _result(status: str, message: str, approval: Optional[Dict[str, Any]] = None, **extra) -> Dict[str, Any]:
+    result = {"status": status, "message": message}
+    if approval is not None:
+        result["type"] = approval.get("type")
+        result["asset_id"] = approval.get("asset_id")
+    result.update(extra)
+    return result
+
+class SupabaseApprovalBackend:
+    """approve_request / reject_request RPCs: one round trip each."""
+
+    def approve(self, approval_id: int, approver_id: str, approver_name: str) -> Dict[str, Any]:
+        from app.utils.database_manager import get_supabase
+        response = get_supabase().rpc("approve_request", {
+            "approval_id_in": int(approval_id),
+            "approver_id_in": str(approver_id),
+            "approver_name_in": approver_name
+        }).execute()
+        return response.data or _result("error", "No data returned from approve_request")
+
+    def approve_new_asset(self, approval_id: int, approver_id: str, asset_data: Dict[str, Any]) -> Dict[str, Any]:
+        from app.utils.database_manager import get_supabase
+        # Also links the new asset to the approval and returns its asset_id
+        response = get_supabase().rpc("approve_and_create_asset", {
+            "approval_id_in": int(approval_id),
+            "approver_id_in": str(approver_id),
+            "new_asset_data": asset_data
+        }).execute()
+        return response.data or _result("error", "Database transaction failed: No data returned from RPC")
+
+    def approve_new_assets(self, approval_id: int, approver_id: str, assets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        from app.utils.database_manager import get_supabase
+        response = get_supabase().rpc("approve_and_create_assets", {
+            "approval_id_in": int(approval_id),
+            "approver_id_in": str(approver_id),
+            "new_assets": assets
+        }).execute()
+        return response.data or _result("error", "Database transaction failed: No data returned from RPC")
+
+    def reject(self, approval_id: int, approver_id: str) -> Dict[str, Any]:
+        from app.utils.database_manager import get_supabase
+        response = get_supabase().rpc("reject_request", {
+            "approval_id_in": int(approval_id),
+            "approver_id_in": str(approver_id)
+        }).execute()
+        return response.data or _result("error", "No data returned from reject_request")
+
+    def approve_many(self, approval_ids: List[int], approver_id: str, approver_name: str) -> List[Dict[str, Any]]:
+        from app.utils.database_manager import get_supabase
+        response = get_supabase().rpc("approve_requests", {
+            "approval_ids_in": approval_ids,
+            "approver_id_in": str(approver_id),
+            "approver_name_in": approver_name
+        }).execute()
+        return response.data or []
+
+    def reject_many(self, approval_ids: List[int], approver_id: str) -> List[Dict[str, Any]]:
+        from app.utils.database_manager import get_supabase
+        response = get_supabase().rpc("reject_requests", {
+            "approval_ids_in": approval_ids,
+            "approver_id_in": str(approver_id)
+        }).execute()
+        return response.data or []
+
+    def get_submitters(self, approval_ids: List[int]) -> Dict[int, Tuple[str, str]]:
+        from app.utils.database_manager import get_supabase
+        response = get_supabase().table("approvals").select(
+            "approval_id, submitted_by, submitted_profile:profiles!approvals_submitted_by_fkey(role)"
+        ).in_("approval_id", [int(i) for i in approval_ids]).execute()
+        return {
+            int(row["approval_id"]): (row.get("submitted_by"), (row.get("submitted_profile") or {}).get("role") or "staff")
+            for row in response.data or []
+        }
+
+    def get_approval(self, approval_id: int) -> Optional[Dict[str, Any]]:
+        from app.utils.database_manager import get_supabase
+        response = get_supabase().table("approvals").select("status, type, asset_id").eq(
+            "approval_id", int(approval_id)).execute()
+        return response.data[0] if response.data else None
+
+    def save_photo(self, approval_id: int, photo_url: str) -> None:
+        from app.utils.database_manager import get_supabase
+        get_supabase().table("approval_photos").upsert(
+            {"approval_id": int(approval_id), "photo_url": photo_url}
+        ).execute()
+
+    def get_photos(self, approval_ids: List[int]) -> Dict[int, str]:
+        from app.utils.database_manager import get_supabase
+        response = get_supabase().table("approval_photos").select("approval_id, photo_url").in_(
+            "approval_id", [int(i) for i in approval_ids]).execute()
+        return {int(row["approval_id"]): row["photo_url"] for row in response.data or []}
+
+    def delete_photos(self, approval_ids: List[int]) -> None:
+        from app.utils.database_manager import get_supabase
+        get_supabase().table("approval_photos").delete().in_("approval_id", [int(i) for i in approval_ids]).execute()
+
+    def set_asset_photo(self, asset_id: int, photo_url: str) -> None:
+        from app.utils.database_manager import update_asset
+        update_asset(asset_id, {"photo_url": photo_url})
+
+class InMemoryApprovalBackend:
+    """Pure-Python twin of the approval RPCs over dict tables.
+
+    ``tables`` maps table name to a list of row dicts (approvals, assets,
+    profiles, ref_* and the *_log tables). Each call works on a copy and
+    swaps it in only when it succeeds, so a failure leaves nothing behind.
+    """
+
+    LOG_TABLES = ("damage_log", "lost_log", "repair_log", "relocation_log", "disposal_log")
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.tables = tables if tables is not None else {}
+        for name in ("approvals", "assets", "profiles", "approval_photos") + self.LOG_TABLES:
+            self.tables.setdefault(name, [])
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _find(rows: List[Dict[str, Any]], column: str, value: Any) -> Optional[Dict[str, Any]]:
+        return next((row for row in rows if str(row.get(column)) == str(value)), None)
+
+    def _reference_id(self, tables, table: str, id_column: str, **match) -> Any:
+        for row in tables.get(table, []):
+            if all(row.get(column) == value for column, value in match.items()):
+                return row.get(id_column)
+        return None
+
+    def approve(self, approval_id: int, approver_id: str, approver_name: str) -> Dict[str, Any]:
+        with self._lock:
+            tables = copy.deepcopy(self.tables)
+            result = self._approve(tables, approval_id, approver_id, approver_name)
+            if result["status"] == "success":
+                self.tables = tables
+            return result
+
+    def approve_new_asset(self, approval_id: int, approver_id: str, asset_data: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            tables = copy.deepcopy(self.tables)
+            approval = self._find(tables["approvals"], "approval_id", approval_id)
+            if not approval or approval.get("status") != "pending":
+                return _result("error", "Approval not found or already processed")
+            asset = dict(asset_data)
+            asset.setdefault("asset_id", max((a.get("asset_id") or 0 for a in tables["assets"]), default=0) + 1)
+            tables["assets"].append(asset)
+            approval["asset_id"] = asset["asset_id"]
+            self._mark(approval, "approved", approver_id)
+            self.tables = tables
+            return _result("success", "Request approved and asset created successfully", approval)
+
+    def approve_new_assets(self, approval_id: int, approver_id: str, assets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            tables = copy.deepcopy(self.tables)
+            approval = self._find(tables["approvals"], "approval_id", approval_id)
+            if not approval or approval.get("status") != "pending":
+                return _result("error", "Approval not found or already processed")
+            next_id = max((a.get("asset_id") or 0 for a in tables["assets"]), default=0) + 1
+            for offset, asset_data in enumerate(assets):
+                tables["assets"].append(dict(asset_data, asset_id=next_id + offset))
+            self._mark(approval, "approved", approver_id)
+            self.tables = tables
+            return _result("success", f"{len(assets)} assets created", approval, created=len(assets))
+
+    def reject(self, approval_id: int, approver_id: str) -> Dict[str, Any]:
+        with self._lock:
+            approval = self._find(self.tables["approvals"], "approval_id", approval_id)
+            if not approval or approval.get("status") != "pending":
+                return _result("error", "Approval not found or already processed")
+            self._mark(approval, "rejected", approver_id)
+            return _result("success", "Request rejected", approval)
+
+    def approve_many(self, approval_ids: List[int], approver_id: str, approver_name: str) -> List[Dict[str, Any]]:
+        # Grouped by type like approve_requests; each item is its own transaction
+        by_id = {str(a.get("approval_id")): a for a in self.tables["approvals"]}
+        ordered = sorted(approval_ids, key=lambda i: ((by_id.get(str(i)) or {}).get("type") or "", i))
+        return [dict(self.approve(i, approver_id, approver_name), approval_id=i) for i in ordered]
+
+    def reject_many(self, approval_ids: List[int], approver_id: str) -> List[Dict[str, Any]]:
+        return [dict(self.reject(i, approver_id), approval_id=i) for i in approval_ids]
+
+    def get_submitters(self, approval_ids: List[int]) -> Dict[int, Tuple[str, str]]:
+        wanted = {int(i) for i in approval_ids}
+        with self._lock:
+            roles = {p.get("id"): p.get("role") for p in self.tables["profiles"]}
+            return {
+                int(a["approval_id"]): (a.get("submitted_by"), roles.get(a.get("submitted_by")) or "staff")
+                for a in self.tables["approvals"] if int(a["approval_id"]) in wanted
+            }
+
+    def get_approval(self, approval_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            approval = self._find(self.tables["approvals"], "approval_id", approval_id)
+            return {key: approval.get(key) for key in ("status", "type", "asset_id")} if approval else None
+
+    def save_photo(self, approval_id: int, photo_url: str) -> None:
+        with self._lock:
+            row = self._find(self.tables["approval_photos"], "approval_id", approval_id)
+            if row:
+                row["photo_url"] = photo_url
+            else:
+                self.tables["approval_photos"].append({"approval_id": int(approval_id), "photo_url": photo_url})
+
+    def get_photos(self, approval_ids: List[int]) -> Dict[int, str]:
+        wanted = {int(i) for i in approval_ids}
+        with self._lock:
+            return {row["approval_id"]: row["photo_url"] for row in self.tables["approval_photos"]
+                    if row["approval_id"] in wanted}
+
+    def delete_photos(self, approval_ids: List[int]) -> None:
+        unwanted = {int(i) for i in approval_ids}
+        with self._lock:
+            self.tables["approval_photos"] = [row for row in self.tables["approval_photos"]
+                                              if row["approval_id"] not in unwanted]
+
+    def set_asset_photo(self, asset_id: int, photo_url: str) -> None:
+        with self._lock:
+            asset = self._find(self.tables["assets"], "asset_id", asset_id)
+            if asset:
+                asset["photo_url"] = photo_url
+
+    @staticmethod
+    def _mark(approval: Dict[str, Any], status: str, approver_id: str) -> None:
+        # Same fields update_approval_status() writes
+        approval.update({
+            "status": status,
+            "approved_by": approver_id,
+            "approved_date": datetime.now(timezone.utc).isoformat(),
+            "notes": ""
+        })
+
+    def _approve(self, tables, approval_id, approver_id, approver_name) -> Dict[str, Any]:
+        approval = self._find(tables["approvals"], "approval_id", approval_id)
+        if not approval:
+            return _result("error", "Approval not found")
+        if approval.get("status") != "pending":
+            return _result("error", f"Approval already {approval.get('status')}", approval)
+
+        try:
+            notes_data = json.loads(approval.get("notes") or "{}")
+        except (TypeError, ValueError):
+            notes_data = {}
+
+        approval_type = approval.get("type")
+        if approval_type in ADD_ASSET_TYPES:
+            return _result("needs_asset_data", "", approval, notes=notes_data)
+
+        submitter = self._find(tables["profiles"], "id", approval.get("submitted_by")) or {}
+        submitter_name = submitter.get("full_name") or submitter.get("username") or "Unknown User"
+        asset = self._find(tables["assets"], "asset_id", approval.get("asset_id")) or {}
+        now = datetime.now(timezone.utc)
+        to_location_id = approval.get("to_location_id")
+        common = {
+            "asset_id": approval.get("asset_id"),
+            "asset_name": approval.get("asset_name") or "",
+            "approved_by": approver_id,
+            "approved_by_name": approver_name,
+            "approved_at": now.isoformat(),
+            "status": "approved"
+        }
+
+        if approval_type == "damage_report":
+            tables["damage_log"].append({
+                **common,
+                "damage_type": notes_data.get("damage_type", ""),
+                "severity": notes_data.get("severity", ""),
+                "description": notes_data.get("description", ""),
+                "reported_by": approval.get("submitted_by"),
+                "reported_by_name": submitter_name
+            })
+            asset["status"] = "Damaged"
+            if to_location_id:
+                asset["location_id"] = to_location_id
+
+        elif approval_type == "lost_report":
+            tables["lost_log"].append({
+                **common,
+                "last_location_id": approval.get("from_location_id"),
+                "date_lost": now.date().isoformat(),
+                "description": notes_data.get("description", ""),
+                "reported_by": approval.get("submitted_by"),
+                "reported_by_name": submitter_name
+            })
+            asset["status"] = "Lost"
+
+        elif approval_type == "repair":
+            tables["repair_log"].append({
+                **common,
+                "repair_action": "Repair Completed",
+                "action_type": "completion",
+                "description": notes_data.get("repair_notes", ""),
+                "performed_by": approval.get("submitted_by"),
+                "performed_by_name": submitter_name,
+                "new_location_id": to_location_id,
+                "notes": notes_data.get("repair_notes", "")
+            })
+            asset["status"] = "In Storage" if to_location_id and int(to_location_id) == WAREHOUSE_LOCATION_ID else "Active"
+            if to_location_id:
+                asset["location_id"] = int(to_location_id)
+
+        elif approval_type == "relocation":
+            old_location_id = asset.get("location_id")
+            tables["relocation_log"].append({
+                **common,
+                "old_location_id": old_location_id,
+                "old_location_name": notes_data.get("current_location", ""),
+                "old_room_name": notes_data.get("current_room", ""),
+                "new_location_id": to_location_id,
+                "new_location_name": notes_data.get("new_location", ""),
+                "new_room_name": notes_data.get("new_room", ""),
+                "reason": notes_data.get("reason", ""),
+                "notes": notes_data.get("notes", ""),
+                "requested_by": approval.get("submitted_by"),
+                "requested_by_name": submitter_name,
+                "relocation_date": now.date().isoformat()
+            })
+            if to_location_id:
+                asset["location_id"] = to_location_id
+                if int(to_location_id) == WAREHOUSE_LOCATION_ID:
+                    asset["status"] = "In Storage"
+                elif old_location_id == WAREHOUSE_LOCATION_ID:
+                    asset["status"] = "Active"
+
+        elif approval_type == "disposal_request":
+            tables["disposal_log"].append({
+                **common,
+                "disposal_reason": notes_data.get("disposal_reason", ""),
+                "disposal_method": notes_data.get("disposal_method", ""),
+                "description": notes_data.get("description", ""),
+                "notes": notes_data.get("notes", ""),
+                "requested_by": approval.get("submitted_by"),
+                "requested_by_name": submitter_name,
+                "disposal_date": now.date().isoformat()
+            })
+            asset["status"] = "Disposed"
+
+        elif approval_type == "edit_asset":
+            location = (notes_data.get("location_name"), notes_data.get("room_name"))
+            status = notes_data.get("status")
+            if location == WAREHOUSE_LOCATION:
+                status = "In Storage"
+            elif status == "In Storage":
+                # Leaving the warehouse
+                status = "Active"
+            for column in ("asset_name", "manufacture", "model", "serial_number", "purchase_cost",
+                           "journal", "photo_url", "room_name", "owner_type", "assigned_user_name"):
+                if column in notes_data:
+                    asset[column] = notes_data[column]
+            if status:
+                asset["status"] = status
+            references = {
+                "company_id": self._reference_id(tables, "ref_companies", "company_id",
+                                                 company_name=notes_data.get("company_name")),
+                "business_unit_id": self._reference_id(tables, "ref_business_units", "business_unit_id",
+                                                       business_unit_name=notes_data.get("business_unit_name")),
+                "location_id": self._reference_id(tables, "ref_locations", "location_id",
+                                                  location_name=location[0], room_name=location[1])
+            }
+            asset.update({column: value for column, value in references.items() if value is not None})
+
+        else:
+            return _result("error", f"Unknown approval type: {approval_type or ''}", approval)
+
+        self._mark(approval, "approved", approver_id)
+        return _result("success", "Request approved successfully", approval)
+
+APPROVAL_BACKEND = os.getenv("APPROVAL_BACKEND", "supabase").lower()
+BACKENDS = {"supabase": SupabaseApprovalBackend, "memory": InMemoryApprovalBackend}
+
+if APPROVAL_BACKEND not in BACKENDS:
+    logging.warning(f"Approval backend '{APPROVAL_BACKEND}' unknown, using supabase")
+    APPROVAL_BACKEND = "supabase"
+
+backend = BACKENDS[APPROVAL_BACKEND]()
+
+def attach_photo(approval_id, photo_url: str) -> bool:
+    """Keep a finished upload for an add/edit request; False when the file is no longer wanted.
+
+    The URL is saved before the approval is read, and approving links the
+    asset before it reads the saved photos (_apply_photos), so the photo
+    reaches the asset whichever of the two finishes first.
+    """
+    backend.save_photo(approval_id, photo_url)
+    approval = backend.get_approval(approval_id)
+    if not approval or approval.get("status") == "rejected":
+        backend.delete_photos([approval_id])
+        return False
+    if approval.get("status") == "approved" and approval.get("asset_id"):
+        backend.set_asset_photo(approval["asset_id"], photo_url)
+    return True
+
+def _apply_photos(results: List[Dict[str, Any]], action: str):
+    """Put uploaded photos on the assets of approved add/edit requests; delete those of rejected ones."""
+    resolved = [r for r in results if r.get("status") == "success" and r.get("type") in PHOTO_TYPES]
+    if not resolved:
+        return
+    try:
+        photos = backend.get_photos([r["approval_id"] for r in resolved])
+        if not photos:
+            return
+        if action == "rejected":
+            from app.utils.photo import delete_from_drive
+            backend.delete_photos(list(photos))
+            for photo_url in photos.values():
+                delete_from_drive(photo_url)
+            return
+        for r in resolved:
+            photo_url = photos.get(int(r["approval_id"]))
+            if photo_url and r.get("asset_id"):
+                backend.set_asset_photo(r["asset_id"], photo_url)
+    except Exception as e:
+        logging.error(f"Error applying photos of {action} approvals: {str(e)}")
+
+def _record_resolved(results: List[Dict[str, Any]], action: str):
+    """Apply uploaded photos, update the pending counters and notify event streams for successful results."""
+    _apply_photos(results, action)
+    succeeded = [r for r in results if r.get("status") == "success"]
+    submitters = pending_counters.record_resolved(r["approval_id"] for r in succeeded)
+    # Submitted on another worker since the last resync (or the resync failed):
+    # look the submitter up, or the event never reaches them
+    missing = [int(r["approval_id"]) for r in succeeded if int(r["approval_id"]) not in submitters]
+    if missing and event_bus.subscriber_count:
+        try:
+            submitters.update(backend.get_submitters(missing))
+        except Exception as e:
+            logging.error(f"Error loading submitters of resolved approvals: {str(e)}")
+    for r in succeeded:
+        submitted_by, submitter_role = submitters.get(int(r["approval_id"]), (None, None))
+        event_bus.publish(
+            f"approval_{action}", approval_id=r["approval_id"], type=r.get("type"), asset_id=r.get("asset_id"),
+            submitted_by=submitted_by, submitter_role=submitter_role
+        )
+
+def approver_name(profile) -> str:
+    return profile.full_name or profile.username
+
+def _create_new_assets(approval_id, profile, notes: Dict[str, Any]) -> Dict[str, Any]:
+    """Prepare and create the asset(s) of a new-asset approval."""
+    if isinstance(notes.get("assets"), list):
+        from app.utils.bulk_create import prepare_new_assets
+        from app.utils.bulk_import import ReferenceIndex
+        assets, errors = prepare_new_assets(notes["assets"], ReferenceIndex.load())
+        if errors or not assets:
+            return _result("error", f"Failed to prepare asset data for transaction. {'; '.join(errors[:5])}".strip())
+        return backend.approve_new_assets(approval_id, profile.id, assets)
+
+    from app.utils.database_manager import prepare_asset_data
+    prepared_data = prepare_asset_data(notes)
+    if not prepared_data:
+        return _result("error", "Failed to prepare asset data for transaction.")
+    return backend.approve_new_asset(approval_id, profile.id, prepared_data)
+
+def apply_approval(approval_id, profile) -> Dict[str, Any]:
+    """Approve one request; returns {"status", "message", "type", "asset_id"}.
+
+    One round trip for every type except new assets, whose row is prepared
+    from the approval notes before approve_and_create_asset runs.
+    """
+    pending_counters.refresh_if_stale()
+    try:
+        result = backend.approve(approval_id, profile.id, approver_name(profile))
+        if result.get("status") == "needs_asset_data":
+            outcome = _create_new_assets(approval_id, profile, result.get("notes") or {})
+            outcome.setdefault("type", result.get("type"))
+            result = outcome
+    except Exception as e:
+        logging.error(f"Approval {approval_id} failed: {str(e)}")
+        return _result("error", f"Database transaction failed: {str(e)}")
+
+    _record_resolved([dict(result, approval_id=approval_id)], "approved")
+    return result
+
+def apply_rejection(approval_id, profile) -> Dict[str, Any]:
+    """Reject one pending request in one round trip."""
+    pending_counters.refresh_if_stale()
+    try:
+        result = backend.reject(approval_id, profile.id)
+    except Exception as e:
+        logging.error(f"Rejection of approval {approval_id} failed: {str(e)}")
+        return _result("error", f"Failed to update approval status: {str(e)}")
+
+    _record_resolved([dict(result, approval_id=approval_id)], "rejected")
+    return result
+
+def apply_batch(approval_ids: Iterable[Any], action: str, profile) -> List[Dict[str, Any]]:
+    """Approve or reject many requests; one result dict (with approval_id) per id.
+
+    The whole selection is one RPC; only new-asset approvals in it need a
+    prepare_asset_data() + approve_and_create_asset follow-up each.
+    """
+    ids = list(dict.fromkeys(int(i) for i in approval_ids))
+    pending_counters.refresh_if_stale()
+    try:
+        if action == "rejected":
+            results = backend.reject_many(ids, profile.id)
+        else:
+            results = backend.approve_many(ids, profile.id, approver_name(profile))
+    except Exception as e:
+        logging.error(f"Batch {action} of {len(ids)} approvals failed: {str(e)}")
+        return [_result("error", f"Database transaction failed: {str(e)}", approval_id=i) for i in ids]
+
+    for index, result in enumerate(results):
+        if result.get("status") != "needs_asset_data":
+            continue
+        approval_id = result["approval_id"]
+        try:
+            outcome = _create_new_assets(approval_id, profile, result.get("notes") or {})
+        except Exception as e:
+            logging.error(f"Approval {approval_id} failed: {str(e)}")
+            outcome = _result("error", f"Database transaction failed: {str(e)}")
+        outcome.setdefault("type", result.get("type"))
+        outcome["approval_id"] = approval_id
+        results[index] = outcome
+
+    _record_resolved(results, action)
+    return results
@@ -0,0 +1,226 @@
+"""
+Approval list queries
+The approvals and logs pages filter at the database (status, type,
+submitter, date range) and page with a keyset on (submitted_date,
+approval_id), newest first, so a page costs the same however long the
+history gets. Tab counts are cached per filter set and data version.
+"""
+import base64
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Query
+
+from app.utils.cache import cache
+from app.utils.database_manager import get_supabase, get_data_version
+
+APPROVAL_COLUMNS = '''
+    approval_id, type, asset_id, asset_name, status, submitted_by, submitted_date,
+    description, approved_by, approved_date, notes, created_at,
+    from_location_id, to_location_id,
+    submitted_profile:profiles!approvals_submitted_by_fkey(full_name, username, role),
+    approved_profile:profiles!approvals_approved_by_fkey(full_name, username)
+'''
+
+STATUS_GROUPS = {
+    "pending": ["pending"],
+    "completed": ["approved", "rejected"]
+}
+
+APPROVAL_TYPE_LABELS = {
+    "add_asset": "Add Asset",
+    "admin_add_asset": "Add Asset (Admin)",
+    "edit_asset": "Edit Asset",
+    "damage_report": "Damage Report",
+    "repair": "Repair",
+    "lost_report": "Lost Report",
+    "disposal_request": "Disposal Request",
+    "relocation": "Relocation"
+}
+
+DEFAULT_PAGE_SIZE = 20
+
+class ApprovalFilters:
+    """Filter and page-size query parameters shared by the approvals and logs pages."""
+
+    def __init__(
+        self,
+        approval_type: Optional[str] = Query(None, alias="type", description="Approval type"),
+        submitted_by: Optional[str] = Query(None, description="Submitter profile id"),
+        date_from: Optional[date] = Query(None, description="Submitted on or after"),
+        date_to: Optional[date] = Query(None, description="Submitted on or before"),
+        page_size: int = Query(DEFAULT_PAGE_SIZE, ge=5, le=100, description="Items per page")
+    ):
+        self.approval_type = approval_type if approval_type in APPROVAL_TYPE_LABELS else None
+        self.submitted_by = submitted_by or None
+        self.date_from = date_from
+        self.date_to = date_to
+        self.page_size = page_size
+        self.scoped = False
+
+    def scope_to(self, profile_id: str):
+        """Restrict to one submitter regardless of the submitted_by parameter."""
+        self.submitted_by = profile_id
+        self.scoped = True
+
+    def key(self) -> Tuple:
+        return (self.approval_type, self.submitted_by, self.date_from, self.date_to)
+
+    def params(self) -> Dict[str, str]:
+        """Active filters as query-string values (for links and forms)."""
+        params = {
+            "type": self.approval_type,
+            "submitted_by": None if self.scoped else self.submitted_by,
+            "date_from": self.date_from.isoformat() if self.date_from else None,
+            "date_to": self.date_to.isoformat() if self.date_to else None,
+            "page_size": self.page_size if self.page_size != DEFAULT_PAGE_SIZE else None
+        }
+        return {name: str(value) for name, value in params.items() if value}
+
+    def url(self, **extra) -> str:
+        """Query string with the current filters plus extra parameters (None drops one)."""
+        params = self.params()
+        params.update({name: str(value) for name, value in extra.items() if value is not None})
+        return "?" + urlencode(params) if params else "?"
+
+    def apply(self, query):
+        if self.approval_type:
+            query = query.eq("type", self.approval_type)
+        if self.submitted_by:
+            query = query.eq("submitted_by", self.submitted_by)
+        if self.date_from:
+            query = query.gte("submitted_date", self.date_from.isoformat())
+        if self.date_to:
+            query = query.lt("submitted_date", (self.date_to + timedelta(days=1)).isoformat())
+        return query
+
+def can_approve(approver_role: str, submitter_role: str) -> bool:
+    """Managers approve admin requests; admins approve manager and staff requests."""
+    if approver_role == "manager":
+        return submitter_role == "admin"
+    if approver_role == "admin":
+        return submitter_role in ("manager", "staff")
+    return False
+
+def get_submitter_roles(approval_ids: List[int]) -> Optional[Dict[int, str]]:
+    """approval_id -> submitter role for the given approvals (unknown ids are left out); None on error."""
+    try:
+        response = get_supabase().table("approvals").select(
+            "approval_id, submitted_profile:profiles!approvals_submitted_by_fkey(role)"
+        ).in_("approval_id", approval_ids).execute()
+    except Exception as e:
+        logging.error(f"Error loading submitter roles: {str(e)}")
+        return None
+    return {
+        row["approval_id"]: (row.get("submitted_profile") or {}).get("role") or "staff"
+        for row in response.data or []
+    }
+
+def encode_cursor(approval: Dict[str, Any]) -> str:
+    # An empty date part stands for a NULL submitted_date
+    raw = f"{approval.get('submitted_date') or ''}|{approval.get('approval_id')}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[Optional[datetime], int]]:
+    """(submitted_date, approval_id) of a cursor; None for anything that does not parse.
+
+    The cursor comes from the client, so its date is parsed here and never
+    reaches the filter string as given.
+    """
+    if not cursor:
+        return None
+    try:
+        submitted_date, approval_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return (datetime.fromisoformat(submitted_date) if submitted_date else None), int(approval_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def add_profile_names(approval: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten the embedded submitter/approver profiles into *_name and *_info fields."""
+    submitted_profile = approval.get("submitted_profile")
+    if submitted_profile:
+        approval["submitted_by_name"] = submitted_profile.get("full_name") or submitted_profile.get("username") or "Unknown User"
+        approval["submitted_by_role"] = submitted_profile.get("role", "staff")
+        approval["submitted_by_info"] = {
+            "full_name": submitted_profile.get("full_name") or "Unknown",
+            "username": submitted_profile.get("username") or "Unknown"
+        }
+    else:
+        approval["submitted_by_name"] = "Unknown User"
+        approval["submitted_by_role"] = "staff"
+        approval["submitted_by_info"] = {"full_name": "Unknown", "username": "Unknown"}
+
+    approved_profile = approval.get("approved_profile")
+    if approved_profile:
+        approval["approved_by_name"] = approved_profile.get("full_name") or approved_profile.get("username") or "Unknown User"
+        approval["approved_by_info"] = {
+            "full_name": approved_profile.get("full_name") or "Unknown",
+            "username": approved_profile.get("username") or "Unknown"
+        }
+    else:
+        approval["approved_by_name"] = "Unknown User"
+        approval["approved_by_info"] = {"full_name": "Unknown", "username": "Unknown"}
+    return approval
+
+def get_approvals_page(filters: ApprovalFilters, status_group: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """One keyset page: {"items": [...], "next_cursor": str | None}."""
+    try:
+        query = get_supabase().table("approvals").select(APPROVAL_COLUMNS)
+        query = filters.apply(query).in_("status", STATUS_GROUPS[status_group])
+
+        position = decode_cursor(cursor)
+        if position:
+            submitted_date, approval_id = position
+            if submitted_date is None:
+                # Already in the NULL-date tail, which sorts last
+                query = query.is_("submitted_date", "null").lt("approval_id", approval_id)
+            else:
+                submitted_date = submitted_date.isoformat()
+                query = query.or_(
+                    f'submitted_date.lt."{submitted_date}",'
+                    f'and(submitted_date.eq."{submitted_date}",approval_id.lt.{approval_id}),'
+                    'submitted_date.is.null'
+                )
+
+        # NULL dates last so the keyset above can reach them; one extra row
+        # tells whether an older page exists
+        response = query.order("submitted_date", desc=True, nullsfirst=False).order("approval_id", desc=True) \
+            .limit(filters.page_size + 1).execute()
+        rows = response.data or []
+    except Exception as e:
+        logging.error(f"Error getting {status_group} approvals page: {str(e)}")
+        return {"items": [], "next_cursor": None}
+
+    items = [add_profile_names(row) for row in rows[:filters.page_size]]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > filters.page_size else None
+    return {"items": items, "next_cursor": next_cursor}
+
+def count_approvals(filters: ApprovalFilters, status_group: str) -> int:
+    """Row count for a tab, cached until the data version changes."""
+    def count() -> int:
+        query = get_supabase().table("approvals").select("approval_id", count="exact", head=True)
+        return filters.apply(query).in_("status", STATUS_GROUPS[status_group]).execute().count or 0
+
+    cache_key = f"approval_count_{status_group}_{filters.key()}_{get_data_version()}"
+    try:
+        return cache.get_or_set(cache_key, count, 60)
+    except Exception as e:
+        logging.error(f"Error counting {status_group} approvals: {str(e)}")
+        return 0
+
+def _get_submitter_options() -> List[Dict[str, Any]]:
+    try:
+        response = get_supabase().table("profiles").select("id, full_name, username").order("full_name").execute()
+        return [
+            {"id": profile["id"], "name": profile.get("full_name") or profile.get("username") or "Unknown User"}
+            for profile in response.data or []
+        ]
+    except Exception as e:
+        logging.error(f"Error getting submitter options: {str(e)}")
+        return []
+
+def get_submitter_options() -> List[Dict[str, Any]]:
+    """Profiles for the submitter filter."""
+    return cache.get_or_set("approval_submitter_options", _get_submitter_options, 300)
@@ -2,7 +2,6 @@ from datetime import datetime, timezone
 from fastapi import Request, HTTPException, status, Depends
 from jose import jwt, jwk
 from jose.exceptions import JWTError
-from supabase import create_client, Client
 from typing import Optional, List
 from enum import Enum
 import logging
@@ -16,9 +15,10 @@ class UserRole(str, Enum):
     STAFF = "staff"
 from app.schemas.profile import ProfileResponse
 from app.config import load_config
+from app.utils.supabase_client import get_client
+from app.utils import auth_gateway
 
 config = load_config()
-supabase: Client = create_client(config.SUPABASE_URL, config.SUPABASE_ANON_KEY)
 
 # JWKS cache
 _jwks_cache: Optional[dict] = None
@@ -100,42 +100,42 @@ def decode_supabase_jwt(token: str) -> Optional[dict]:
         logging.error(f"Unexpected JWT error: {e}")
         return None
 
-def refresh_supabase_token(refresh_token: str) -> Optional[dict]:
-    """Refresh access/refresh tokens using Supabase Python SDK v2.
+async def refresh_supabase_token(refresh_token: str) -> Optional[dict]:
+    """Refresh access/refresh tokens through the stateless auth gateway.
     
-    Uses supabase-py v2 built-in session refresh which is more reliable
-    than manual HTTP requests.
+    The refresh token is sent explicitly, so no session is stored on a
+    shared client and concurrent refreshes cannot leak into each other.
     
     IMPORTANT: Never fallback to old refresh_token. If Supabase rotates the token,
     session.refresh_token must be used. If it's missing, treat as failed refresh
     and force user to login again.
     """
     try:
-        # Use supabase-py v2 built-in refresh method
-        session = supabase.auth.refresh_session(refresh_token)
+        session = await auth_gateway.refresh_session(refresh_token)
         
-        if not session or not session.access_token:
+        if not session or not session.get("access_token"):
             logging.warning("Refresh session returned no tokens")
             return None
         
         # CRITICAL: Supabase must return a new refresh_token after rotation
         # If missing, don't fallback to old token - that causes "Invalid Refresh Token" errors
-        if not session.refresh_token:
+        if not session.get("refresh_token"):
             logging.warning("Refreshed session did not return a new refresh_token - token rotation may have failed")
             return None
         
-        # Protect profile after token refresh
-        if session.user and session.user.id:
+        # Protect profile after token refresh (runs on the background worker)
+        user = session.get("user") or {}
+        if user.get("id"):
             try:
-                from app.utils.profile_utils import protect_profile_data
-                protect_profile_data(session.user.id)
+                from app.utils.profile_utils import schedule_profile_protection
+                schedule_profile_protection(user["id"])
             except Exception as e:
-                logging.warning(f"Failed to protect profile after token refresh: {e}")
+                logging.warning(f"Failed to schedule profile protection after token refresh: {e}")
 
         return {
-            "access_token": session.access_token,
-            "refresh_token": session.refresh_token,
-            "expires_at": session.expires_at
+            "access_token": session["access_token"],
+            "refresh_token": session["refresh_token"],
+            "expires_at": session["expires_at"]
         }
     except Exception as e:
         logging.warning(f"Token refresh failed: {type(e).__name__}")
@@ -158,7 +158,7 @@ def get_current_profile(request: Request) -> ProfileResponse:
 
     try:
         # Use service key to bypass RLS for profile reading
-        admin_supabase = create_client(config.SUPABASE_URL, config.SUPABASE_SERVICE_KEY)
+        admin_supabase = get_client("service")
         response = admin_supabase.table("profiles").select("*").eq("id", user_id).execute()
         
         # Profile must exist - no auto-creation
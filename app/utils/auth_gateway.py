@@ -0,0 +1,142 @@
+"""
+Auth Gateway - stateless Supabase Auth (GoTrue) calls
+
+Every call passes the user's credentials or tokens explicitly and keeps no
+session on a global object, so concurrent logins, refreshes and password
+changes never share client state. Requests go over one pooled
+httpx.AsyncClient that is closed from the app lifespan.
+"""
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.config import load_config
+
+config = load_config()
+
+AUTH_TIMEOUT = 10  # seconds
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+class AuthGatewayError(Exception):
+    """Raised when Supabase Auth rejects a request."""
+
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(f"{status_code}: {message}")
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=f"{config.SUPABASE_URL}/auth/v1",
+            timeout=AUTH_TIMEOUT,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            headers={"apikey": config.SUPABASE_ANON_KEY}
+        )
+    return _http_client
+
+
+async def close() -> None:
+    """Close the shared HTTP client (called on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _request(method: str, path: str, json: Optional[dict] = None,
+                   params: Optional[dict] = None, access_token: Optional[str] = None) -> Any:
+    bearer = access_token or config.SUPABASE_ANON_KEY
+    response = await _get_http_client().request(
+        method, path, json=json, params=params,
+        headers={"Authorization": f"Bearer {bearer}"}
+    )
+
+    if response.status_code >= 400:
+        try:
+            body = response.json()
+            message = body.get("error_description") or body.get("msg") or body.get("message") or body.get("error") or response.text
+        except ValueError:
+            message = response.text
+        raise AuthGatewayError(response.status_code, str(message))
+
+    if not response.content:
+        return None
+    return response.json()
+
+
+def _to_session(data: Optional[dict]) -> Optional[Dict[str, Any]]:
+    """Normalise a GoTrue token response into a session dict."""
+    if not data or not data.get("access_token"):
+        return None
+    expires_at = data.get("expires_at")
+    if not expires_at and data.get("expires_in"):
+        expires_at = int(time.time()) + int(data["expires_in"])
+    return {
+        "access_token": data.get("access_token"),
+        "refresh_token": data.get("refresh_token"),
+        "expires_at": expires_at,
+        "user": data.get("user")
+    }
+
+
+async def sign_in_with_password(email: str, password: str) -> Optional[Dict[str, Any]]:
+    """Password grant; returns a session dict."""
+    data = await _request("POST", "/token", params={"grant_type": "password"},
+                          json={"email": email, "password": password})
+    return _to_session(data)
+
+
+async def refresh_session(refresh_token: str) -> Optional[Dict[str, Any]]:
+    """Refresh token grant; returns the rotated session dict."""
+    data = await _request("POST", "/token", params={"grant_type": "refresh_token"},
+                          json={"refresh_token": refresh_token})
+    return _to_session(data)
+
+
+async def sign_up(email: str, password: str, data: Optional[dict] = None) -> Dict[str, Any]:
+    """Register a user; returns {"user": ..., "session": ... or None}."""
+    result = await _request("POST", "/signup",
+                            json={"email": email, "password": password, "data": data or {}})
+    result = result or {}
+    session = _to_session(result)
+    # Without auto-confirm GoTrue returns the bare user object
+    user = session["user"] if session else (result if result.get("id") else None)
+    return {"user": user, "session": session}
+
+
+async def verify_otp(otp_type: str, token_hash: Optional[str] = None,
+                     token: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Verify an email OTP (e.g. recovery link); returns a session dict."""
+    payload = {"type": otp_type}
+    if token_hash:
+        payload["token_hash"] = token_hash
+    else:
+        payload["token"] = token
+    data = await _request("POST", "/verify", json=payload)
+    return _to_session(data)
+
+
+async def update_user(access_token: str, attributes: dict) -> Optional[dict]:
+    """Update the user owning access_token; returns the user object."""
+    return await _request("PUT", "/user", json=attributes, access_token=access_token)
+
+
+async def reset_password_for_email(email: str, redirect_to: Optional[str] = None) -> None:
+    """Send a password recovery email."""
+    params = {"redirect_to": redirect_to} if redirect_to else None
+    await _request("POST", "/recover", json={"email": email}, params=params)
+
+
+async def sign_out(access_token: str) -> None:
+    """Revoke the refresh tokens of this session only."""
+    try:
+        await _request("POST", "/logout", params={"scope": "local"}, access_token=access_token)
+    except AuthGatewayError as e:
+        # An expired access token just means the session is already gone
+        logging.info(f"Sign out ignored: {e.status_code}")
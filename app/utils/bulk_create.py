@@ -0,0 +1,161 @@
+"""
+Bulk asset creation
+Builds the rows for a whole import of new assets at once instead of running
+prepare_asset_data() (about 15 queries) per asset: references come from a
+ReferenceIndex, asset tags are reserved one block per tag prefix, and
+financials are computed for all rows in one pass. Rows are inserted in
+chunks, or submitted as one grouped admin_add_asset approval that
+approve_and_create_assets applies when it is approved.
+"""
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.approval_engine import WAREHOUSE_LOCATION
+from app.utils.bulk_import import ReferenceIndex
+from app.utils.database_manager import (
+    NEW_ASSET_COLUMNS, TABLES, add_approval_request, get_supabase, reserve_asset_tags
+)
+
+INSERT_CHUNK_SIZE = 500
+
+# Copied from the sheet as they are, like prepare_asset_data's valid_fields
+COPY_FIELDS = [
+    "asset_name", "manufacture", "model", "serial_number", "room_name", "notes",
+    "item_condition", "purchase_date", "purchase_cost", "warranty", "supplier", "journal"
+]
+
+def calculate_financials(purchase_costs: List[float], purchase_years: List[int], residual_percents: List[float],
+                         useful_lives: List[int], current_year: Optional[int] = None) -> List[Dict[str, Any]]:
+    """calculate_asset_financials over columns: same straight-line rule, cap and rounding."""
+    current_year = current_year or datetime.now().year
+    results = []
+    for cost, year, residual_percent, useful_life in zip(purchase_costs, purchase_years, residual_percents, useful_lives):
+        residual_value = cost * (residual_percent / 100)
+        depreciable = cost - residual_value
+        depreciation = depreciable / useful_life * (current_year - year) if useful_life > 0 else 0
+        depreciation = min(depreciation, depreciable)
+        results.append({
+            "residual_percent": residual_percent,
+            "residual_value": round(residual_value, 2),
+            "useful_life": useful_life,
+            "depreciation_value": round(depreciation, 2),
+            "book_value": round(cost - depreciation, 2),
+            "year": year
+        })
+    return results
+
+def _tag_prefix(row: Dict[str, Any], index: ReferenceIndex) -> Optional[str]:
+    codes = [
+        (index.companies.get(row.get("company_name")) or {}).get("company_code"),
+        (index.categories.get(row.get("category_name")) or {}).get("category_code"),
+        (index.asset_types.get(row.get("type_name")) or {}).get("type_code"),
+        (index.owners.get(row.get("owner_name")) or {}).get("owner_code")
+    ]
+    if not all(codes):
+        return None
+    company, category, asset_type, owner = codes
+    return f"{company}-{category}{asset_type}.{owner}{str(row['purchase_date'])[2:4]}."
+
+def prepare_new_assets(rows: Iterable[Dict[str, Any]], index: ReferenceIndex) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Asset rows ready to insert for staged create-mode rows, plus errors for rows that no longer resolve."""
+    assets: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    by_prefix: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+    for row in rows:
+        ids, row_errors = index.resolve(row)
+        if row_errors:
+            errors.extend(f"Row {row.get('row_num')}: {message}" for message in row_errors)
+            continue
+        asset = dict.fromkeys(NEW_ASSET_COLUMNS)
+        asset.update({field: row.get(field) for field in COPY_FIELDS})
+        asset.update(ids)
+        asset["owner_type"] = row.get("owner_type") or "GA"
+        asset["assigned_user_name"] = row.get("assigned_user_name") if asset["owner_type"] == "IT" else None
+        asset["assigned_user_id"] = ids.get("assigned_user_id") if asset["owner_type"] == "IT" else None
+        in_warehouse = (row.get("location_name"), row.get("room_name")) == WAREHOUSE_LOCATION
+        asset["status"] = row.get("status") or ("In Storage" if in_warehouse else "Active")
+        category = index.categories[row["category_name"]]
+        asset["residual_percent"] = float(category.get("residual_percent") or 0)
+        asset["useful_life"] = int(category.get("useful_life") or 0)
+        prefix = _tag_prefix(row, index)
+        if prefix:
+            by_prefix[prefix].append(asset)
+        assets.append(asset)
+
+    financials = calculate_financials(
+        [float(asset["purchase_cost"]) for asset in assets],
+        [int(str(asset["purchase_date"])[:4]) for asset in assets],
+        [asset["residual_percent"] for asset in assets],
+        [asset["useful_life"] for asset in assets]
+    )
+    for asset, values in zip(assets, financials):
+        asset.update(values)
+
+    # One reservation per prefix instead of a count query per asset
+    for prefix, group in by_prefix.items():
+        first = reserve_asset_tags(prefix, len(group))
+        for offset, asset in enumerate(group):
+            asset["asset_tag"] = f"{prefix}{str(first + offset).zfill(3)}"
+    return assets, errors
+
+def insert_assets(assets: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
+    """Insert prepared rows INSERT_CHUNK_SIZE at a time; returns (created, errors)."""
+    supabase = get_supabase()
+    created = 0
+    errors = []
+    for start in range(0, len(assets), INSERT_CHUNK_SIZE):
+        chunk = assets[start:start + INSERT_CHUNK_SIZE]
+        try:
+            supabase.table(TABLES["ASSETS"]).insert(chunk).execute()
+            created += len(chunk)
+        except Exception as e:
+            logging.error(f"Error inserting assets {start + 1}-{start + len(chunk)}: {str(e)}")
+            errors.append(f"Assets {start + 1}-{start + len(chunk)}: {str(e)}")
+    return created, errors
+
+def create_assets(rows: Iterable[Dict[str, Any]], index: Optional[ReferenceIndex] = None) -> Dict[str, Any]:
+    """Prepare and insert staged rows chunk by chunk, so memory stays flat."""
+    index = index or ReferenceIndex.load()
+    created = 0
+    errors: List[str] = []
+    chunk: List[Dict[str, Any]] = []
+
+    def flush():
+        nonlocal created
+        assets, prepare_errors = prepare_new_assets(chunk, index)
+        inserted, insert_errors = insert_assets(assets)
+        created += inserted
+        errors.extend(prepare_errors + insert_errors)
+        chunk.clear()
+
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= INSERT_CHUNK_SIZE:
+            flush()
+    if chunk:
+        flush()
+    logging.info(f"Bulk created {created} assets, {len(errors)} errors")
+    return {"created": created, "errors": errors}
+
+def submit_grouped_approval(rows: Iterable[Dict[str, Any]], profile) -> int:
+    """Submit all rows as one admin_add_asset approval; returns how many assets it covers (0 on failure).
+
+    The rows are kept by name, like add_asset's notes, and prepared when
+    the request is approved.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    approval_data = {
+        "type": "admin_add_asset",
+        "asset_name": f"Bulk import ({len(rows)} assets)",
+        "submitted_by": profile.id,
+        "status": "pending",
+        "description": f"Add {len(rows)} new assets from bulk import",
+        "notes": json.dumps({"assets": rows}, default=str)
+    }
+    return len(rows) if add_approval_request(approval_data) else 0
@@ -0,0 +1,396 @@
+"""
+Bulk-update import pipeline
+Uploads are read with openpyxl in read-only, values-only mode, so rows
+stream off the file without loading the workbook. Columns are matched by
+header name. Each row is converted and checked against a ReferenceIndex
+loaded once per import (no per-row queries), then diffed against the
+current asset snapshot fetched per chunk; only assets with changed columns
+are staged, with just those columns in their payload. Staged rows and
+errors are written to the staging store in chunks as they are read.
+In create mode (stage_new_sheet) rows describe new assets: they are
+validated the same way and staged as read; bulk_create builds the assets.
+"""
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+
+from app.utils.database_manager import get_reference_data, get_supabase, TABLES
+from app.utils.import_staging import import_staging
+
+# Export/import sheet layout; the import matches these by header, in any order
+IMPORT_COLUMNS = [
+    "asset_id", "asset_name", "category_name", "type_name", "manufacture",
+    "model", "serial_number", "asset_tag", "company_name", "business_unit_name",
+    "location_name", "room_name", "owner_name", "owner_type", "assigned_user_name",
+    "item_condition", "purchase_date", "purchase_cost", "warranty", "supplier",
+    "journal", "notes", "status", "year"
+]
+REQUIRED_COLUMNS = ("asset_id",)
+# Same required fields as the add asset form
+CREATE_REQUIRED_COLUMNS = (
+    "asset_name", "category_name", "type_name", "company_name", "owner_name", "purchase_date", "purchase_cost"
+)
+# Generated for new assets, so ignored in create mode
+CREATE_IGNORED_COLUMNS = ("asset_id", "asset_tag", "year")
+
+# Columns written to assets as they are (blank cells leave the asset unchanged)
+DIRECT_FIELDS = [
+    "asset_name", "manufacture", "model", "serial_number", "asset_tag",
+    "room_name", "item_condition", "purchase_date", "purchase_cost",
+    "warranty", "supplier", "journal", "notes", "status", "year", "owner_type", "assigned_user_name"
+]
+# Foreign keys resolved from the sheet's name columns, and the column shown for each
+ID_FIELDS = {
+    "category_id": "category_name",
+    "asset_type_id": "type_name",
+    "company_id": "company_name",
+    "business_unit_id": "business_unit_name",
+    "location_id": "location_name",
+    "owner_id": "owner_name",
+    "assigned_user_id": "assigned_user_name"
+}
+SNAPSHOT_COLUMNS = ["asset_id", "asset_name", *ID_FIELDS, *(f for f in DIRECT_FIELDS if f != "asset_name")]
+OWNER_TYPES = ("GA", "IT")
+STAGE_CHUNK_SIZE = 1000
+# Asset ids per snapshot query, kept well under PostgREST's URL limits
+SNAPSHOT_CHUNK_SIZE = 500
+
+class SheetError(ValueError):
+    """A sheet that cannot be imported at all (as opposed to a bad row)."""
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+def _integer(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"'{value}' is not a whole number")
+    return int(float(value))
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    return float(value)
+
+def _date(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").date().isoformat()
+
+CONVERTERS = {
+    "asset_id": _integer,
+    "year": _integer,
+    "purchase_cost": _number,
+    "purchase_date": _date
+}
+
+class ReferenceIndex:
+    """Name -> id lookups over the reference tables and profiles, loaded once."""
+
+    def __init__(self, categories, asset_types, companies, business_units, locations, owners, profiles):
+        self.categories = {c["category_name"]: c for c in categories if c.get("category_name")}
+        self.asset_types = {t["type_name"]: t for t in asset_types if t.get("type_name")}
+        self.companies = {c["company_name"]: c for c in companies if c.get("company_name")}
+        self.business_units = {b["business_unit_name"]: b for b in business_units if b.get("business_unit_name")}
+        self.owners = {o["owner_name"]: o for o in owners if o.get("owner_name")}
+        self.locations = {
+            (l.get("location_name"), l.get("room_name")): l for l in locations if l.get("location_name")
+        }
+        self.location_names = {l.get("location_name") for l in locations}
+        # full_name wins over username, as in the old per-row lookup
+        self.users = {p["username"]: p["id"] for p in profiles if p.get("username")}
+        self.users.update({p["full_name"]: p["id"] for p in profiles if p.get("full_name")})
+        # id -> name, to show the current value of a foreign key in the preview
+        self.names = {
+            "category_id": {c["category_id"]: name for name, c in self.categories.items()},
+            "asset_type_id": {t["asset_type_id"]: name for name, t in self.asset_types.items()},
+            "company_id": {c["company_id"]: name for name, c in self.companies.items()},
+            "business_unit_id": {b["business_unit_id"]: name for name, b in self.business_units.items()},
+            "location_id": {l["location_id"]: name for (name, _), l in self.locations.items()},
+            "owner_id": {o["owner_id"]: name for name, o in self.owners.items()},
+            "assigned_user_id": {user_id: name for name, user_id in self.users.items()}
+        }
+
+    @classmethod
+    def load(cls) -> "ReferenceIndex":
+        profiles = get_supabase().table("profiles").select("id, full_name, username").execute().data or []
+        return cls(
+            get_reference_data(TABLES["REF_CATEGORIES"]),
+            get_reference_data(TABLES["REF_TYPES"]),
+            get_reference_data(TABLES["REF_COMPANIES"]),
+            get_reference_data(TABLES["REF_BISNIS_UNIT"]),
+            get_reference_data(TABLES["REF_LOCATION"]),
+            get_reference_data(TABLES["REF_OWNERS"]),
+            profiles
+        )
+
+    def resolve(self, data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """Foreign keys for one row plus any validation errors."""
+        ids: Dict[str, Any] = {}
+        errors: List[str] = []
+
+        lookups = (
+            ("category_name", self.categories, "category_id", "Category"),
+            ("type_name", self.asset_types, "asset_type_id", "Type"),
+            ("company_name", self.companies, "company_id", "Company"),
+            ("business_unit_name", self.business_units, "business_unit_id", "Business unit"),
+            ("owner_name", self.owners, "owner_id", "Owner")
+        )
+        for field, table, id_column, label in lookups:
+            name = data.get(field)
+            if name is None:
+                continue
+            entry = table.get(name)
+            if entry is None:
+                errors.append(f"{label} '{name}' not found")
+            else:
+                ids[id_column] = entry[id_column]
+
+        location_name, room_name = data.get("location_name"), data.get("room_name")
+        if location_name and room_name:
+            location = self.locations.get((location_name, room_name))
+            if location is None:
+                errors.append(f"Location '{location_name}' / room '{room_name}' not found")
+            else:
+                ids["location_id"] = location["location_id"]
+        elif location_name and location_name not in self.location_names:
+            errors.append(f"Location '{location_name}' not found")
+
+        owner_type = data.get("owner_type")
+        if owner_type is not None and owner_type not in OWNER_TYPES:
+            errors.append(f"Owner type '{owner_type}' must be one of {', '.join(OWNER_TYPES)}")
+        if owner_type == "IT" and data.get("assigned_user_name"):
+            user_id = self.users.get(data["assigned_user_name"])
+            if user_id is None:
+                errors.append(f"User '{data['assigned_user_name']}' not found")
+            else:
+                ids["assigned_user_id"] = user_id
+        return ids, errors
+
+    def display(self, field: str, value: Any) -> Any:
+        if field in self.names and value is not None:
+            return self.names[field].get(value, value)
+        return value
+
+def _same(field: str, current: Any, new: Any) -> bool:
+    """Whether a sheet value matches the stored one, ignoring type and format noise."""
+    if current is None or current == "":
+        return new is None or new == ""
+    if field == "purchase_date":
+        return str(current)[:10] == new
+    if isinstance(new, (int, float)):
+        try:
+            return float(current) == float(new)
+        except (TypeError, ValueError):
+            return False
+    return str(current).strip() == str(new)
+
+def diff_row(row: Dict[str, Any], current: Dict[str, Any], index: ReferenceIndex) -> Optional[Dict[str, Any]]:
+    """Narrow a staged row to the columns that differ from the asset; None when nothing does."""
+    payload = {}
+    changes = []
+    for field, value in row["payload"].items():
+        if _same(field, current.get(field), value):
+            continue
+        payload[field] = value
+        label = ID_FIELDS.get(field, field)
+        # assigned_user_id and assigned_user_name describe the same change
+        if any(change["field"] == label for change in changes):
+            continue
+        changes.append({
+            "field": label,
+            "old": index.display(field, current.get(field)),
+            "new": index.display(field, value)
+        })
+    if not payload:
+        return None
+    return {
+        "asset_id": row["asset_id"],
+        "asset_name": current.get("asset_name") or row.get("asset_name"),
+        "payload": payload,
+        "changes": changes
+    }
+
+def export_row(asset: Dict[str, Any]) -> List[Any]:
+    """One asset (with its ref_* embeds and assigned_user) as a sheet row in IMPORT_COLUMNS order.
+
+    Writes the stored values, so importing an unchanged export diffs to nothing.
+    """
+    def embedded(table: str, field: str) -> str:
+        return (asset.get(table) or {}).get(field) or ""
+
+    assigned_user_name = ""
+    if asset.get("owner_type") == "IT":
+        assigned_user_name = asset.get("assigned_user_name") or (asset.get("assigned_user") or {}).get("full_name") or ""
+    values = {
+        **{field: asset.get(field) for field in IMPORT_COLUMNS},
+        "category_name": embedded("ref_categories", "category_name"),
+        "type_name": embedded("ref_asset_types", "type_name"),
+        "company_name": embedded("ref_companies", "company_name"),
+        "business_unit_name": embedded("ref_business_units", "business_unit_name"),
+        "location_name": embedded("ref_locations", "location_name"),
+        "owner_name": embedded("ref_owners", "owner_name"),
+        "assigned_user_name": assigned_user_name
+    }
+    return [values[column] for column in IMPORT_COLUMNS]
+
+def fetch_snapshot(asset_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Current values of the importable columns for the given assets."""
+    snapshot = {}
+    supabase = get_supabase()
+    for start in range(0, len(asset_ids), SNAPSHOT_CHUNK_SIZE):
+        chunk = asset_ids[start:start + SNAPSHOT_CHUNK_SIZE]
+        response = supabase.table(TABLES["ASSETS"]).select(", ".join(SNAPSHOT_COLUMNS)).in_("asset_id", chunk).execute()
+        for asset in response.data or []:
+            snapshot[asset["asset_id"]] = asset
+    return snapshot
+
+def _header_map(header_row: Tuple[Any, ...], required: Tuple[str, ...] = REQUIRED_COLUMNS) -> Dict[int, str]:
+    columns = {}
+    for position, header in enumerate(header_row):
+        name = (_text(header) or "").lower().replace(" ", "_")
+        if name in IMPORT_COLUMNS and name not in columns.values():
+            columns[position] = name
+    missing = [name for name in required if name not in columns.values()]
+    if missing:
+        raise SheetError(f"Kolom wajib tidak ditemukan: {', '.join(missing)}")
+    return columns
+
+def _convert(values: Tuple[Any, ...], columns: Dict[int, str]) -> Tuple[Dict[str, Any], List[str]]:
+    data: Dict[str, Any] = {}
+    errors: List[str] = []
+    for position, field in columns.items():
+        value = values[position] if position < len(values) else None
+        try:
+            converter = CONVERTERS.get(field)
+            data[field] = converter(value) if converter else _text(value)
+        except (TypeError, ValueError):
+            errors.append(f"{field}: invalid value '{value}'")
+            data[field] = None
+    return data, errors
+
+def parse_row(values: Tuple[Any, ...], columns: Dict[int, str], index: ReferenceIndex) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """One sheet row -> (staged row with its assets payload, errors); (None, []) for blank rows."""
+    data, errors = _convert(values, columns)
+
+    if data.get("asset_id") is None:
+        if errors or any(v is not None for v in data.values()):
+            errors.append("asset_id is required")
+            return None, errors
+        return None, []
+
+    ids, reference_errors = index.resolve(data)
+    errors.extend(reference_errors)
+    if errors:
+        return None, errors
+
+    payload = dict(ids)
+    for field in DIRECT_FIELDS:
+        if data.get(field) is not None:
+            payload[field] = data[field]
+    data["payload"] = payload
+    return data, []
+
+def parse_new_row(values: Tuple[Any, ...], columns: Dict[int, str], index: ReferenceIndex) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """One create-mode sheet row -> (new asset row by name, errors); (None, []) for blank rows."""
+    data, errors = _convert(values, columns)
+    for field in CREATE_IGNORED_COLUMNS:
+        data.pop(field, None)
+    if not errors and all(value is None for value in data.values()):
+        return None, []
+
+    errors.extend(f"{field} is required" for field in CREATE_REQUIRED_COLUMNS if data.get(field) is None)
+    _, reference_errors = index.resolve(data)
+    errors.extend(reference_errors)
+    if errors:
+        return None, errors
+    return data, []
+
+def iter_sheet(fileobj, index: ReferenceIndex, parse=parse_row,
+               required: Tuple[str, ...] = REQUIRED_COLUMNS) -> Iterator[Tuple[int, Optional[Dict[str, Any]], List[str]]]:
+    """Yield (row_num, row, errors) for every non-blank data row of the first sheet."""
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise SheetError("File kosong")
+        columns = _header_map(header, required)
+        for row_num, values in enumerate(rows, 2):
+            row, errors = parse(values, columns, index)
+            if row is not None or errors:
+                yield row_num, row, errors
+    finally:
+        workbook.close()
+
+def stage_sheet(fileobj, batch_id: str, index: Optional[ReferenceIndex] = None) -> Dict[str, int]:
+    """Parse an upload into a staging batch, diffing and flushing every STAGE_CHUNK_SIZE rows."""
+    index = index or ReferenceIndex.load()
+    parsed: List[Tuple[int, Dict[str, Any]]] = []
+    errors: List[Tuple[int, str]] = []
+    counts = {"rows": 0, "unchanged": 0, "errors": 0}
+
+    def flush():
+        snapshot = fetch_snapshot([row["asset_id"] for _, row in parsed]) if parsed else {}
+        changed = []
+        for row_num, row in parsed:
+            current = snapshot.get(row["asset_id"])
+            if current is None:
+                errors.append((row_num, f"Asset ID {row['asset_id']} not found"))
+                continue
+            update = diff_row(row, current, index)
+            if update is None:
+                counts["unchanged"] += 1
+            else:
+                changed.append((row_num, update))
+        counts["rows"] += import_staging.add_rows(batch_id, changed)
+        counts["errors"] += import_staging.add_errors(batch_id, errors)
+        parsed.clear()
+        errors.clear()
+
+    for row_num, row, row_errors in iter_sheet(fileobj, index):
+        if row is not None:
+            parsed.append((row_num, row))
+        errors.extend((row_num, message) for message in row_errors)
+        if len(parsed) + len(errors) >= STAGE_CHUNK_SIZE:
+            flush()
+    flush()
+    import_staging.update_meta(batch_id, unchanged=counts["unchanged"])
+    logging.info(
+        f"Staged import {batch_id}: {counts['rows']} changed, "
+        f"{counts['unchanged']} unchanged, {counts['errors']} errors"
+    )
+    return counts
+
+def stage_new_sheet(fileobj, batch_id: str, index: Optional[ReferenceIndex] = None) -> Dict[str, int]:
+    """Parse a create-mode upload into a staging batch, flushing every STAGE_CHUNK_SIZE rows."""
+    index = index or ReferenceIndex.load()
+    rows: List[Tuple[int, Dict[str, Any]]] = []
+    errors: List[Tuple[int, str]] = []
+    counts = {"rows": 0, "errors": 0}
+
+    def flush():
+        counts["rows"] += import_staging.add_rows(batch_id, rows)
+        counts["errors"] += import_staging.add_errors(batch_id, errors)
+        rows.clear()
+        errors.clear()
+
+    for row_num, row, row_errors in iter_sheet(fileobj, index, parse_new_row, CREATE_REQUIRED_COLUMNS):
+        if row is not None:
+            rows.append((row_num, row))
+        errors.extend((row_num, message) for message in row_errors)
+        if len(rows) + len(errors) >= STAGE_CHUNK_SIZE:
+            flush()
+    flush()
+    logging.info(f"Staged new assets {batch_id}: {counts['rows']} rows, {counts['errors']} errors")
+    return counts
@@ -29,6 +29,9 @@ CACHE_TTL = {
     'reference': 60
 }
 
+# Bumped on every write the app makes; keys rendered fragments and ETags to the data they show
+_data_version = 0
+
 def get_supabase():
     return supabase_client.client
 
@@ -295,6 +298,31 @@ def get_next_asset_id():
         logging.error(f"Error getting next asset ID: {str(e)}")
         return 1  # Fallback to 1
 
+# Columns of a new asset row, as approve_and_create_asset(s) expect them
+NEW_ASSET_COLUMNS = [
+    'asset_name', 'category_id', 'asset_type_id', 'manufacture', 'model', 'serial_number',
+    'company_id', 'business_unit_id', 'location_id', 'room_name', 'notes', 'item_condition',
+    'purchase_date', 'purchase_cost', 'warranty', 'supplier', 'journal', 'owner_id', 'status',
+    'photo_url', 'asset_tag', 'residual_percent', 'residual_value', 'useful_life',
+    'depreciation_value', 'book_value', 'year', 'assigned_user_id', 'assigned_user_name', 'owner_type'
+]
+
+def reserve_asset_tags(prefix, count=1):
+    """Reserve count consecutive sequence numbers for an asset tag prefix; returns the first.
+
+    The reserve_asset_tags RPC hands out blocks atomically; without it this
+    falls back to counting the existing tags, as tags were numbered before.
+    """
+    supabase = get_supabase()
+    try:
+        response = supabase.rpc('reserve_asset_tags', {'prefix_in': prefix, 'count_in': count}).execute()
+        if response.data is not None:
+            return int(response.data)
+    except Exception as e:
+        logging.warning(f"reserve_asset_tags unavailable, counting tags instead: {str(e)}")
+    existing = supabase.table(TABLES['ASSETS']).select('asset_tag', count='exact').like('asset_tag', f"{prefix}%").execute()
+    return (existing.count or 0) + 1
+
 def prepare_asset_data(asset_data):
     """Takes raw asset data and prepares it for insertion by resolving foreign keys and calculating values."""
     try:
@@ -347,11 +375,9 @@ def prepare_asset_data(asset_data):
                 year_2digit = str(year)[-2:]
                 
                 if all([code_company, code_category, code_type, code_owner]):
-                    pattern = f"{code_company}-{code_category}{code_type}.{code_owner}{year_2digit}.%"
-                    # Use count='exact' for better performance and accuracy
-                    existing = supabase.table(TABLES['ASSETS']).select('asset_tag', count='exact').like('asset_tag', pattern).execute()
-                    seq_num = str(existing.count + 1).zfill(3)
-                    return f"{code_company}-{code_category}{code_type}.{code_owner}{year_2digit}.{seq_num}"
+                    prefix = f"{code_company}-{code_category}{code_type}.{code_owner}{year_2digit}."
+                    seq_num = str(reserve_asset_tags(prefix)).zfill(3)
+                    return f"{prefix}{seq_num}"
             except Exception as e:
                 logging.error(f"Error generating asset tag: {str(e)}")
             return None
@@ -430,14 +456,7 @@ def prepare_asset_data(asset_data):
                 logging.warning(f"Could not resolve assigned_user_name '{user_name}' to user_id")
         
         # Ensure all keys that the SQL function expects are present, even if None
-        all_expected_keys = [
-            'asset_name', 'category_id', 'asset_type_id', 'manufacture', 'model', 'serial_number',
-            'company_id', 'business_unit_id', 'location_id', 'room_name', 'notes', 'item_condition',
-            'purchase_date', 'purchase_cost', 'warranty', 'supplier', 'journal', 'owner_id', 'status',
-            'photo_url', 'asset_tag', 'residual_percent', 'residual_value', 'useful_life',
-            'depreciation_value', 'book_value', 'year', 'assigned_user_id', 'assigned_user_name', 'owner_type'
-        ]
-        for key in all_expected_keys:
+        for key in NEW_ASSET_COLUMNS:
             if key not in processed_data:
                 processed_data[key] = None
 
@@ -452,6 +471,8 @@ def update_asset(asset_id, update_data):
         supabase = get_supabase()
         response = supabase.table(TABLES['ASSETS']).update(update_data).eq('asset_id', asset_id).execute()
         invalidate_cache()
+        from app.utils.event_bus import event_bus
+        event_bus.publish("asset_updated", asset_id=asset_id, fields=sorted(update_data))
         return True
     except Exception as e:
         logging.error(f"Error updating asset: {str(e)}")
@@ -467,10 +488,21 @@ def get_all_approvals():
         return []
 
 def add_approval_request(approval_data):
+    """Insert an approval request; returns the inserted row (truthy), or False on failure."""
     try:
         supabase = get_supabase()
         response = supabase.table(TABLES['APPROVALS']).insert(approval_data).execute()
-        return True
+        bump_data_version()
+        from app.utils.approval_counters import pending_counters
+        from app.utils.event_bus import event_bus
+        approval = response.data[0] if response.data else approval_data
+        submitter_role = pending_counters.record_submitted(approval)
+        event_bus.publish(
+            "approval_submitted", approval_id=approval.get("approval_id"), type=approval.get("type"),
+            asset_id=approval.get("asset_id"), asset_name=approval.get("asset_name"),
+            submitted_by=approval.get("submitted_by"), submitter_role=submitter_role
+        )
+        return approval
     except Exception as e:
         logging.error(f"Error adding approval request: {str(e)}")
         return False
@@ -488,6 +520,7 @@ def update_approval_status(approval_id, status, approved_by, approved_by_name=''
         response = supabase.table(TABLES['APPROVALS']).update(update_data).eq('approval_id', approval_id).execute()
         logging.info(f"Approval update response for ID {approval_id}: {response.data}")
         if response.data:
+            bump_data_version()
             return True
         else:
             logging.warning(f"Approval update for ID {approval_id} did not return data. Update may have failed silently.")
@@ -547,7 +580,8 @@ def get_summary_data():
         "total_assets": len(assets)
     }
 
-def get_chart_data(owner_type=None):
+def get_chart_data(owner_type=None, include_activity=True):
+    """Chart aggregates; include_activity=False skips the five log table queries."""
     assets = get_all_assets()
     
     # Filter by owner_type if specified
@@ -555,7 +589,6 @@ def get_chart_data(owner_type=None):
         assets = [asset for asset in assets if asset.get("owner_type") == owner_type]
     
     now = datetime.now()
-    supabase = get_supabase()
     
 
     
@@ -613,68 +646,71 @@ def get_chart_data(owner_type=None):
         for activity in activity_data.values():
             activity['quarterly'][quarter_key] = 0
 
-    # Get data from log tables
-    try:
-        # Process activity logs with same date filtering as asset additions
-        start_date_monthly = now - relativedelta(months=12)
-        
-        # Get all log data directly from tables
-        damage_logs = supabase.table('damage_log').select('created_at').gte('created_at', start_date_monthly.isoformat()).execute().data or []
-        repair_logs = supabase.table('repair_log').select('created_at').gte('created_at', start_date_monthly.isoformat()).execute().data or []
-        relocation_logs = supabase.table('relocation_log').select('created_at').gte('created_at', start_date_monthly.isoformat()).execute().data or []
-        disposal_logs = supabase.table('disposal_log').select('approved_at').gte('approved_at', start_date_monthly.isoformat()).execute().data or []
-        lost_logs = supabase.table('lost_log').select('created_at').gte('created_at', start_date_monthly.isoformat()).execute().data or []
-        
-        # Process each log type
-        log_types = [
-            (damage_logs, 'damaged'),
-            (repair_logs, 'repaired'), 
-            (relocation_logs, 'relocated'),
-            (disposal_logs, 'disposed'),
-            (lost_logs, 'lost')
-        ]
-        
-        for logs, activity_type in log_types:
-            if activity_type not in activity_data:
-                activity_data[activity_type] = {'monthly': {}, 'quarterly': {}, 'yearly': {}}
-                # Initialize periods for new activity type
-                for i in range(11, -1, -1):
-                    month = (now.replace(day=1) - relativedelta(months=i)).strftime("%b %Y")
-                    activity_data[activity_type]['monthly'][month] = 0
-                for i in range(3, -1, -1):
-                    year = now.year
-                    quarter = ((now.month - 1) // 3 + 1) - i
-                    if quarter <= 0:
-                        year -= 1
-                        quarter += 4
-                    quarter_key = f"Q{quarter} {year}"
-                    activity_data[activity_type]['quarterly'][quarter_key] = 0
+    # Get data from log tables (skipped when only asset aggregates are needed)
+    if include_activity:
+        try:
+            supabase = get_supabase()
+
+            # Process activity logs with same date filtering as asset additions
+            start_date_monthly = now - relativedelta(months=12)
+        
+            # Get all log data directly from tables
+            damage_logs = supabase.table('damage_log').select('created_at').gte('created_at', start_date_monthly.isoformat()).execute().data or []
+            repair_logs = supabase.table('repair_log').select('created_at').gte('created_at', start_date_monthly.isoformat()).execute().data or []
+            relocation_logs = supabase.table('relocation_log').select('created_at').gte('created_at', start_date_monthly.isoformat()).execute().data or []
+            disposal_logs = supabase.table('disposal_log').select('approved_at').gte('approved_at', start_date_monthly.isoformat()).execute().data or []
+            lost_logs = supabase.table('lost_log').select('created_at').gte('created_at', start_date_monthly.isoformat()).execute().data or []
+        
+            # Process each log type
+            log_types = [
+                (damage_logs, 'damaged'),
+                (repair_logs, 'repaired'), 
+                (relocation_logs, 'relocated'),
+                (disposal_logs, 'disposed'),
+                (lost_logs, 'lost')
+            ]
+        
+            for logs, activity_type in log_types:
+                if activity_type not in activity_data:
+                    activity_data[activity_type] = {'monthly': {}, 'quarterly': {}, 'yearly': {}}
+                    # Initialize periods for new activity type
+                    for i in range(11, -1, -1):
+                        month = (now.replace(day=1) - relativedelta(months=i)).strftime("%b %Y")
+                        activity_data[activity_type]['monthly'][month] = 0
+                    for i in range(3, -1, -1):
+                        year = now.year
+                        quarter = ((now.month - 1) // 3 + 1) - i
+                        if quarter <= 0:
+                            year -= 1
+                            quarter += 4
+                        quarter_key = f"Q{quarter} {year}"
+                        activity_data[activity_type]['quarterly'][quarter_key] = 0
             
-            # Determine which date column to use
-            date_column = 'approved_at' if activity_type == 'disposed' else 'created_at'
+                # Determine which date column to use
+                date_column = 'approved_at' if activity_type == 'disposed' else 'created_at'
             
-            for log in logs:
-                date_str = log.get(date_column)
-                if date_str:
-                    try:
-                        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                        month_key = dt.strftime("%b %Y")
-                        quarter_key = f"Q{(dt.month - 1) // 3 + 1} {dt.year}"
-                        year_key = str(dt.year)
+                for log in logs:
+                    date_str = log.get(date_column)
+                    if date_str:
+                        try:
+                            dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+                            month_key = dt.strftime("%b %Y")
+                            quarter_key = f"Q{(dt.month - 1) // 3 + 1} {dt.year}"
+                            year_key = str(dt.year)
                         
-                        if month_key in activity_data[activity_type]['monthly']:
-                            activity_data[activity_type]['monthly'][month_key] += 1
-                        if quarter_key in activity_data[activity_type]['quarterly']:
-                            activity_data[activity_type]['quarterly'][quarter_key] += 1
-                        activity_data[activity_type]['yearly'][year_key] = activity_data[activity_type]['yearly'].get(year_key, 0) + 1
-                    except Exception as e:
-                        logging.error(f"Error parsing date {date_str}: {e}")
-                        continue
+                            if month_key in activity_data[activity_type]['monthly']:
+                                activity_data[activity_type]['monthly'][month_key] += 1
+                            if quarter_key in activity_data[activity_type]['quarterly']:
+                                activity_data[activity_type]['quarterly'][quarter_key] += 1
+                            activity_data[activity_type]['yearly'][year_key] = activity_data[activity_type]['yearly'].get(year_key, 0) + 1
+                        except Exception as e:
+                            logging.error(f"Error parsing date {date_str}: {e}")
+                            continue
         
 
         
-    except Exception as e:
-        logging.error(f"Error getting activity data from logs: {str(e)}")
+        except Exception as e:
+            logging.error(f"Error getting activity data from logs: {str(e)}")
 
     # Count assets by purchase_date for asset additions
     for asset in assets:
@@ -772,8 +808,17 @@ def test_database_connection():
             'tables': list(TABLES.values())
         }
 
+def get_data_version():
+    return _data_version
+
+def bump_data_version():
+    """Mark data as changed (ETags, rendered fragments) without dropping cached queries."""
+    global _data_version
+    _data_version += 1
+
 def invalidate_cache():
     cache.invalidate_all()
+    bump_data_version()
     logging.info("Cache invalidated, data will be refreshed from database")
 
 def update_approval_status(approval_id, status, approved_by, approved_by_name='', notes=''):
@@ -789,6 +834,7 @@ def update_approval_status(approval_id, status, approved_by, approved_by_name=''
         response = supabase.table(TABLES['APPROVALS']).update(update_data).eq('approval_id', approval_id).execute()
         logging.info(f"Approval update response for ID {approval_id}: {response.data}")
         if response.data:
+            bump_data_version()
             return True
         else:
             logging.warning(f"Approval update for ID {approval_id} did not return data. Update may have failed silently.")
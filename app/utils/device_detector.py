@@ -4,9 +4,13 @@ Detects mobile vs desktop devices and routes to appropriate templates
 """
 
 import re
+from functools import lru_cache
 from typing import Optional
 from fastapi import Request
 
+# Distinct User-Agent strings are few, so a bounded cache absorbs nearly all lookups
+USER_AGENT_CACHE_SIZE = 1024
+
 class DeviceDetector:
     """Utility class to detect device type and route templates accordingly"""
     
@@ -23,31 +27,64 @@ class DeviceDetector:
         r'PlayBook', r'Tablet'
     ]
     
+    # All patterns combined into one case-insensitive regex, compiled once
+    DEVICE_REGEX = re.compile('|'.join(MOBILE_PATTERNS + TABLET_PATTERNS), re.IGNORECASE)
+    
+    @staticmethod
+    @lru_cache(maxsize=USER_AGENT_CACHE_SIZE)
+    def is_mobile_user_agent(user_agent: str) -> bool:
+        """
+        Classify a User-Agent string (cached per distinct string)
+        
+        Args:
+            user_agent: Raw User-Agent header value
+            
+        Returns:
+            bool: True if the User-Agent matches a mobile or tablet pattern
+        """
+        return DeviceDetector.DEVICE_REGEX.search(user_agent) is not None
+    
     @classmethod
     def is_mobile_device(cls, request: Request) -> bool:
         """
         Detect if the request is from a mobile device
         
+        Reuses request.state.device_type when DeviceDetectionMiddleware
+        already classified the request.
+        
         Args:
             request: FastAPI Request object
             
         Returns:
             bool: True if mobile device, False otherwise
         """
-        user_agent = request.headers.get('user-agent', '').lower()
+        device_type = getattr(request.state, 'device_type', None)
+        if device_type:
+            return device_type == 'mobile'
         
+        return cls.classify_headers(request.headers) == 'mobile'
+    
+    @classmethod
+    def classify_headers(cls, headers) -> str:
+        """
+        Classify request headers as 'mobile' or 'desktop'
+        
+        Args:
+            headers: Request headers mapping
+            
+        Returns:
+            str: 'mobile' or 'desktop'
+        """
         # Check for mobile patterns
-        mobile_patterns = cls.MOBILE_PATTERNS + cls.TABLET_PATTERNS
-        for pattern in mobile_patterns:
-            if re.search(pattern.lower(), user_agent):
-                return True
+        if cls.is_mobile_user_agent(headers.get('user-agent', '')):
+            return 'mobile'
         
         # Check screen width if available (from JavaScript)
-        screen_width = request.headers.get('x-screen-width')
-        if screen_width and int(screen_width) < 768:
-            return True
+        screen_width = headers.get('x-screen-width')
+        if screen_width and screen_width.isdigit() and int(screen_width) < 768:
+            return 'mobile'
             
-        return False
+        return 'desktop'
     
     @classmethod
     def get_template_path(cls, request: Request, base_template: str) -> str:
@@ -134,6 +171,10 @@ def get_device_info(request: Request) -> dict:
     Returns:
         dict: Device information
     """
+    device_info = getattr(request.state, 'device_info', None)
+    if device_info:
+        return device_info
+    
     user_agent = request.headers.get('user-agent', '')
     device_type = DeviceDetector.get_device_type(request)
     
@@ -0,0 +1,107 @@
+"""
+In-process event bus for Server-Sent Events
+Approval submissions, approvals, rejections and asset updates are published
+here and fanned out to the /events streams of this worker. Each connection
+has a small bounded queue; when a slow client falls behind, its oldest
+events are dropped and it is told to resync (reload) instead of the worker
+buffering without limit. An idle connection costs one queue and one
+sleeping task.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+from app.utils.approval_queries import can_approve
+
+BUFFER_SIZE = 32
+MAX_SUBSCRIBERS = 1000
+
+APPROVAL_EVENTS = ("approval_submitted", "approval_approved", "approval_rejected")
+ASSET_EVENTS = ("asset_updated",)
+
+class Subscriber:
+    """One SSE connection: who is listening and what is waiting to be sent."""
+
+    def __init__(self, profile_id: str, role: str, buffer_size: int = BUFFER_SIZE):
+        self.profile_id = profile_id
+        self.role = role
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.lagged = False
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        """Staff see their own requests; approvers see what they could act on or already did."""
+        if event["event"] in ASSET_EVENTS:
+            return True
+        if event.get("submitted_by") == self.profile_id:
+            return True
+        if self.role in ("admin", "manager"):
+            return event["event"] != "approval_submitted" or can_approve(self.role, event.get("submitter_role") or "staff")
+        return False
+
+    def offer(self, event: Dict[str, Any]):
+        if self.queue.full():
+            # Drop the oldest event; the client reloads on "resync"
+            self.queue.get_nowait()
+            self.lagged = True
+        self.queue.put_nowait(event)
+
+class EventBus:
+    """Publish from any thread; subscribers live on the worker's event loop."""
+
+    def __init__(self, max_subscribers: int = MAX_SUBSCRIBERS):
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, profile_id: str, role: str) -> Optional[Subscriber]:
+        """Register a connection; None when the worker is at MAX_SUBSCRIBERS."""
+        with self._lock:
+            if len(self._subscribers) >= self._max_subscribers:
+                return None
+            self._loop = asyncio.get_running_loop()
+            subscriber = Subscriber(profile_id, getattr(role, "value", role))
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def is_full(self) -> bool:
+        return len(self._subscribers) >= self._max_subscribers
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _dispatch(self, event: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if subscriber.wants(event):
+                subscriber.offer(event)
+
+    def publish(self, event_type: str, **data):
+        """Queue an event for every interested connection; never blocks the caller."""
+        if not self._subscribers or self._loop is None:
+            return
+        event = {"event": event_type, "ts": time.time(), **data}
+        self.published += 1
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        try:
+            if running is self._loop:
+                self._dispatch(event)
+            else:
+                # Sync routes run in the threadpool
+                self._loop.call_soon_threadsafe(self._dispatch, event)
+        except RuntimeError as e:
+            logging.warning(f"Dropping {event_type} event: {str(e)}")
+
+event_bus = EventBus()
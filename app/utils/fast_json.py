@@ -0,0 +1,100 @@
+"""
+Fast JSON serialization
+orjson is used when installed; JSON_BACKEND=json forces the stdlib encoder.
+Both backends write date/datetime as ISO 8601 strings and Decimal as a
+number, so API responses and {{ value | tojson }} look the same either way.
+
+Benchmark on the real asset list:  python -m app.utils.fast_json
+"""
+import datetime
+import decimal
+import json
+import logging
+import os
+import uuid
+from typing import Any, Callable, Dict
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "orjson" if orjson else "json").lower()
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles out of the box (and dates for the stdlib)."""
+    if isinstance(obj, decimal.Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _orjson_dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+BACKENDS: Dict[str, Callable[[Any], bytes]] = {"json": _stdlib_dumps}
+if orjson:
+    BACKENDS["orjson"] = _orjson_dumps
+
+if JSON_BACKEND not in BACKENDS:
+    logging.warning(f"JSON backend '{JSON_BACKEND}' unavailable, using stdlib json")
+    JSON_BACKEND = "json"
+
+dumps: Callable[[Any], bytes] = BACKENDS[JSON_BACKEND]
+
+def dumps_str(obj: Any, **kwargs) -> str:
+    """str variant used as Jinja's json.dumps_function (kwargs are ignored)."""
+    return dumps(obj).decode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured fast backend."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def benchmark(payload: Any, rounds: int = 50) -> Dict[str, Dict[str, float]]:
+    """Time every available backend, plus the old json.dumps call, on payload."""
+    import time
+
+    candidates = dict(BACKENDS)
+    # What JSONResponse/tojson did before this module (no date/Decimal support)
+    candidates["stdlib_default"] = lambda obj: json.dumps(obj, default=str).encode("utf-8")
+
+    results = {}
+    for name, encode in candidates.items():
+        size = len(encode(payload))
+        start = time.perf_counter()
+        for _ in range(rounds):
+            encode(payload)
+        elapsed = (time.perf_counter() - start) / rounds
+        results[name] = {"ms_per_call": round(elapsed * 1000, 3), "bytes": size}
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoders on asset payloads")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--file", help="JSON file with a saved asset list instead of Supabase")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            assets = json.load(f)
+    else:
+        from app.utils.database_manager import get_all_assets
+        assets = get_all_assets()
+
+    print(f"{len(assets)} assets, {args.rounds} rounds, active backend: {JSON_BACKEND}")
+    for name, result in benchmark(assets, args.rounds).items():
+        print(f"  {name:15} {result['ms_per_call']:>9} ms/call  {result['bytes']:>10} bytes")
@@ -0,0 +1,68 @@
+"""
+Rendered template fragment cache.
+
+Routes render a fragment once and keep the HTML here under a key they build
+from the fragment name plus whatever changes its output (device type,
+owner_type filter, role, data version):
+
+    html = fragment_cache.get(key)
+    if html is None:
+        html = template.render(...)
+        fragment_cache.set(key, html)
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class FragmentCache:
+    """Thread-safe LRU cache of rendered HTML with a TTL."""
+
+    def __init__(self, max_entries: int = 256, ttl: int = 60):
+        self._entries: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expiry = entry
+            if expiry < time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# TTL matches the asset cache so fragments never outlive the data behind them
+fragment_cache = FragmentCache(max_entries=256, ttl=60)
+
@@ -0,0 +1,202 @@
+"""
+Staging store for spreadsheet imports
+Parsed bulk-update rows live in a local SQLite file between the preview
+and confirm steps, keyed by an opaque batch id, instead of in the
+session. Batches belong to the admin who uploaded them and expire after
+IMPORT_STAGING_TTL seconds. Each worker opens its own connections, and
+SQLite's locking keeps concurrent uploads safe.
+"""
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.utils import fast_json
+
+STAGING_DB_PATH = os.getenv(
+    "IMPORT_STAGING_DB",
+    os.path.join(tempfile.gettempdir(), "ambp_import_staging.sqlite3")
+)
+STAGING_TTL = int(os.getenv("IMPORT_STAGING_TTL", "3600"))
+INSERT_CHUNK_SIZE = 1000
+
+_SCHEMA = """
+create table if not exists batches (
+    batch_id text primary key,
+    owner_id text not null,
+    kind text not null,
+    created_at real not null,
+    expires_at real not null,
+    meta text not null default '{}'
+);
+create table if not exists batch_rows (
+    batch_id text not null references batches(batch_id) on delete cascade,
+    row_num integer not null,
+    data text not null,
+    primary key (batch_id, row_num)
+);
+create table if not exists batch_errors (
+    batch_id text not null references batches(batch_id) on delete cascade,
+    row_num integer,
+    message text not null
+);
+create index if not exists batch_errors_batch on batch_errors(batch_id, row_num);
+create index if not exists batches_expiry on batches(expires_at);
+"""
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class ImportStagingStore:
+    """SQLite-backed import batches with a TTL."""
+
+    def __init__(self, path: str = STAGING_DB_PATH, ttl: int = STAGING_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    with sqlite3.connect(self.path, timeout=30) as conn:
+                        conn.execute("pragma journal_mode=wal")
+                        conn.executescript(_SCHEMA)
+                    self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("pragma foreign_keys=on")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create_batch(self, owner_id: str, kind: str = "update", meta: Optional[Dict[str, Any]] = None) -> str:
+        """Start an empty batch and return its id; expired batches are purged here."""
+        self.purge_expired()
+        batch_id = secrets.token_urlsafe(16)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "insert into batches (batch_id, owner_id, kind, created_at, expires_at, meta) values (?, ?, ?, ?, ?, ?)",
+                (batch_id, str(owner_id), kind, now, now + self.ttl, json.dumps(meta or {}))
+            )
+        return batch_id
+
+    def add_rows(self, batch_id: str, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> int:
+        """Stage (row_num, data) pairs; returns how many were written."""
+        written = 0
+        with self._connect() as conn:
+            for chunk in _chunks(rows, INSERT_CHUNK_SIZE):
+                conn.executemany(
+                    "insert or replace into batch_rows (batch_id, row_num, data) values (?, ?, ?)",
+                    [(batch_id, row_num, fast_json.dumps_str(data)) for row_num, data in chunk]
+                )
+                written += len(chunk)
+        return written
+
+    def add_errors(self, batch_id: str, errors: Iterable[Tuple[Optional[int], str]]) -> int:
+        written = 0
+        with self._connect() as conn:
+            for chunk in _chunks(errors, INSERT_CHUNK_SIZE):
+                conn.executemany(
+                    "insert into batch_errors (batch_id, row_num, message) values (?, ?, ?)",
+                    [(batch_id, row_num, message) for row_num, message in chunk]
+                )
+                written += len(chunk)
+        return written
+
+    def update_meta(self, batch_id: str, **values):
+        with self._connect() as conn:
+            row = conn.execute("select meta from batches where batch_id = ?", (batch_id,)).fetchone()
+            if row is None:
+                return
+            meta = json.loads(row["meta"])
+            meta.update(values)
+            conn.execute("update batches set meta = ? where batch_id = ?", (json.dumps(meta), batch_id))
+
+    def get_batch(self, batch_id: str, owner_id: str) -> Optional[Dict[str, Any]]:
+        """Batch summary, or None when it is unknown, expired or someone else's."""
+        if not batch_id:
+            return None
+        with self._connect() as conn:
+            row = conn.execute(
+                "select * from batches where batch_id = ? and owner_id = ? and expires_at > ?",
+                (batch_id, str(owner_id), time.time())
+            ).fetchone()
+            if row is None:
+                return None
+            total = conn.execute("select count(*) from batch_rows where batch_id = ?", (batch_id,)).fetchone()[0]
+            error_count = conn.execute("select count(*) from batch_errors where batch_id = ?", (batch_id,)).fetchone()[0]
+        return {
+            "batch_id": row["batch_id"],
+            "kind": row["kind"],
+            "created_at": row["created_at"],
+            "expires_at": row["expires_at"],
+            "meta": json.loads(row["meta"]),
+            "total": total,
+            "error_count": error_count
+        }
+
+    def page_rows(self, batch_id: str, offset: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """One preview page of staged rows, in sheet order."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "select row_num, data from batch_rows where batch_id = ? order by row_num limit ? offset ?",
+                (batch_id, limit, offset)
+            ).fetchall()
+        return [dict(json.loads(row["data"]), row_num=row["row_num"]) for row in rows]
+
+    def iter_rows(self, batch_id: str, chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Every staged row, read in keyset chunks so memory stays flat."""
+        last_row = -1
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "select row_num, data from batch_rows where batch_id = ? and row_num > ? order by row_num limit ?",
+                    (batch_id, last_row, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(json.loads(row["data"]), row_num=row["row_num"])
+            last_row = rows[-1]["row_num"]
+
+    def errors(self, batch_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "select row_num, message from batch_errors where batch_id = ? order by row_num limit ?",
+                (batch_id, limit)
+            ).fetchall()
+        return [{"row_num": row["row_num"], "message": row["message"]} for row in rows]
+
+    def delete_batch(self, batch_id: str):
+        with self._connect() as conn:
+            conn.execute("delete from batches where batch_id = ?", (batch_id,))
+
+    def purge_expired(self) -> int:
+        try:
+            with self._connect() as conn:
+                return conn.execute("delete from batches where expires_at <= ?", (time.time(),)).rowcount
+        except sqlite3.Error as e:
+            logging.error(f"Error purging import staging: {str(e)}")
+            return 0
+
+import_staging = ImportStagingStore()
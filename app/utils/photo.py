@@ -1,11 +1,15 @@
 # app/utils/photo.py
 import io
 import os
-import json
 import logging
+import queue
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from typing import Optional, Tuple
 
 from google.oauth2.service_account import Credentials
+from starlette.concurrency import run_in_threadpool
 from google.auth.transport.requests import Request
 
 # Constants
@@ -13,15 +17,41 @@ DRIVE_SCOPE = ['https://www.googleapis.com/auth/drive.file']
 MAX_IMAGE_SIZE = (800, 600)
 WEBP_QUALITY = 85
 
+# Background uploads
+UPLOAD_WORKERS = int(os.getenv("PHOTO_UPLOAD_WORKERS", "2"))
+MAX_PENDING_UPLOADS = int(os.getenv("PHOTO_UPLOAD_QUEUE_SIZE", "100"))
+RETRY_DELAYS = (5, 30, 120)  # seconds before each retry; attempts = len + 1
+
+_session: Optional[requests.Session] = None
+_credentials: Optional[Credentials] = None
+_auth_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session for Google APIs (token, upload, permission calls)."""
+    global _session
+    if _session is None:
+        with _auth_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(UPLOAD_WORKERS * 2, 4))
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
 def get_access_token():
-    """Get Google Drive access token"""
+    """Get Google Drive access token, refreshing only when the cached one has expired"""
+    global _credentials
     try:
-        from app.config import load_config
-        config = load_config()
-        creds_json = config.GOOGLE_CREDS_JSON
-        
-        credentials = Credentials.from_service_account_info(creds_json, scopes=DRIVE_SCOPE)
-        credentials.refresh(Request())
+        with _auth_lock:
+            if _credentials is None:
+                from app.config import load_config
+                config = load_config()
+                _credentials = Credentials.from_service_account_info(config.GOOGLE_CREDS_JSON, scopes=DRIVE_SCOPE)
+            credentials = _credentials
+        if not credentials.valid:
+            with _auth_lock:
+                if not credentials.valid:
+                    credentials.refresh(Request(session=get_session()))
         return credentials.token
     except Exception as e:
         logging.error(f"Token error: {type(e).__name__}")
@@ -90,7 +120,7 @@ def _initiate_upload(access_token, filename, asset_id, image_data, folder_id, sh
         'X-Upload-Content-Length': str(len(image_data.getvalue()))
     }
 
-    response = requests.post(
+    response = get_session().post(
         'https://www.googleapis.com/upload/drive/v3/files?uploadType=resumable&supportsAllDrives=true',
         headers=headers,
         json=file_metadata,
@@ -111,7 +141,7 @@ def _upload_file_data(upload_url, image_data):
         'Content-Length': str(len(image_data.getvalue()))
     }
 
-    response = requests.put(
+    response = get_session().put(
         upload_url,
         headers=headers,
         data=image_data.getvalue(),
@@ -127,7 +157,7 @@ def _upload_file_data(upload_url, image_data):
 def _set_public_permission(access_token, file_id):
     """Set file to public readable"""
     try:
-        requests.post(
+        get_session().post(
             f"https://www.googleapis.com/drive/v3/files/{file_id}/permissions?supportsAllDrives=true",
             headers={
                 'Authorization': f'Bearer {access_token}',
@@ -153,7 +183,7 @@ def delete_from_drive(image_url):
         if not access_token:
             return False
 
-        response = requests.delete(
+        response = get_session().delete(
             f"https://www.googleapis.com/drive/v3/files/{file_id}?supportsAllDrives=true",
             headers={'Authorization': f'Bearer {access_token}'},
             timeout=30
@@ -163,4 +193,135 @@ def delete_from_drive(image_url):
 
     except Exception as e:
         logging.error(f"Delete error: {type(e).__name__}")
-        return False
\ No newline at end of file
+        return False
+
+def _save_photo_url(target: Tuple[str, str], photo_url: str) -> None:
+    """Put a finished upload where the request that submitted it can see it.
+
+    ("profile", id) sets the profile photo. ("approval", id) hands it to
+    attach_photo(), which puts it on the asset once the request is approved;
+    if the request was rejected the file is deleted.
+    """
+    kind, target_id = target
+    if kind == "profile":
+        from app.utils.supabase_client import get_client
+        from app.utils.database_manager import bump_data_version
+        get_client("service").table("profiles").update({"photo_url": photo_url}).eq("id", target_id).execute()
+        bump_data_version()
+        return
+
+    from app.utils.approval_engine import attach_photo
+    if not attach_photo(int(target_id), photo_url):
+        logging.info(f"Approval {target_id} was rejected, removing its uploaded photo")
+        delete_from_drive(photo_url)
+
+class PhotoUploadQueue:
+    """Background Drive uploads for form submissions.
+
+    Handlers enqueue the photo bytes and a target and return immediately;
+    worker threads upload over the shared session and save the photo_url
+    with _save_photo_url. A failed upload is retried after RETRY_DELAYS;
+    retries still waiting when the queue stops count as failed. When
+    MAX_PENDING_UPLOADS are already waiting the photo is uploaded in the
+    thread pool while the request waits, as it did before the queue existed.
+    """
+
+    def __init__(self, workers: int = UPLOAD_WORKERS, max_pending: int = MAX_PENDING_UPLOADS):
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_pending)
+        self._workers = workers
+        self._threads = []
+        self._timers = set()
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Start the worker threads if they are not already running."""
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self._workers):
+                thread = threading.Thread(target=self._run, name=f"photo-upload-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Finish queued uploads, give up scheduled retries and stop the worker threads."""
+        with self._lock:
+            threads = self._threads
+            self._threads = []
+            timers = list(self._timers)
+            self._timers.clear()
+        for timer in timers:
+            timer.cancel()
+            self._give_up(timer.args[0], "the upload queue stopped before its retry")
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+    async def enqueue(self, image_data: bytes, filename: str, name: str, target: Tuple[str, str]) -> None:
+        """Upload image_data as AMBP_{name}_{filename} and save its URL to target."""
+        job = {"image_data": image_data, "filename": filename, "name": name, "target": target, "attempt": 0}
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            logging.warning(f"Photo upload queue full, uploading {filename} in the request")
+            await run_in_threadpool(self._process, job)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _retry(self, job: dict) -> None:
+        # Queued under the lock so stop() cannot slip its sentinels in first
+        with self._lock:
+            self._timers.discard(threading.current_thread())
+            running = bool(self._threads)
+            if running:
+                try:
+                    self._queue.put_nowait(job)
+                    return
+                except queue.Full:
+                    pass
+        if not running:
+            self._give_up(job, "the upload queue stopped before its retry")
+            return
+        self._process(job)
+
+    def _give_up(self, job: dict, reason: str) -> None:
+        self.failed += 1
+        logging.error(f"Photo upload for {job['target']} failed: {reason}")
+
+    def _process(self, job: dict) -> None:
+        try:
+            # A retry after a failed save reuses the file that was already uploaded
+            photo_url = job.get("photo_url") or upload_to_drive(job["image_data"], job["filename"], job["name"])
+            if photo_url:
+                job["photo_url"] = photo_url
+                _save_photo_url(job["target"], photo_url)
+                self.completed += 1
+                return
+        except Exception as e:
+            logging.error(f"Photo upload worker error: {type(e).__name__}: {str(e)}")
+
+        if job["attempt"] < len(RETRY_DELAYS):
+            delay = RETRY_DELAYS[job["attempt"]]
+            job["attempt"] += 1
+            logging.warning(f"Photo upload for {job['target']} failed, retry {job['attempt']} in {delay}s")
+            timer = threading.Timer(delay, self._retry, args=(job,))
+            timer.daemon = True
+            with self._lock:
+                self._timers.add(timer)
+            timer.start()
+        else:
+            self._give_up(job, f"gave up after {job['attempt'] + 1} attempts")
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            self._process(job)
+
+photo_upload_queue = PhotoUploadQueue()
@@ -1,13 +1,16 @@
-from supabase import create_client
 from app.config import load_config
+from app.utils.supabase_client import get_client
+from typing import Optional
 import logging
+import queue
+import threading
 
 config = load_config()
 
 def create_profile_if_not_exists(user_id: str, user_email: str, user_metadata: dict = None) -> bool:
     """Create profile only when explicitly needed (e.g., first login). Never updates existing profiles."""
     try:
-        admin_supabase = create_client(config.SUPABASE_URL, config.SUPABASE_SERVICE_KEY)
+        admin_supabase = get_client("service")
         
         # Check if profile exists
         response = admin_supabase.table("profiles").select("id").eq("id", user_id).execute()
@@ -49,7 +52,7 @@ _profile_cache = {}
 def protect_profile_data(user_id: str) -> bool:
     """Ensure profile data is not overwritten by external sources"""
     try:
-        admin_supabase = create_client(config.SUPABASE_URL, config.SUPABASE_SERVICE_KEY)
+        admin_supabase = get_client("service")
         
         # Get current profile
         response = admin_supabase.table("profiles").select("full_name, username, updated_at").eq("id", user_id).execute()
@@ -79,4 +82,79 @@ def protect_profile_data(user_id: str) -> bool:
         
     except Exception as e:
         logging.error(f"Failed to protect profile data: {type(e).__name__}")
-        return False
\ No newline at end of file
+        return False
+
+class ProfileProtectionQueue:
+    """Deduplicating background worker for protect_profile_data.
+
+    Token refreshes only enqueue the user id; the profiles select/update runs
+    on a worker thread so it never adds database round trips to a response.
+    A user id that is already waiting in the queue is not enqueued again.
+    Once stop() has run (lifespan shutdown) checks are dropped instead of
+    starting a new worker; the next token refresh schedules them again.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def start(self) -> None:
+        """Start the worker thread if it is not already running."""
+        with self._lock:
+            self._stopped = False
+            self._start_worker()
+
+    def _start_worker(self) -> None:
+        # Caller holds self._lock
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="profile-protection", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Drain queued checks and stop the worker thread; later enqueues are dropped."""
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+            self._thread = None
+            if thread and thread.is_alive():
+                self._queue.put(None)
+        if thread:
+            thread.join(timeout)
+
+    def enqueue(self, user_id: str) -> bool:
+        """Queue a protection check; returns False if one is already pending or the queue is stopped."""
+        if not user_id:
+            return False
+        # Under the lock so nothing lands behind stop()'s sentinel
+        with self._lock:
+            if self._stopped:
+                logging.info("Profile protection queue stopped, check dropped")
+                return False
+            if user_id in self._pending:
+                return False
+            self._pending.add(user_id)
+            self._start_worker()
+            self._queue.put(user_id)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            user_id = self._queue.get()
+            if user_id is None:
+                break
+            with self._lock:
+                self._pending.discard(user_id)
+            try:
+                protect_profile_data(user_id)
+            except Exception as e:
+                logging.error(f"Profile protection worker error: {type(e).__name__}")
+
+profile_protection_queue = ProfileProtectionQueue()
+
+def schedule_profile_protection(user_id: str) -> bool:
+    """Run protect_profile_data for user_id in the background."""
+    return profile_protection_queue.enqueue(user_id)
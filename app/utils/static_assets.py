@@ -0,0 +1,201 @@
+"""
+Static asset helpers
+precompress_static() writes .gz (and .br when brotli is installed) next to
+every compressible file under app/static; PrecompressedStaticFiles serves
+those variants to clients that accept them, so /static costs no CPU for
+compression. Run at build time with:  python -m app.utils.static_assets
+
+build_asset_manifest() content-hashes every static file. Templates link
+them with {{ static_url("img/logo.png") }} -> /static/img/logo.<hash>.png,
+which is served with an immutable one-year Cache-Control, and the service
+worker precaches the same hashed URLs.
+
+Third-party libraries live in versioned folders under vendor/ (for example
+vendor/htmx-2.0.4/). The folder name is their fingerprint: they keep their
+plain URLs, which is what vendored CSS uses for its fonts, and are served
+and precached as immutable like hashed files.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.middleware.compression import brotli, choose_encoding
+
+STATIC_DIR = "app/static"
+PRECOMPRESS_EXTENSIONS = (".js", ".css", ".json", ".svg", ".html", ".txt", ".map", ".ico")
+PRECOMPRESS_MIN_SIZE = 1024
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+SERVICE_WORKER_FILE = "service-worker.js"
+# Need stable URLs: the worker script itself and the PWA manifest
+UNHASHED_FILES = {SERVICE_WORKER_FILE, "manifest.json"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Folder names carry the library version, so their contents never change
+# and need no content hash
+VERSIONED_PREFIXES = ("vendor/",)
+
+_manifest: Optional[Dict[str, str]] = None   # "img/logo.png" -> "img/logo.1a2b3c4d.png"
+_hashed_to_source: Dict[str, str] = {}
+_manifest_lock = threading.Lock()
+
+def _hashed_name(path: str, digest: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+def build_asset_manifest(directory: str = STATIC_DIR) -> Dict[str, str]:
+    """Hash every static file (except generated .gz/.br) and remember the mapping."""
+    global _manifest, _hashed_to_source
+    manifest = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(tuple(ENCODING_SUFFIXES.values())):
+                continue
+            source = os.path.join(root, name)
+            path = os.path.relpath(source, directory).replace(os.sep, "/")
+            if path in UNHASHED_FILES:
+                continue
+            if path.startswith(VERSIONED_PREFIXES):
+                manifest[path] = path
+                continue
+            with open(source, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:10]
+            manifest[path] = _hashed_name(path, digest)
+
+    with _manifest_lock:
+        _manifest = manifest
+        _hashed_to_source = {hashed: path for path, hashed in manifest.items()}
+    logging.info(f"Fingerprinted {len(manifest)} static assets")
+    return manifest
+
+def get_asset_manifest() -> Dict[str, str]:
+    if _manifest is None:
+        build_asset_manifest()
+    return _manifest
+
+def static_url(path: str) -> str:
+    """Template helper: /static URL of path, fingerprinted when known."""
+    path = path.lstrip("/")
+    return f"/static/{get_asset_manifest().get(path, path)}"
+
+def static_exists(path: str) -> bool:
+    """Template helper: whether a (possibly build-generated) static file exists."""
+    return path.lstrip("/") in get_asset_manifest()
+
+def precache_manifest() -> Dict[str, object]:
+    """Hashed URLs for the service worker plus a version derived from them."""
+    urls = sorted(f"/static/{hashed}" for hashed in get_asset_manifest().values())
+    version = hashlib.sha256("\n".join(urls).encode("utf-8")).hexdigest()[:10]
+    return {"version": version, "assets": urls}
+
+def render_service_worker(directory: str = STATIC_DIR) -> str:
+    """Service worker source with the precache manifest injected.
+
+    The placeholder line keeps the raw file valid JavaScript; because the
+    injected manifest changes whenever an asset does, browsers install the
+    new worker and drop the old static cache.
+    """
+    with open(os.path.join(directory, SERVICE_WORKER_FILE), encoding="utf-8") as f:
+        source = f.read()
+    placeholder = 'const PRECACHE = {"version": "dev", "assets": []};'
+    return source.replace(placeholder, f"const PRECACHE = {json.dumps(precache_manifest())};", 1)
+
+def _is_stale(source: str, target: str) -> bool:
+    return not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(source)
+
+def precompress_static(directory: str = STATIC_DIR) -> int:
+    """Write missing or outdated .gz/.br variants; returns files written."""
+    start = time.perf_counter()
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            if os.path.getsize(source) < PRECOMPRESS_MIN_SIZE:
+                continue
+            try:
+                with open(source, "rb") as f:
+                    data = None
+                    if _is_stale(source, source + ".gz"):
+                        data = f.read()
+                        with open(source + ".gz", "wb") as out:
+                            out.write(gzip.compress(data, compresslevel=9, mtime=0))
+                        written += 1
+                    if brotli and _is_stale(source, source + ".br"):
+                        data = data if data is not None else f.read()
+                        with open(source + ".br", "wb") as out:
+                            out.write(brotli.compress(data, quality=11))
+                        written += 1
+            except OSError as e:
+                # Read-only deployments simply fall back to dynamic compression
+                logging.warning(f"Could not precompress {source}: {e}")
+    logging.info(f"Precompressed {written} static files in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return written
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """'"abc"' -> '"abc-br"' / '"abc-gz"': the ETag of an encoded variant."""
+    suffix = "-" + ENCODING_SUFFIXES[encoding].lstrip(".")
+    if etag.endswith('"'):
+        return etag[:-1] + suffix + '"'
+    return etag + suffix
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that resolves fingerprinted names and answers with a
+    .br/.gz sibling when the client accepts it.
+
+    Fingerprinted URLs (including versioned vendor/ files) get an immutable
+    one-year Cache-Control; plain URLs are revalidated (ETag) on every use.
+    """
+
+    async def get_response(self, path: str, scope):
+        get_asset_manifest()
+        source = _hashed_to_source.get(path.replace(os.sep, "/"))
+        response = await self._get_encoded_response(source or path, scope)
+        if response.status_code in (200, 304):
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL if source else REVALIDATE_CACHE_CONTROL
+        return response
+
+    async def _get_encoded_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code not in (200, 304):
+            return response
+        # The body depends on Accept-Encoding, identity responses included
+        response.headers["vary"] = "accept-encoding"
+        if not isinstance(response, FileResponse):
+            return response
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if not encoding:
+            return response
+
+        variant = response.path + ENCODING_SUFFIXES[encoding]
+        try:
+            stat_result = os.stat(variant)
+        except OSError:
+            return response
+
+        # Each encoding is a different representation, so it gets its own
+        # ETag ("<etag>-br"); a matching If-None-Match is answered here, the
+        # identity ETag is already handled by StaticFiles
+        headers = {"content-encoding": encoding, "vary": "accept-encoding"}
+        if "last-modified" in response.headers:
+            headers["last-modified"] = response.headers["last-modified"]
+        if "etag" in response.headers:
+            headers["etag"] = encoded_etag(response.headers["etag"], encoding)
+        encoded = FileResponse(variant, stat_result=stat_result, media_type=response.media_type, headers=headers)
+        if self.is_not_modified(encoded.headers, Headers(scope=scope)):
+            return NotModifiedResponse(encoded.headers)
+        return encoded
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    precompress_static()
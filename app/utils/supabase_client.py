@@ -1,13 +1,110 @@
 import os
+import logging
+import threading
 from supabase import create_client, Client
 from typing import Dict, List, Any, Optional
 
+class SupabaseClientRegistry:
+    """Shared Supabase clients, a small round-robin pool per role.
+
+    Roles are ``anon`` (SUPABASE_ANON_KEY) and ``service``
+    (SUPABASE_SERVICE_KEY). Each client keeps its own keep-alive HTTP
+    connection pool, so reusing them avoids a fresh TLS handshake per call.
+    Clients are created lazily, warmed in ``startup()`` and closed in
+    ``shutdown()`` from the app lifespan.
+    """
+
+    ROLES = ("anon", "service")
+
+    def __init__(self, pool_size: int = 2):
+        self._pool_size = max(1, pool_size)
+        self._clients: Dict[str, List[Client]] = {role: [] for role in self.ROLES}
+        self._checkouts: Dict[str, List[int]] = {role: [] for role in self.ROLES}
+        self._next: Dict[str, int] = {role: 0 for role in self.ROLES}
+        self._lock = threading.Lock()
+
+    def _create(self, role: str) -> Client:
+        from app.config import load_config
+        config = load_config()
+        key = config.SUPABASE_ANON_KEY if role == "anon" else config.SUPABASE_SERVICE_KEY
+        return create_client(config.SUPABASE_URL, key)
+
+    def get(self, role: str = "service") -> Client:
+        """Return a shared client for role, rotating through the pool."""
+        if role not in self.ROLES:
+            raise ValueError(f"Unknown Supabase client role: {role}")
+
+        with self._lock:
+            clients = self._clients[role]
+            index = self._next[role] % self._pool_size
+            self._next[role] = index + 1
+            if index >= len(clients):
+                clients.append(self._create(role))
+                self._checkouts[role].append(0)
+                index = len(clients) - 1
+            self._checkouts[role][index] += 1
+            return clients[index]
+
+    def startup(self) -> None:
+        """Create every pooled client up front."""
+        with self._lock:
+            for role in self.ROLES:
+                while len(self._clients[role]) < self._pool_size:
+                    self._clients[role].append(self._create(role))
+                    self._checkouts[role].append(0)
+        logging.info(f"Supabase client registry started: {self.stats()}")
+
+    def shutdown(self) -> None:
+        """Close pooled HTTP sessions and forget all clients."""
+        logging.info(f"Supabase client registry stopping: {self.stats()}")
+        with self._lock:
+            for role in self.ROLES:
+                for client in self._clients[role]:
+                    self._close(client)
+                self._clients[role] = []
+                self._checkouts[role] = []
+                self._next[role] = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool usage statistics per role."""
+        with self._lock:
+            return {
+                "pool_size": self._pool_size,
+                "roles": {
+                    role: {
+                        "clients": len(self._clients[role]),
+                        "checkouts": sum(self._checkouts[role]),
+                        "checkouts_per_client": list(self._checkouts[role])
+                    }
+                    for role in self.ROLES
+                }
+            }
+
+    @staticmethod
+    def _close(client: Client) -> None:
+        sessions = (
+            getattr(getattr(client, "_postgrest", None), "session", None),
+            getattr(getattr(client, "auth", None), "_http_client", None),
+        )
+        for session in sessions:
+            if session is None:
+                continue
+            try:
+                session.close()
+            except Exception as e:
+                logging.warning(f"Failed to close Supabase session: {type(e).__name__}")
+
+client_registry = SupabaseClientRegistry(pool_size=int(os.getenv("SUPABASE_POOL_SIZE", "2")))
+
+def get_client(role: str = "service") -> Client:
+    """Shortcut for client_registry.get(role)."""
+    return client_registry.get(role)
+
 class SupabaseClient:
-    def __init__(self):
-        url = os.getenv("SUPABASE_URL")
-        key = os.getenv("SUPABASE_SERVICE_KEY")
-        self.client: Client = create_client(url, key)
-    
+    @property
+    def client(self) -> Client:
+        return client_registry.get("service")
+
     def create_table_if_not_exists(self, table_name: str, columns: Dict[str, str]) -> bool:
         """Check if table exists - Supabase tables must be created manually"""
         try:
@@ -18,7 +115,7 @@ class SupabaseClient:
         except Exception as e:
             print(f"Table {table_name} does not exist or is not accessible: {e}")
             return False
-    
+
     def insert_data(self, table_name: str, data: List[Dict[str, Any]], user_email: str) -> bool:
         """Insert data to table"""
         try:
@@ -28,7 +125,7 @@ class SupabaseClient:
                 row['updated_by'] = user_email
                 row['created_at'] = 'now()'
                 row['updated_at'] = 'now()'
-            
+
             # Try to insert data - Supabase will auto-create table if it doesn't exist
             # when using the dashboard or if you have the right permissions
             result = self.client.table(table_name).insert(data).execute()
@@ -40,7 +137,7 @@ class SupabaseClient:
             if "relation" in str(e) and "does not exist" in str(e):
                 print(f"Please create table '{table_name}' manually in Supabase dashboard first")
             return False
-    
+
     def get_table_data(self, table_name: str) -> List[Dict[str, Any]]:
         """Get all data from table"""
         try:
@@ -50,4 +147,4 @@ class SupabaseClient:
             print(f"Error getting data: {e}")
             return []
 
-supabase_client = SupabaseClient()
\ No newline at end of file
+supabase_client = SupabaseClient()
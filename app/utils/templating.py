@@ -0,0 +1,102 @@
+"""
+Shared Jinja2 templates for all routers
+One environment (and template cache) for the whole app, backed by a
+persistent bytecode cache and precompiled at startup. Large list pages are
+sent with stream_template(), which renders through Template.generate().
+"""
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterator, Optional
+
+import jinja2
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+
+from app.utils import fast_json
+from app.utils.static_assets import static_exists, static_url
+
+TEMPLATE_DIR = "app/templates"
+TEMPLATE_ROOTS = ("templates_desktop/", "templates_mobile/")
+BYTECODE_CACHE_DIR = os.getenv(
+    "TEMPLATE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "ambp_jinja_cache")
+)
+# The first flush is small so the layout <head> (CSS/JS links) leaves early
+STREAM_FIRST_CHUNK_SIZE = 2 * 1024
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def _create_environment() -> jinja2.Environment:
+    bytecode_cache = None
+    try:
+        os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(BYTECODE_CACHE_DIR)
+    except OSError as e:
+        logging.warning(f"Template bytecode cache disabled: {e}")
+
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+        autoescape=True,
+        bytecode_cache=bytecode_cache,
+        cache_size=1000  # Hold every desktop and mobile template
+    )
+    # |tojson goes through the fast encoder; Jinja still HTML-escapes the output
+    env.policies["json.dumps_function"] = fast_json.dumps_str
+    env.policies["json.dumps_kwargs"] = {}
+    env.globals["static_url"] = static_url
+    env.globals["static_exists"] = static_exists
+    return env
+
+templates = Jinja2Templates(env=_create_environment())
+
+def precompile_templates() -> int:
+    """Compile every desktop and mobile template into the shared cache."""
+    start = time.perf_counter()
+    compiled = 0
+    for name in templates.env.list_templates(filter_func=lambda n: n.startswith(TEMPLATE_ROOTS)):
+        try:
+            templates.env.get_template(name)
+            compiled += 1
+        except jinja2.TemplateError as e:
+            logging.error(f"Failed to precompile template {name}: {e}")
+    logging.info(f"Precompiled {compiled} templates in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return compiled
+
+def _render_chunks(template: jinja2.Template, context: Dict[str, Any]) -> Iterator[str]:
+    """Group the many small strings from generate() into socket-sized chunks."""
+    buffer = []
+    size = 0
+    limit = STREAM_FIRST_CHUNK_SIZE
+    try:
+        for piece in template.generate(context):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= limit:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+                limit = STREAM_CHUNK_SIZE
+    except Exception as e:
+        # Headers are already sent, so the page can only be cut short
+        logging.error(f"Error streaming template {template.name}: {e}", exc_info=True)
+        raise
+    if buffer:
+        yield "".join(buffer)
+
+def stream_template(name: str, context: Dict[str, Any], status_code: int = 200,
+                    headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """Like templates.TemplateResponse, but streams the page while it renders.
+
+    Fetch all data before calling; the template is rendered chunk by chunk in
+    the threadpool as the client reads, so memory stays flat for long tables.
+    """
+    if "request" not in context:
+        raise ValueError('context must include a "request" key')
+    template = templates.get_template(name)
+    return StreamingResponse(
+        _render_chunks(template, context),
+        status_code=status_code,
+        headers=headers,
+        media_type="text/html"
+    )
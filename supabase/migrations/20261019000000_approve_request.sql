@@ -0,0 +1,197 @@
+-- One-round-trip approval transactions.
+--
+-- approve_request() applies any approval type in a single transaction:
+-- it locks the approval row, writes the matching *_log row, updates the
+-- asset and marks the approval approved. A failure anywhere rolls the whole
+-- approval back. app/utils/approval_engine.py calls it and mirrors the same
+-- rules in InMemoryApprovalBackend.
+--
+-- Result (jsonb): {"status": "success" | "error" | "needs_asset_data",
+--                  "message": text, "type": text, "asset_id": int}
+-- add_asset / admin_add_asset need the asset row prepared by the app
+-- (reference lookups, asset tag, financials) and are still applied by
+-- approve_and_create_asset(); for them this returns "needs_asset_data" with
+-- the approval notes and writes nothing.
+
+create or replace function public.approve_request(
+    approval_id_in bigint,
+    approver_id_in uuid,
+    approver_name_in text
+) returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    warehouse_location_id constant integer := 26;
+    appr approvals%rowtype;
+    notes_data jsonb;
+    submitter_name text;
+    asset_row assets%rowtype;
+    new_status text;
+begin
+    select * into appr from approvals where approval_id = approval_id_in for update;
+    if not found then
+        return jsonb_build_object('status', 'error', 'message', 'Approval not found');
+    end if;
+    if appr.status <> 'pending' then
+        return jsonb_build_object('status', 'error', 'message', 'Approval already ' || appr.status,
+                                  'type', appr.type, 'asset_id', appr.asset_id);
+    end if;
+
+    begin
+        notes_data := coalesce(nullif(appr.notes, '')::jsonb, '{}'::jsonb);
+    exception when others then
+        notes_data := '{}'::jsonb;
+    end;
+
+    select coalesce(nullif(full_name, ''), nullif(username, ''), 'Unknown User')
+      into submitter_name from profiles where id = appr.submitted_by;
+    submitter_name := coalesce(submitter_name, 'Unknown User');
+
+    if appr.type in ('add_asset', 'admin_add_asset') then
+        return jsonb_build_object('status', 'needs_asset_data', 'type', appr.type,
+                                  'notes', notes_data);
+
+    elsif appr.type = 'damage_report' then
+        insert into damage_log (asset_id, asset_name, damage_type, severity, description,
+                                reported_by, reported_by_name, approved_by, approved_by_name,
+                                approved_at, status)
+        values (appr.asset_id, coalesce(appr.asset_name, ''), coalesce(notes_data->>'damage_type', ''),
+                coalesce(notes_data->>'severity', ''), coalesce(notes_data->>'description', ''),
+                appr.submitted_by, submitter_name, approver_id_in, approver_name_in, now(), 'approved');
+        update assets
+           set status = 'Damaged',
+               location_id = coalesce(appr.to_location_id, location_id)
+         where asset_id = appr.asset_id;
+
+    elsif appr.type = 'lost_report' then
+        insert into lost_log (asset_id, asset_name, last_location_id, date_lost, description,
+                              reported_by, reported_by_name, approved_by, approved_by_name,
+                              approved_at, status)
+        values (appr.asset_id, coalesce(appr.asset_name, ''), appr.from_location_id, current_date,
+                coalesce(notes_data->>'description', ''), appr.submitted_by, submitter_name,
+                approver_id_in, approver_name_in, now(), 'approved');
+        update assets set status = 'Lost' where asset_id = appr.asset_id;
+
+    elsif appr.type = 'repair' then
+        insert into repair_log (asset_id, asset_name, repair_action, action_type, description,
+                                performed_by, performed_by_name, approved_by, approved_by_name,
+                                approved_at, status, new_location_id, notes)
+        values (appr.asset_id, coalesce(appr.asset_name, ''), 'Repair Completed', 'completion',
+                coalesce(notes_data->>'repair_notes', ''), appr.submitted_by, submitter_name,
+                approver_id_in, approver_name_in, now(), 'approved', appr.to_location_id,
+                coalesce(notes_data->>'repair_notes', ''));
+        update assets
+           set status = case when appr.to_location_id = warehouse_location_id then 'In Storage' else 'Active' end,
+               location_id = coalesce(appr.to_location_id, location_id)
+         where asset_id = appr.asset_id;
+
+    elsif appr.type = 'relocation' then
+        select * into asset_row from assets where asset_id = appr.asset_id for update;
+        insert into relocation_log (asset_id, asset_name, old_location_id, old_location_name,
+                                    old_room_name, new_location_id, new_location_name, new_room_name,
+                                    reason, notes, requested_by, requested_by_name, approved_by,
+                                    approved_by_name, status, relocation_date, approved_at)
+        values (appr.asset_id, coalesce(appr.asset_name, ''), asset_row.location_id,
+                coalesce(notes_data->>'current_location', ''), coalesce(notes_data->>'current_room', ''),
+                appr.to_location_id, coalesce(notes_data->>'new_location', ''),
+                coalesce(notes_data->>'new_room', ''), coalesce(notes_data->>'reason', ''),
+                coalesce(notes_data->>'notes', ''), appr.submitted_by, submitter_name,
+                approver_id_in, approver_name_in, 'approved', current_date, now());
+        if appr.to_location_id is not null then
+            new_status := case
+                when appr.to_location_id = warehouse_location_id then 'In Storage'
+                when asset_row.location_id = warehouse_location_id then 'Active'
+                else asset_row.status
+            end;
+            update assets set location_id = appr.to_location_id, status = new_status
+             where asset_id = appr.asset_id;
+        end if;
+
+    elsif appr.type = 'disposal_request' then
+        insert into disposal_log (asset_id, asset_name, disposal_reason, disposal_method, description,
+                                  notes, requested_by, requested_by_name, approved_by,
+                                  approved_by_name, approved_at, disposal_date, status)
+        values (appr.asset_id, coalesce(appr.asset_name, ''), coalesce(notes_data->>'disposal_reason', ''),
+                coalesce(notes_data->>'disposal_method', ''), coalesce(notes_data->>'description', ''),
+                coalesce(notes_data->>'notes', ''), appr.submitted_by, submitter_name,
+                approver_id_in, approver_name_in, now(), current_date, 'approved');
+        update assets set status = 'Disposed' where asset_id = appr.asset_id;
+
+    elsif appr.type = 'edit_asset' then
+        -- Warehouse room means In Storage; leaving it means Active
+        new_status := notes_data->>'status';
+        if notes_data->>'location_name' = 'HO - Ciputat'
+           and notes_data->>'room_name' = '1022 - Gudang Support TOG' then
+            new_status := 'In Storage';
+        elsif new_status = 'In Storage' then
+            new_status := 'Active';
+        end if;
+
+        update assets a set
+            asset_name = case when notes_data ? 'asset_name' then notes_data->>'asset_name' else a.asset_name end,
+            manufacture = case when notes_data ? 'manufacture' then notes_data->>'manufacture' else a.manufacture end,
+            model = case when notes_data ? 'model' then notes_data->>'model' else a.model end,
+            serial_number = case when notes_data ? 'serial_number' then notes_data->>'serial_number' else a.serial_number end,
+            purchase_cost = case when notes_data ? 'purchase_cost' then (notes_data->>'purchase_cost')::numeric else a.purchase_cost end,
+            journal = case when notes_data ? 'journal' then notes_data->>'journal' else a.journal end,
+            photo_url = case when notes_data ? 'photo_url' then notes_data->>'photo_url' else a.photo_url end,
+            status = coalesce(new_status, a.status),
+            room_name = case when notes_data ? 'room_name' then notes_data->>'room_name' else a.room_name end,
+            owner_type = case when notes_data ? 'owner_type' then notes_data->>'owner_type' else a.owner_type end,
+            assigned_user_name = case when notes_data ? 'assigned_user_name' then notes_data->>'assigned_user_name' else a.assigned_user_name end,
+            company_id = coalesce((select company_id from ref_companies
+                                    where company_name = notes_data->>'company_name'), a.company_id),
+            business_unit_id = coalesce((select business_unit_id from ref_business_units
+                                          where business_unit_name = notes_data->>'business_unit_name'), a.business_unit_id),
+            location_id = coalesce((select location_id from ref_locations
+                                     where location_name = notes_data->>'location_name'
+                                       and room_name = notes_data->>'room_name'), a.location_id)
+        where a.asset_id = appr.asset_id;
+
+    else
+        return jsonb_build_object('status', 'error', 'message', 'Unknown approval type: ' || coalesce(appr.type, ''),
+                                  'type', appr.type, 'asset_id', appr.asset_id);
+    end if;
+
+    -- Same fields update_approval_status() writes
+    update approvals
+       set status = 'approved',
+           approved_by = approver_id_in,
+           approved_date = now(),
+           notes = ''
+     where approval_id = approval_id_in;
+
+    return jsonb_build_object('status', 'success', 'message', 'Request approved successfully',
+                              'type', appr.type, 'asset_id', appr.asset_id);
+end;
+$$;
+
+create or replace function public.reject_request(
+    approval_id_in bigint,
+    approver_id_in uuid
+) returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    appr approvals%rowtype;
+begin
+    update approvals
+       set status = 'rejected', approved_by = approver_id_in, approved_date = now(), notes = ''
+     where approval_id = approval_id_in and status = 'pending'
+    returning * into appr;
+    if not found then
+        return jsonb_build_object('status', 'error', 'message', 'Approval not found or already processed');
+    end if;
+    return jsonb_build_object('status', 'success', 'message', 'Request rejected',
+                              'type', appr.type, 'asset_id', appr.asset_id);
+end;
+$$;
+
+revoke all on function public.approve_request(bigint, uuid, text) from public, anon, authenticated;
+revoke all on function public.reject_request(bigint, uuid) from public, anon, authenticated;
+grant execute on function public.approve_request(bigint, uuid, text) to service_role;
+grant execute on function public.reject_request(bigint, uuid) to service_role;
@@ -0,0 +1,80 @@
+-- Batch approve / reject for the approvals queue.
+--
+-- approve_requests() applies many approvals in one round trip. Items are
+-- processed grouped by type, each inside its own savepoint, so one bad
+-- item is reported and rolled back without undoing the others. The result
+-- is one approve_request() result per id, plus "approval_id".
+-- reject_requests() rejects every still-pending id with a single UPDATE.
+
+create or replace function public.approve_requests(
+    approval_ids_in bigint[],
+    approver_id_in uuid,
+    approver_name_in text
+) returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    item record;
+    outcome jsonb;
+    results jsonb := '[]'::jsonb;
+begin
+    for item in
+        select approval_id, type from approvals
+         where approval_id = any(approval_ids_in)
+         order by type, approval_id
+    loop
+        begin
+            outcome := approve_request(item.approval_id, approver_id_in, approver_name_in);
+        exception when others then
+            outcome := jsonb_build_object('status', 'error', 'message', sqlerrm, 'type', item.type);
+        end;
+        results := results || jsonb_build_array(outcome || jsonb_build_object('approval_id', item.approval_id));
+    end loop;
+
+    return results || coalesce((
+        select jsonb_agg(jsonb_build_object('approval_id', requested.id, 'status', 'error',
+                                            'message', 'Approval not found'))
+          from unnest(approval_ids_in) as requested(id)
+         where not exists (select 1 from approvals where approval_id = requested.id)
+    ), '[]'::jsonb);
+end;
+$$;
+
+create or replace function public.reject_requests(
+    approval_ids_in bigint[],
+    approver_id_in uuid
+) returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    rejected jsonb;
+begin
+    with updated as (
+        update approvals
+           set status = 'rejected', approved_by = approver_id_in, approved_date = now(), notes = ''
+         where approval_id = any(approval_ids_in) and status = 'pending'
+        returning approval_id, type, asset_id
+    )
+    select coalesce(jsonb_agg(jsonb_build_object('approval_id', approval_id, 'status', 'success',
+                                                 'message', 'Request rejected', 'type', type,
+                                                 'asset_id', asset_id)), '[]'::jsonb)
+      into rejected from updated;
+
+    return rejected || coalesce((
+        select jsonb_agg(jsonb_build_object('approval_id', requested.id, 'status', 'error',
+                                            'message', 'Approval not found or already processed'))
+          from unnest(approval_ids_in) as requested(id)
+         where not exists (select 1 from jsonb_array_elements(rejected) r
+                            where (r->>'approval_id')::bigint = requested.id)
+    ), '[]'::jsonb);
+end;
+$$;
+
+revoke all on function public.approve_requests(bigint[], uuid, text) from public, anon, authenticated;
+revoke all on function public.reject_requests(bigint[], uuid) from public, anon, authenticated;
+grant execute on function public.approve_requests(bigint[], uuid, text) to service_role;
+grant execute on function public.reject_requests(bigint[], uuid) to service_role;
@@ -0,0 +1,89 @@
+-- Bulk asset creation.
+--
+-- reserve_asset_tags() hands out blocks of asset tag sequence numbers per
+-- prefix ("{company}-{category}{type}.{owner}{yy}."), so a bulk import
+-- numbers its tags with one call per prefix and concurrent adds never get
+-- the same number. A prefix's counter starts from the tags already in
+-- assets, the way prepare_asset_data() used to number them.
+--
+-- approve_and_create_assets() is the grouped twin of
+-- approve_and_create_asset(): it inserts every prepared asset row of a
+-- bulk import approval and marks the approval approved in one transaction.
+
+create table if not exists public.asset_tag_sequences (
+    prefix text primary key,
+    last_seq integer not null
+);
+
+create or replace function public.reserve_asset_tags(
+    prefix_in text,
+    count_in integer default 1
+) returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    last_reserved integer;
+begin
+    insert into asset_tag_sequences (prefix, last_seq)
+    select prefix_in, count(*) from assets where asset_tag like prefix_in || '%'
+    on conflict (prefix) do nothing;
+
+    update asset_tag_sequences
+       set last_seq = last_seq + greatest(count_in, 1)
+     where prefix = prefix_in
+    returning last_seq into last_reserved;
+
+    return last_reserved - greatest(count_in, 1) + 1;
+end;
+$$;
+
+create or replace function public.approve_and_create_assets(
+    approval_id_in bigint,
+    approver_id_in uuid,
+    new_assets jsonb
+) returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    appr approvals%rowtype;
+    created integer;
+begin
+    select * into appr from approvals where approval_id = approval_id_in for update;
+    if not found or appr.status <> 'pending' then
+        return jsonb_build_object('status', 'error', 'message', 'Approval not found or already processed');
+    end if;
+
+    insert into assets (asset_name, category_id, asset_type_id, manufacture, model, serial_number,
+                        company_id, business_unit_id, location_id, room_name, notes, item_condition,
+                        purchase_date, purchase_cost, warranty, supplier, journal, owner_id, status,
+                        photo_url, asset_tag, residual_percent, residual_value, useful_life,
+                        depreciation_value, book_value, year, assigned_user_id, assigned_user_name, owner_type)
+    select asset_name, category_id, asset_type_id, manufacture, model, serial_number,
+           company_id, business_unit_id, location_id, room_name, notes, item_condition,
+           purchase_date, purchase_cost, warranty, supplier, journal, owner_id, status,
+           photo_url, asset_tag, residual_percent, residual_value, useful_life,
+           depreciation_value, book_value, year, assigned_user_id, assigned_user_name, owner_type
+      from jsonb_populate_recordset(null::assets, new_assets);
+    get diagnostics created = row_count;
+
+    -- Same fields update_approval_status() writes
+    update approvals
+       set status = 'approved',
+           approved_by = approver_id_in,
+           approved_date = now(),
+           notes = ''
+     where approval_id = approval_id_in;
+
+    return jsonb_build_object('status', 'success', 'message', created || ' assets created',
+                              'type', appr.type, 'created', created);
+end;
+$$;
+
+revoke all on function public.reserve_asset_tags(text, integer) from public, anon, authenticated;
+revoke all on function public.approve_and_create_assets(bigint, uuid, jsonb) from public, anon, authenticated;
+grant execute on function public.reserve_asset_tags(text, integer) to service_role;
+grant execute on function public.approve_and_create_assets(bigint, uuid, jsonb) to service_role;
@@ -0,0 +1,19 @@
+-- Photos uploaded for add/edit asset requests.
+--
+-- The Drive upload finishes in the background (app/utils/photo.py), so its
+-- URL is kept here instead of in approvals.notes, which approving reads and
+-- clears. The worker writes its row and then reads the approval; approving
+-- links the asset to the approval and then reads this table, so whichever
+-- runs second puts the photo on the asset (attach_photo() in
+-- app/utils/approval_engine.py). Rows of rejected requests are deleted
+-- together with their Drive file.
+
+create table if not exists public.approval_photos (
+    approval_id bigint primary key references public.approvals (approval_id) on delete cascade,
+    photo_url text not null,
+    created_at timestamptz not null default now()
+);
+
+-- Only the service role (the app's data layer) reads and writes it
+alter table public.approval_photos enable row level security;
+revoke all on table public.approval_photos from anon, authenticated;
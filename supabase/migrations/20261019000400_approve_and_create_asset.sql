@@ -0,0 +1,61 @@
+-- approve_and_create_asset() that links the new asset to its approval.
+--
+-- Inserts the prepared asset row, stores its asset_id on the approval and
+-- marks the approval approved in one transaction, and returns the asset_id,
+-- so approval_photos can be applied without looking the asset up again.
+-- Same arguments and row layout as approve_and_create_assets()
+-- (..._bulk_create_assets.sql); the earlier version returned no asset_id,
+-- so it is dropped rather than replaced in place.
+--
+-- Result (jsonb): {"status": "success" | "error", "message": text,
+--                  "type": text, "asset_id": int}
+
+drop function if exists public.approve_and_create_asset(bigint, uuid, jsonb);
+
+create function public.approve_and_create_asset(
+    approval_id_in bigint,
+    approver_id_in uuid,
+    new_asset_data jsonb
+) returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    appr approvals%rowtype;
+    new_asset_id bigint;
+begin
+    select * into appr from approvals where approval_id = approval_id_in for update;
+    if not found or appr.status <> 'pending' then
+        return jsonb_build_object('status', 'error', 'message', 'Approval not found or already processed');
+    end if;
+
+    insert into assets (asset_name, category_id, asset_type_id, manufacture, model, serial_number,
+                        company_id, business_unit_id, location_id, room_name, notes, item_condition,
+                        purchase_date, purchase_cost, warranty, supplier, journal, owner_id, status,
+                        photo_url, asset_tag, residual_percent, residual_value, useful_life,
+                        depreciation_value, book_value, year, assigned_user_id, assigned_user_name, owner_type)
+    select asset_name, category_id, asset_type_id, manufacture, model, serial_number,
+           company_id, business_unit_id, location_id, room_name, notes, item_condition,
+           purchase_date, purchase_cost, warranty, supplier, journal, owner_id, status,
+           photo_url, asset_tag, residual_percent, residual_value, useful_life,
+           depreciation_value, book_value, year, assigned_user_id, assigned_user_name, owner_type
+      from jsonb_populate_record(null::assets, new_asset_data)
+    returning asset_id into new_asset_id;
+
+    -- Same fields update_approval_status() writes, plus the link to the asset
+    update approvals
+       set status = 'approved',
+           approved_by = approver_id_in,
+           approved_date = now(),
+           notes = '',
+           asset_id = new_asset_id
+     where approval_id = approval_id_in;
+
+    return jsonb_build_object('status', 'success', 'message', 'Request approved and asset created successfully',
+                              'type', appr.type, 'asset_id', new_asset_id);
+end;
+$$;
+
+revoke all on function public.approve_and_create_asset(bigint, uuid, jsonb) from public, anon, authenticated;
+grant execute on function public.approve_and_create_asset(bigint, uuid, jsonb) to service_role;
@@ -0,0 +1,30 @@
+/** Tailwind v3 build for /static/css/tailwind.css (see Dockerfile).
+ *  Only classes found in the files below end up in the stylesheet, so
+ *  class names must appear literally (no string concatenation). */
+module.exports = {
+  content: [
+    './app/templates/templates_desktop/**/*.html',
+    './app/templates/templates_mobile/**/*.html',
+    './app/static/*.js',
+    './app/routes/**/*.py'
+  ],
+  theme: {
+    extend: {
+      colors: {
+        primary: {
+          50: '#EFF6FF',
+          100: '#DBEAFE',
+          200: '#BFDBFE',
+          300: '#93C5FD',
+          400: '#60A5FA',
+          500: '#3B82F6',
+          600: '#2563EB',
+          700: '#1D4ED8',
+          800: '#1E40AF',
+          900: '#1E3A8A',
+        }
+      }
+    }
+  },
+  plugins: []
+}
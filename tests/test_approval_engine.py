@@ -0,0 +1,239 @@
+"""apply_approval / apply_rejection / apply_batch against InMemoryApprovalBackend."""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import app.utils.approval_engine as approval_engine
+import app.utils.database_manager as database_manager
+from app.utils.approval_engine import WAREHOUSE_LOCATION, WAREHOUSE_LOCATION_ID, InMemoryApprovalBackend
+
+OFFICE_LOCATION_ID = 5
+APPROVER = SimpleNamespace(id="approver-1", full_name="Approver One", username="approver", role="admin")
+
+
+def _approval(approval_id, approval_type, asset_id=1, notes=None, **fields):
+    return {
+        "approval_id": approval_id,
+        "type": approval_type,
+        "asset_id": asset_id,
+        "asset_name": "Laptop",
+        "status": "pending",
+        "submitted_by": "staff-1",
+        "notes": json.dumps(notes or {}),
+        **fields
+    }
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    tables = {
+        "approvals": [],
+        "assets": [
+            {"asset_id": 1, "asset_name": "Laptop", "status": "Active", "location_id": OFFICE_LOCATION_ID},
+            {"asset_id": 2, "asset_name": "Monitor", "status": "In Storage", "location_id": WAREHOUSE_LOCATION_ID}
+        ],
+        "profiles": [{"id": "staff-1", "full_name": "Staff One", "role": "staff"}],
+        "ref_locations": [
+            {"location_id": OFFICE_LOCATION_ID, "location_name": "HO - Ciputat", "room_name": "Finance"},
+            {"location_id": WAREHOUSE_LOCATION_ID, "location_name": WAREHOUSE_LOCATION[0], "room_name": WAREHOUSE_LOCATION[1]}
+        ]
+    }
+    monkeypatch.setattr(approval_engine, "backend", InMemoryApprovalBackend(tables))
+    monkeypatch.setattr(approval_engine.pending_counters, "refresh_if_stale", lambda: None)
+    return tables
+
+
+def _rows(name):
+    return approval_engine.backend.tables[name]
+
+
+def _asset(asset_id):
+    return next(a for a in _rows("assets") if a["asset_id"] == asset_id)
+
+
+def _approval_row(approval_id):
+    return next(a for a in _rows("approvals") if a["approval_id"] == approval_id)
+
+
+def test_relocation_into_warehouse_stores_asset(tables):
+    tables["approvals"].append(_approval(10, "relocation", to_location_id=WAREHOUSE_LOCATION_ID,
+                                         notes={"new_location": WAREHOUSE_LOCATION[0], "reason": "Spare"}))
+
+    result = approval_engine.apply_approval(10, APPROVER)
+
+    assert result["status"] == "success"
+    assert _asset(1)["location_id"] == WAREHOUSE_LOCATION_ID
+    assert _asset(1)["status"] == "In Storage"
+    log, = _rows("relocation_log")
+    assert (log["old_location_id"], log["new_location_id"], log["reason"]) == (OFFICE_LOCATION_ID, WAREHOUSE_LOCATION_ID, "Spare")
+    assert log["requested_by_name"] == "Staff One"
+    assert _approval_row(10)["status"] == "approved"
+    assert _approval_row(10)["approved_by"] == APPROVER.id
+
+
+def test_relocation_out_of_warehouse_activates_asset(tables):
+    tables["approvals"].append(_approval(11, "relocation", asset_id=2, to_location_id=OFFICE_LOCATION_ID))
+
+    result = approval_engine.apply_approval(11, APPROVER)
+
+    assert result["status"] == "success"
+    assert _asset(2)["location_id"] == OFFICE_LOCATION_ID
+    assert _asset(2)["status"] == "Active"
+
+
+def test_damage_report_marks_asset_damaged(tables):
+    tables["approvals"].append(_approval(12, "damage_report", notes={"damage_type": "Screen", "severity": "High"}))
+
+    result = approval_engine.apply_approval(12, APPROVER)
+
+    assert result["status"] == "success"
+    assert _asset(1)["status"] == "Damaged"
+    log, = _rows("damage_log")
+    assert (log["damage_type"], log["severity"], log["reported_by"]) == ("Screen", "High", "staff-1")
+
+
+def test_edit_asset_applies_fields_and_warehouse_status(tables):
+    tables["approvals"].append(_approval(13, "edit_asset", notes={
+        "asset_name": "Laptop 14\"", "status": "Active",
+        "location_name": WAREHOUSE_LOCATION[0], "room_name": WAREHOUSE_LOCATION[1]
+    }))
+
+    result = approval_engine.apply_approval(13, APPROVER)
+
+    assert result["status"] == "success"
+    assert _asset(1)["asset_name"] == "Laptop 14\""
+    assert _asset(1)["location_id"] == WAREHOUSE_LOCATION_ID
+    assert _asset(1)["status"] == "In Storage"
+
+
+def test_unknown_type_is_an_error_and_changes_nothing(tables):
+    tables["approvals"].append(_approval(14, "teleport"))
+
+    result = approval_engine.apply_approval(14, APPROVER)
+
+    assert result["status"] == "error"
+    assert result["message"] == "Unknown approval type: teleport"
+    assert _approval_row(14)["status"] == "pending"
+    assert _asset(1)["status"] == "Active"
+
+
+def test_rejection_marks_approval_once(tables):
+    tables["approvals"].append(_approval(15, "damage_report"))
+
+    assert approval_engine.apply_rejection(15, APPROVER)["status"] == "success"
+    assert _approval_row(15)["status"] == "rejected"
+    assert _asset(1)["status"] == "Active"
+    assert approval_engine.apply_rejection(15, APPROVER)["status"] == "error"
+
+
+def test_add_asset_creates_asset_and_links_it(tables, monkeypatch):
+    monkeypatch.setattr(database_manager, "prepare_asset_data", lambda notes: {"asset_name": notes["asset_name"], "status": "Active"})
+    tables["approvals"].append(_approval(16, "add_asset", asset_id=None, notes={"asset_name": "Printer"}))
+
+    result = approval_engine.apply_approval(16, APPROVER)
+
+    assert result["status"] == "success"
+    assert result["type"] == "add_asset"
+    assert _asset(result["asset_id"])["asset_name"] == "Printer"
+    assert _approval_row(16)["asset_id"] == result["asset_id"]
+
+
+def test_mixed_batch_reports_each_item(tables, monkeypatch):
+    monkeypatch.setattr(database_manager, "prepare_asset_data", lambda notes: {"asset_name": notes["asset_name"], "status": "Active"})
+    tables["approvals"].extend([
+        _approval(20, "damage_report"),
+        _approval(21, "relocation", asset_id=2, to_location_id=OFFICE_LOCATION_ID),
+        _approval(22, "teleport"),
+        _approval(23, "add_asset", asset_id=None, notes={"asset_name": "Scanner"}),
+        _approval(24, "disposal_request", status="approved")
+    ])
+
+    results = approval_engine.apply_batch([20, 21, 22, 23, 24, 99, 20], "approved", APPROVER)
+
+    by_id = {r["approval_id"]: r for r in results}
+    assert len(results) == 6
+    assert {i for i, r in by_id.items() if r["status"] == "success"} == {20, 21, 23}
+    assert by_id[22]["message"] == "Unknown approval type: teleport"
+    assert by_id[24]["message"] == "Approval already approved"
+    assert by_id[99]["message"] == "Approval not found"
+    assert _asset(1)["status"] == "Damaged"
+    assert _asset(2)["status"] == "Active"
+    assert any(a["asset_name"] == "Scanner" for a in _rows("assets"))
+    assert [_approval_row(i)["status"] for i in (20, 21, 22, 23)] == ["approved", "approved", "pending", "approved"]
+
+
+def test_batch_rejection(tables):
+    tables["approvals"].extend([_approval(30, "damage_report"), _approval(31, "repair")])
+
+    results = approval_engine.apply_batch([30, 31], "rejected", APPROVER)
+
+    assert [r["status"] for r in results] == ["success", "success"]
+    assert [_approval_row(i)["status"] for i in (30, 31)] == ["rejected", "rejected"]
+
+
+PHOTO_URL = "https://drive.google.com/thumbnail?id=abc&sz=w400-h300"
+
+
+def test_photo_uploaded_while_new_asset_is_being_created(tables, monkeypatch):
+    # The upload finishes after approve_request handed out the notes and
+    # before approve_and_create_asset runs
+    def prepare_asset_data(notes):
+        assert approval_engine.attach_photo(16, PHOTO_URL)
+        return {"asset_name": notes["asset_name"], "status": "Active"}
+
+    monkeypatch.setattr(database_manager, "prepare_asset_data", prepare_asset_data)
+    tables["approvals"].append(_approval(16, "add_asset", asset_id=None, notes={"asset_name": "Printer"}))
+
+    result = approval_engine.apply_approval(16, APPROVER)
+
+    assert result["status"] == "success"
+    assert _asset(result["asset_id"])["photo_url"] == PHOTO_URL
+
+
+def test_photo_uploaded_after_approval_goes_to_asset(tables):
+    tables["approvals"].append(_approval(17, "edit_asset", notes={"asset_name": "Laptop", "photo_url": "old"}))
+
+    assert approval_engine.apply_approval(17, APPROVER)["status"] == "success"
+    assert approval_engine.attach_photo(17, PHOTO_URL)
+    assert _asset(1)["photo_url"] == PHOTO_URL
+
+
+def test_photo_uploaded_before_approval_goes_to_asset(tables):
+    tables["approvals"].append(_approval(18, "edit_asset", notes={"asset_name": "Laptop", "photo_url": "old"}))
+
+    assert approval_engine.attach_photo(18, PHOTO_URL)
+    assert "photo_url" not in _asset(1)
+    assert approval_engine.apply_approval(18, APPROVER)["status"] == "success"
+    assert _asset(1)["photo_url"] == PHOTO_URL
+
+
+def test_photo_of_rejected_request_is_deleted(tables, monkeypatch):
+    import app.utils.photo as photo
+    deleted = []
+    monkeypatch.setattr(photo, "delete_from_drive", deleted.append)
+    tables["approvals"].extend([_approval(40, "edit_asset"), _approval(41, "add_asset", asset_id=None)])
+
+    assert approval_engine.attach_photo(40, PHOTO_URL)
+    assert approval_engine.apply_rejection(40, APPROVER)["status"] == "success"
+    assert deleted == [PHOTO_URL]
+
+    assert approval_engine.apply_rejection(41, APPROVER)["status"] == "success"
+    assert not approval_engine.attach_photo(41, PHOTO_URL)
+    assert _rows("approval_photos") == []
+
+
+def test_events_name_submitter_missing_from_pending_index(tables, monkeypatch):
+    # Submitted on another worker: this worker's pending index has never seen it
+    published = []
+    monkeypatch.setattr(approval_engine.event_bus, "_subscribers", {object()})
+    monkeypatch.setattr(approval_engine.event_bus, "publish", lambda event, **data: published.append((event, data)))
+    tables["approvals"].extend([_approval(50, "damage_report"), _approval(51, "repair")])
+
+    approval_engine.apply_approval(50, APPROVER)
+    approval_engine.apply_batch([51], "rejected", APPROVER)
+
+    assert [(event, data["submitted_by"], data["submitter_role"]) for event, data in published] == [
+        ("approval_approved", "staff-1", "staff"),
+        ("approval_rejected", "staff-1", "staff")
+    ]
@@ -0,0 +1,25 @@
+"""Keyset cursors of the approvals list."""
+import base64
+from datetime import datetime, timezone
+
+from app.utils.approval_queries import decode_cursor, encode_cursor
+
+
+def _cursor(raw):
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"submitted_date": "2026-10-19T08:30:00.12345+00:00", "approval_id": 42})
+
+    assert decode_cursor(cursor) == (datetime(2026, 10, 19, 8, 30, 0, 123450, tzinfo=timezone.utc), 42)
+
+
+def test_cursor_for_null_date():
+    assert decode_cursor(encode_cursor({"submitted_date": None, "approval_id": 7})) == (None, 7)
+
+
+def test_crafted_cursor_is_rejected():
+    assert decode_cursor(_cursor('2026-10-19",approval_id.gt.0,submitted_date.lt."|1')) is None
+    assert decode_cursor(_cursor("2026-10-19|not-a-number")) is None
+    assert decode_cursor("%%%") is None
@@ -0,0 +1,90 @@
+"""Exporting assets for bulk update and staging the sheet back."""
+from io import BytesIO
+
+import pytest
+from openpyxl import Workbook
+
+import app.utils.bulk_import as bulk_import
+from app.utils.bulk_import import IMPORT_COLUMNS, ReferenceIndex, export_row, stage_sheet
+from app.utils.import_staging import ImportStagingStore
+
+INDEX = ReferenceIndex(
+    categories=[{"category_id": 1, "category_name": "Laptop", "category_code": "L"}],
+    asset_types=[{"asset_type_id": 2, "type_name": "Notebook", "type_code": "N"}],
+    companies=[{"company_id": 3, "company_name": "TOG", "company_code": "T"}],
+    business_units=[{"business_unit_id": 4, "business_unit_name": "Finance"}],
+    locations=[{"location_id": 5, "location_name": "HO - Ciputat", "room_name": "Lt 2"}],
+    owners=[{"owner_id": 6, "owner_name": "IT Dept", "owner_code": "I"}],
+    profiles=[{"id": "user-1", "full_name": "Budi Santoso", "username": "budi"}]
+)
+
+
+def _asset(asset_id, **fields):
+    """An asset as the export query returns it: stored columns plus ref_* embeds."""
+    asset = {
+        "asset_id": asset_id, "asset_name": f"Asset {asset_id}", "manufacture": "Lenovo", "model": "T14",
+        "serial_number": f"SN{asset_id}", "asset_tag": f"T-LN.I24.00{asset_id}", "room_name": "Lt 2",
+        "notes": None, "item_condition": "Good", "purchase_date": "2024-03-01", "purchase_cost": 15000000.0,
+        "warranty": None, "supplier": "Bhinneka", "journal": None, "status": "Active", "year": 2024,
+        "owner_type": "GA", "assigned_user_id": None, "assigned_user_name": None,
+        "category_id": 1, "asset_type_id": 2, "company_id": 3, "business_unit_id": 4, "location_id": 5, "owner_id": 6,
+        "ref_categories": {"category_name": "Laptop"}, "ref_asset_types": {"type_name": "Notebook"},
+        "ref_companies": {"company_name": "TOG"}, "ref_business_units": {"business_unit_name": "Finance"},
+        "ref_locations": {"location_name": "HO - Ciputat", "room_name": "Lt 2"}, "ref_owners": {"owner_name": "IT Dept"}
+    }
+    asset.update(fields)
+    return asset
+
+
+ASSETS = [
+    _asset(1),
+    _asset(2, owner_type="IT", assigned_user_id="user-1", assigned_user_name="Budi Santoso")
+]
+
+
+def _sheet(rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(IMPORT_COLUMNS)
+    for row in rows:
+        sheet.append(row)
+    output = BytesIO()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+@pytest.fixture
+def staging(tmp_path, monkeypatch):
+    store = ImportStagingStore(path=str(tmp_path / "staging.sqlite3"))
+    monkeypatch.setattr(bulk_import, "import_staging", store)
+    monkeypatch.setattr(bulk_import, "fetch_snapshot", lambda ids: {a["asset_id"]: a for a in ASSETS if a["asset_id"] in ids})
+    return store
+
+
+def test_export_keeps_owner_type_and_assigned_user():
+    row = dict(zip(IMPORT_COLUMNS, export_row(ASSETS[1])))
+
+    assert (row["owner_type"], row["assigned_user_name"]) == ("IT", "Budi Santoso")
+    assert row["category_name"] == "Laptop"
+
+
+def test_reimporting_an_unchanged_export_stages_nothing(staging):
+    batch_id = staging.create_batch("admin-1")
+
+    counts = stage_sheet(_sheet([export_row(asset) for asset in ASSETS]), batch_id, INDEX)
+
+    assert counts == {"rows": 0, "unchanged": 2, "errors": 0}
+    assert staging.page_rows(batch_id) == []
+
+
+def test_reimport_stages_only_changed_columns(staging):
+    batch_id = staging.create_batch("admin-1")
+    edited = export_row(ASSETS[1])
+    edited[IMPORT_COLUMNS.index("status")] = "Damaged"
+
+    counts = stage_sheet(_sheet([export_row(ASSETS[0]), edited]), batch_id, INDEX)
+
+    assert counts == {"rows": 1, "unchanged": 1, "errors": 0}
+    row, = staging.page_rows(batch_id)
+    assert row["payload"] == {"status": "Damaged"}
@@ -0,0 +1,48 @@
+"""PhotoUploadQueue retries, shutdown and the full-queue fallback."""
+import asyncio
+import threading
+
+import app.utils.photo as photo
+from app.utils.photo import PhotoUploadQueue
+
+
+def test_stop_gives_up_scheduled_retries(monkeypatch):
+    monkeypatch.setattr(photo, "RETRY_DELAYS", (60,))
+    monkeypatch.setattr(photo, "upload_to_drive", lambda *args: None)
+    uploads = PhotoUploadQueue(workers=1)
+    uploads.start()
+
+    uploads._process({"image_data": b"x", "filename": "a.jpg", "name": "a", "target": ("profile", "p1"), "attempt": 0})
+    timer, = uploads._timers
+    uploads.stop()
+
+    assert not timer.is_alive()
+    assert uploads._timers == set()
+    assert uploads.failed == 1
+
+
+def test_retry_after_stop_counts_as_failed():
+    uploads = PhotoUploadQueue(workers=0)
+
+    uploads._retry({"target": ("profile", "p1"), "attempt": 1})
+
+    assert uploads.failed == 1
+    assert uploads.pending == 0
+
+
+def test_full_queue_uploads_off_the_event_loop(monkeypatch):
+    saved = []
+    monkeypatch.setattr(photo, "upload_to_drive", lambda *args: "https://drive.google.com/thumbnail?id=1")
+    monkeypatch.setattr(photo, "_save_photo_url", lambda target, url: saved.append(threading.current_thread()))
+    uploads = PhotoUploadQueue(workers=0, max_pending=1)
+
+    async def submit_two():
+        await uploads.enqueue(b"x", "a.jpg", "a", ("profile", "p1"))
+        await uploads.enqueue(b"y", "b.jpg", "b", ("profile", "p1"))
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(submit_two())
+
+    assert uploads.pending == 1
+    assert uploads.completed == 1
+    assert saved and saved[0] is not loop_thread
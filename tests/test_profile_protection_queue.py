@@ -0,0 +1,30 @@
+"""ProfileProtectionQueue start/stop."""
+import app.utils.profile_utils as profile_utils
+from app.utils.profile_utils import ProfileProtectionQueue
+
+
+def test_enqueue_after_stop_does_not_restart_worker(monkeypatch):
+    checked = []
+    monkeypatch.setattr(profile_utils, "protect_profile_data", checked.append)
+    checks = ProfileProtectionQueue()
+    checks.start()
+
+    assert checks.enqueue("user-1")
+    checks.stop()
+    assert checked == ["user-1"]
+
+    assert not checks.enqueue("user-2")
+    assert checks._thread is None
+    assert checked == ["user-1"]
+
+
+def test_start_after_stop_accepts_checks_again(monkeypatch):
+    checked = []
+    monkeypatch.setattr(profile_utils, "protect_profile_data", checked.append)
+    checks = ProfileProtectionQueue()
+    checks.stop()
+
+    checks.start()
+    assert checks.enqueue("user-3")
+    checks.stop()
+    assert checked == ["user-3"]